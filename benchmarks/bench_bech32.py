@@ -0,0 +1,72 @@
+"""
+bech32 throughput for nostr's 32-byte npub/nsec/note payloads: the original reference
+implementation vs the table-driven list API (bech32_encode/bech32_decode) vs the
+bytes API (bech32_encode_bytes/bech32_decode_bytes).
+
+    python benchmarks/bench_bech32.py [num_keys]
+"""
+import os
+import sys
+import timeit
+
+from nostr import bech32
+
+
+def reference_polymod(values):
+    # bech32_polymod as originally vendored, with its inner 5-step loop
+    generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
+    chk = 1
+    for value in values:
+        top = chk >> 25
+        chk = (chk & 0x1ffffff) << 5 ^ value
+        for i in range(5):
+            chk ^= generator[i] if ((top >> i) & 1) else 0
+    return chk
+
+
+def reference_encode(hrp, data):
+    values = bech32.convertbits(data, 8, 5)
+    polymod = reference_polymod(bech32.bech32_hrp_expand(hrp) + values + [0, 0, 0, 0, 0, 0]) ^ 1
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + '1' + ''.join([bech32.CHARSET[d] for d in values + checksum])
+
+
+def reference_decode(bech):
+    pos = bech.rfind('1')
+    hrp, data = bech[:pos], [bech32.CHARSET.find(x) for x in bech[pos+1:]]
+    if ((any(ord(x) < 33 or ord(x) > 126 for x in bech)) or (bech.lower() != bech and bech.upper() != bech)
+            or not all(x in bech32.CHARSET for x in bech[pos+1:])
+            or reference_polymod(bech32.bech32_hrp_expand(hrp) + data) != 1):
+        return None
+    return bytes(bech32.convertbits(data[:-6], 5, 8)[:-1])
+
+
+def main(n: int):
+    keys = [os.urandom(32) for _ in range(n)]
+    npubs = [bech32.bech32_encode_bytes("npub", key) for key in keys]
+    assert all(reference_encode("npub", key) == npub for key, npub in zip(keys, npubs))
+    assert all(reference_decode(npub) == key for key, npub in zip(keys, npubs))
+
+    encoders = {
+        "reference": lambda: [reference_encode("npub", key) for key in keys],
+        "table (lists)": lambda: [bech32.bech32_encode("npub", bech32.convertbits(key, 8, 5), bech32.Encoding.BECH32) for key in keys],
+        "table (bytes)": lambda: [bech32.bech32_encode_bytes("npub", key) for key in keys],
+    }
+    decoders = {
+        "reference": lambda: [reference_decode(npub) for npub in npubs],
+        "table (lists)": lambda: [bytes(bech32.convertbits(bech32.bech32_decode(npub)[1], 5, 8)[:-1]) for npub in npubs],
+        "table (bytes)": lambda: [bech32.bech32_decode_bytes(npub)[1] for npub in npubs],
+    }
+
+    print(f"{n} npubs")
+    print(f"{'':<16}{'encode/s':>12}{'speedup':>9}{'decode/s':>12}{'speedup':>9}")
+    baseline = None
+    for label in encoders:
+        encode = min(timeit.repeat(encoders[label], number=1, repeat=5))
+        decode = min(timeit.repeat(decoders[label], number=1, repeat=5))
+        baseline = baseline or (encode, decode)
+        print(f"{label:<16}{n / encode:>12.0f}{baseline[0] / encode:>8.1f}x{n / decode:>12.0f}{baseline[1] / decode:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
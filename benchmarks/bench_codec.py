@@ -0,0 +1,70 @@
+"""
+Parse and serialize throughput of each available JSON backend on synthetic relay
+traffic (a mix of short notes, replies with tag lists, contact lists and long-form
+content, wrapped as relay EVENT frames).
+
+    python benchmarks/bench_codec.py
+"""
+import json
+import random
+import timeit
+
+from nostr import codec
+from nostr.event import Event
+
+
+def relay_frames(n: int = 2_000, seed: int = 1) -> "list[str]":
+    rng = random.Random(seed)
+    hexid = lambda: "%064x" % rng.getrandbits(256)
+    words = ["nostr", "bitcoin", "relay", "zap", "gm", "ñandú", "日本語", "🤙", "hello", "world"]
+    frames = []
+    for _ in range(n):
+        kind = rng.choice([1, 1, 1, 1, 3, 7, 30023])
+        if kind == 3:
+            tags = [["p", hexid()] for _ in range(rng.randrange(50, 500))]
+            content = ""
+        else:
+            tags = [["e", hexid()] for _ in range(rng.randrange(0, 4))] + [["p", hexid()] for _ in range(rng.randrange(0, 4))]
+            length = 2_000 if kind == 30023 else rng.randrange(5, 60)
+            content = " ".join(rng.choice(words) for _ in range(length))
+        e = {
+            "id": hexid(),
+            "pubkey": hexid(),
+            "created_at": 1_680_000_000 + rng.randrange(1_000_000),
+            "kind": kind,
+            "tags": tags,
+            "content": content,
+            "sig": hexid() + hexid(),
+        }
+        frames.append(json.dumps(["EVENT", "sub", e]))
+    return frames
+
+
+def main():
+    frames = relay_frames()
+    total_mb = sum(len(f.encode()) for f in frames) / 1e6
+    events = [codec.loads(f)[2] for f in frames]
+    serialize_args = [[0, e["pubkey"], e["created_at"], e["kind"], e["tags"], e["content"]] for e in events]
+
+    results = {}
+    for backend in codec.available_backends():
+        codec.set_backend(backend)
+        parse = min(timeit.repeat(lambda: [codec.loads(f) for f in frames], number=1, repeat=5))
+        serialize = min(timeit.repeat(lambda: [codec.dumps_bytes(a) for a in serialize_args], number=1, repeat=5))
+        event_ids = min(timeit.repeat(lambda: [Event.compute_id(*a[1:]) for a in serialize_args], number=1, repeat=5))
+        results[backend] = (parse, serialize, event_ids)
+
+    baseline = results["json"]
+    print(f"{len(frames)} frames, {total_mb:.1f} MB")
+    print(f"{'backend':<10}{'parse MB/s':>14}{'serialize MB/s':>18}{'compute_id/s':>16}")
+    for backend, (parse, serialize, event_ids) in results.items():
+        print(
+            f"{backend:<10}"
+            f"{total_mb / parse:>10.1f} ({baseline[0] / parse:.1f}x)"
+            f"{total_mb / serialize:>12.1f} ({baseline[1] / serialize:.1f}x)"
+            f"{len(frames) / event_ids:>10.0f} ({baseline[2] / event_ids:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
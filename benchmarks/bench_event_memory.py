@@ -0,0 +1,45 @@
+"""
+Memory held by a timeline of Events vs the same timeline as CompactEvents.
+
+    python benchmarks/bench_event_memory.py [num_events]
+"""
+import sys
+import tracemalloc
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0])
+from bench_codec import relay_frames
+
+from nostr import codec
+from nostr.event import CompactEvent, Event
+
+
+def measure(build) -> "tuple[list, int]":
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return held, after - before
+
+
+def compare(label: str, frames: "list[str]"):
+    n = len(frames)
+    # Each side is built from the raw frames and keeps only what it references
+    events, event_bytes = measure(lambda: [Event.from_json_object(codec.loads(f)[2]) for f in frames])
+    compact, compact_bytes = measure(lambda: [CompactEvent.from_event(Event.from_json_object(codec.loads(f)[2])) for f in frames])
+    assert all(c.to_event() == e for c, e in zip(compact, events))
+
+    print(f"{label} ({n} events)")
+    print(f"  Event:        {event_bytes / n:8.0f} bytes/event")
+    print(f"  CompactEvent: {compact_bytes / n:8.0f} bytes/event ({event_bytes / compact_bytes:.2f}x smaller)")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    frames = relay_frames(n)
+    compare("mixed relay traffic", frames)
+    compare("kind 1 notes only", [f for f in frames if codec.loads(f)[2]["kind"] == 1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Microbenchmarks of the library's hot paths on a deterministic synthetic corpus, plus
+an end-to-end ingest benchmark against an in-process websocket relay.
+
+Each benchmark reports the best of several runs as time per operation. Save a run
+with `--json` and pass it back with `--compare` to see the ratio for each benchmark;
+the script exits with status 1 if any benchmark got slower by more than
+`--threshold`, so it can gate a CI job. Results are only comparable on the same
+machine and Python build.
+
+    python benchmarks/bench_hot_paths.py --json baseline.json
+    git checkout my-branch
+    python benchmarks/bench_hot_paths.py --compare baseline.json
+    python benchmarks/bench_hot_paths.py -k filter -k bech32   # only matching benchmarks
+
+The ingest benchmark needs the `websockets` package (the "async" extra) for the
+stand-in relay and is skipped without it.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import timeit
+
+sys.path.insert(0, __file__.rsplit("/", 1)[0])
+from bench_codec import relay_frames
+
+from nostr import bech32, codec
+from nostr.event import Event
+from nostr.filter import Filter, Filters
+from nostr.key import PrivateKey
+from nostr.message_pool import IngestOptions, MessagePool
+from nostr.pow import count_leading_zero_bits
+from nostr.relay import Relay
+
+try:
+    from websockets.sync.server import serve
+except ImportError:  # pragma: no cover
+    serve = None
+
+
+SEED = 1
+
+
+
+class Corpus:
+    """ Signed events shaped like relay traffic, identical on every run """
+    def __init__(self, num_events: int) -> None:
+        rng = random.Random(SEED)
+        self.keys = [PrivateKey(rng.getrandbits(256).to_bytes(32, "big")) for _ in range(20)]
+        self.events = []
+        for i, frame in enumerate(relay_frames(num_events, SEED)):
+            e = codec.loads(frame)[2]
+            event = Event(e["content"], created_at=e["created_at"], kind=e["kind"], tags=e["tags"])
+            self.keys[i % len(self.keys)].sign_event(event)
+            self.events.append(event)
+        self.frames = [codec.dumps(["EVENT", "sub", e.to_json_object()]) for e in self.events]
+        self.wire_events = [codec.loads(f)[2] for f in self.frames]
+
+        authors = [k.public_key.hex() for k in self.keys[:5]]
+        tagged = Filter(kinds=[1])
+        tagged.add_arbitrary_tag('p', [self.events[0].tags[0][1] if self.events[0].tags else "00" * 32])
+        self.filters = Filters([
+            Filter(kinds=[1, 7], since=1_680_500_000),
+            Filter(authors=authors, kinds=[1]),
+            tagged,
+        ])
+
+        self.raw_ids = [bytes.fromhex(e.id) for e in self.events]
+        self.five_bit_ids = [bech32.convertbits(raw, 8, 5) for raw in self.raw_ids]
+        self.messages = [e.content[:200] for e in self.events[:200]]
+        sender, recipient = self.keys[0], self.keys[1]
+        self.dm_keys = (sender, recipient.public_key.hex())
+        self.encrypted = [sender.encrypt_message(m, recipient.public_key.hex()) for m in self.messages]
+        self.pow_ids = ["%064x" % (rng.getrandbits(256) >> rng.randrange(0, 24)) for _ in range(num_events)]
+
+
+
+def benchmarks(corpus: Corpus) -> "dict[str, tuple[callable, int]]":
+    """ name -> (function running a batch, operations per batch) """
+    events, wire = corpus.events, corpus.wire_events
+    sender, recipient_hex = corpus.dm_keys
+
+    def compute_id():
+        for e in events:
+            Event.compute_id(e.public_key, e.created_at, e.kind, e.tags, e.content)
+
+    def verify():
+        # Fresh Events so each run checks the supplied id again
+        for e in wire[:500]:
+            Event.from_json_object(e).verify()
+
+    def filter_matches():
+        for e in events:
+            corpus.filters.match(e)
+
+    def convertbits():
+        for raw in corpus.raw_ids:
+            bech32.convertbits(raw, 8, 5)
+
+    def bech32_encode():
+        for data in corpus.five_bit_ids:
+            bech32.bech32_encode("note", data, bech32.Encoding.BECH32)
+
+    def bech32_encode_bytes():
+        for raw in corpus.raw_ids:
+            bech32.bech32_encode_bytes("note", raw)
+
+    def encrypt_message():
+        for m in corpus.messages:
+            sender.encrypt_message(m, recipient_hex)
+
+    def decrypt_message():
+        receiver, sender_hex = corpus.keys[1], sender.public_key.hex()
+        for m in corpus.encrypted:
+            receiver.decrypt_message(m, sender_hex)
+
+    def process_message():
+        pool = MessagePool()
+        for frame in corpus.frames:
+            pool._process_message(frame, "wss://bench")
+
+    def process_message_verified():
+        pool = MessagePool(ingest_options=IngestOptions(verify_signatures=True))
+        for frame in corpus.frames[:500]:
+            pool._process_message(frame, "wss://bench")
+
+    def leading_zero_bits():
+        for event_id in corpus.pow_ids:
+            count_leading_zero_bits(event_id)
+
+    n = len(events)
+    return {
+        "event.compute_id": (compute_id, n),
+        "event.verify": (verify, min(n, 500)),
+        "filter.matches": (filter_matches, n),
+        "bech32.convertbits": (convertbits, n),
+        "bech32.bech32_encode": (bech32_encode, n),
+        "bech32.bech32_encode_bytes": (bech32_encode_bytes, n),
+        "key.encrypt_message": (encrypt_message, len(corpus.messages)),
+        "key.decrypt_message": (decrypt_message, len(corpus.encrypted)),
+        "message_pool.process_message": (process_message, n),
+        "message_pool.process_message_verified": (process_message_verified, min(n, 500)),
+        "pow.count_leading_zero_bits": (leading_zero_bits, n),
+    }
+
+
+
+class StandInRelay:
+    """ Local websocket server that answers every REQ with the corpus frames and an EOSE """
+    def __init__(self, frames: "list[str]") -> None:
+        self.frames = frames
+        self.server = serve(self._handle, "127.0.0.1", 0)
+        self.url = f"ws://127.0.0.1:{self.server.socket.getsockname()[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def _handle(self, websocket):
+        for message in websocket:
+            message = codec.loads(message)
+            if message[0] == "REQ":
+                for frame in self.frames:
+                    websocket.send(frame)
+                websocket.send(codec.dumps(["EOSE", message[1]]))
+
+    def close(self):
+        self.server.shutdown()
+
+
+def ingest(relay_url: str, num_events: int, ingest_options: IngestOptions = None) -> float:
+    """ Seconds from sending a REQ until its EOSE, with every event consumed from the pool """
+    pool = MessagePool(ingest_options=ingest_options)
+    relay = Relay(relay_url, pool)
+    relay.reconnect = False
+    threading.Thread(target=relay.connect, daemon=True).start()
+    threading.Thread(target=relay.queue_worker, daemon=True).start()
+    while not relay.connected:
+        time.sleep(0.001)
+
+    started = time.perf_counter()
+    relay.publish(codec.dumps(["REQ", "sub", {}]))
+    received = 0
+    while received < num_events:
+        pool.get_event()
+        received += 1
+    pool.get_eose_notice()
+    elapsed = time.perf_counter() - started
+    relay.close()
+    return elapsed
+
+
+def run(corpus: Corpus, patterns: "list[str]", repeat: int) -> "dict[str, float]":
+    """ name -> best seconds per operation """
+    selected = lambda name: not patterns or any(p in name for p in patterns)
+    results = {}
+    for name, (fn, ops) in benchmarks(corpus).items():
+        if selected(name):
+            results[name] = min(timeit.repeat(fn, number=1, repeat=repeat)) / ops
+
+    if serve is not None:
+        relay = StandInRelay(corpus.frames)
+        n = len(corpus.frames)
+        for name, options in (
+                ("ingest.websocket", None),
+                ("ingest.websocket_verified", IngestOptions(verify_signatures=True))):
+            if selected(name):
+                results[name] = min(ingest(relay.url, n, options) for _ in range(repeat)) / n
+        relay.close()
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", "--num-events", type=int, default=2_000)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("-k", dest="patterns", action="append", default=[], help="only run benchmarks whose name contains this")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="compare against results previously written with --json")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression (default 10%%)")
+    args = parser.parse_args()
+
+    results = run(Corpus(args.num_events), args.patterns, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print(f"{args.num_events} events, {codec.get_backend()} codec, Python {platform.python_version()}, {git_revision()}")
+    header = f"{'benchmark':<42}{'us/op':>10}"
+    if baseline:
+        header += f"{'baseline':>10}{'ratio':>8}   ({baseline['revision']})"
+    print(header)
+
+    regressions = []
+    for name, seconds in results.items():
+        line = f"{name:<42}{seconds * 1e6:>10.2f}"
+        previous = baseline["results"].get(name) if baseline else None
+        if previous:
+            ratio = seconds / previous
+            line += f"{previous * 1e6:>10.2f}{ratio:>7.2f}x"
+            if ratio > 1 + args.threshold:
+                line += "  slower"
+                regressions.append(name)
+        print(line)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "codec": codec.get_backend(),
+                "num_events": args.num_events,
+                "results": results,
+            }, f, indent=2)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
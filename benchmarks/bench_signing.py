@@ -0,0 +1,79 @@
+"""
+Signing and verification throughput with parsed native keys reused (what PrivateKey,
+PublicKey and Event.verify do) vs re-parsing the key for every signature, and bulk
+`PrivateKey.sign_events` vs `sign_event` in a loop.
+
+    python benchmarks/bench_signing.py [num_signatures]
+"""
+import os
+import sys
+import timeit
+
+import secp256k1
+
+from nostr.event import Event, parse_schnorr_pubkey
+from nostr.key import PrivateKey
+
+
+def main(n: int):
+    pks = [PrivateKey() for _ in range(10)]
+    hashes = [os.urandom(32) for _ in range(n)]
+    signed = [(pks[i % len(pks)], h, bytes.fromhex(pks[i % len(pks)].sign_message_hash(h))) for i, h in enumerate(hashes)]
+    events = []
+    for i in range(n):
+        event = Event(content=f"event {i}")
+        pks[i % len(pks)].sign_event(event)
+        events.append(event.to_json_object())
+
+    def sign_reparsed():
+        for pk, h, _ in signed:
+            secp256k1.PrivateKey(pk.raw_secret).schnorr_sign(h, None, raw=True)
+
+    def sign_reused():
+        for pk, h, _ in signed:
+            pk.sign_message_hash(h)
+
+    def verify_reparsed():
+        for pk, h, sig in signed:
+            secp256k1.PublicKey(b"\x02" + pk.public_key.raw_bytes, True).schnorr_verify(h, sig, None, raw=True)
+
+    def verify_reused():
+        for pk, h, sig in signed:
+            parse_schnorr_pubkey(pk.public_key.hex()).schnorr_verify(h, sig, None, raw=True)
+
+    def event_verify_reparsed():
+        for e in events:
+            event = Event.from_json_object(e)
+            event.verify_id() and event._verify_signature(secp256k1.PublicKey(bytes.fromhex("02" + event.public_key), True))
+
+    def event_verify_reused():
+        for e in events:
+            Event.from_json_object(e).verify()
+
+    unsigned = lambda: [Event(content=f"event {i}", public_key=pks[0].public_key.hex(), created_at=1_680_000_000) for i in range(n)]
+
+    def sign_event_loop():
+        for event in unsigned():
+            pks[0].sign_event(event)
+
+    def sign_events_bulk():
+        pks[0].sign_events(unsigned())
+
+    def sign_events_pool():
+        pks[0].sign_events(unsigned(), num_workers=None, min_parallel_batch=1)
+
+    print(f"{n} signatures by {len(pks)} keys, {os.cpu_count()} CPUs")
+    print(f"{'':<18}{'before/s':>12}{'after/s':>12}{'speedup':>9}")
+    for label, before, after in (
+            ("sign", sign_reparsed, sign_reused),
+            ("verify", verify_reparsed, verify_reused),
+            ("Event.verify", event_verify_reparsed, event_verify_reused),
+            ("sign_events", sign_event_loop, sign_events_bulk),
+            ("sign_events pool", sign_event_loop, sign_events_pool)):
+        t_before = min(timeit.repeat(before, number=1, repeat=5))
+        t_after = min(timeit.repeat(after, number=1, repeat=5))
+        print(f"{label:<18}{n / t_before:>12.0f}{n / t_after:>12.0f}{t_before / t_after:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000)
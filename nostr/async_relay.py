@@ -0,0 +1,208 @@
+import asyncio
+import ssl
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+import websockets
+from .filter import Filters
+from .message_pool import AsyncMessagePool
+from .metrics import RelayMetrics
+from .relay import ReconnectPolicy, ReconnectScheduler, RelayPolicy, RelayProxyConnectionConfig, _resubscribe_messages
+from .subscription import Subscription
+
+
+
+def _ssl_context(ssl_options: dict) -> ssl.SSLContext:
+    """ Translates websocket-client style `sslopt` (as taken by Relay) into an SSLContext """
+    context = ssl.create_default_context(cafile=ssl_options.get("ca_certs"))
+    if ssl_options.get("cert_reqs") == ssl.CERT_NONE:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+
+@dataclass
+class AsyncRelay:
+    """
+    asyncio counterpart to Relay: one websocket connection read by a task on the
+    running event loop instead of by its own thread.
+    """
+    url: str
+    message_pool: AsyncMessagePool
+    policy: RelayPolicy = field(default_factory=RelayPolicy)
+    ssl_options: Optional[dict] = None
+    proxy_config: RelayProxyConnectionConfig = None
+    reconnect_policy: ReconnectPolicy = field(default_factory=ReconnectPolicy)
+
+    def __post_init__(self):
+        self.metrics: RelayMetrics = self.message_pool.relay_metrics(self.url)
+        self.subscriptions: dict[str, Subscription] = {}
+        self.num_sent_events: int = 0
+        self.connected: bool = False
+        self.reconnect: bool = True
+        self.error_counter: int = 0
+        self.error_threshold: int = 0  # if set, stop reconnecting after this many errors
+        self.reconnect_scheduler: ReconnectScheduler = ReconnectScheduler(self.reconnect_policy)
+        self.num_connections: int = 0
+        self.ws = None
+        self._pending: list[tuple[str, Optional[str]]] = []  # (message, id of the subscription it REQs)
+        self._reader: asyncio.Task = None
+        self._closing: asyncio.Event = None
+        self._opened_at: float = None
+
+    async def connect(self, timeout: float = 10):
+        """
+            Opens the connection and starts reading from it. If it drops it's reopened in
+            the background (unless `reconnect` is False, `error_threshold` is exceeded or
+            `close` is called) after the delay chosen by `reconnect_scheduler`, and the
+            active subscriptions are re-sent as Relay does.
+        """
+        if self._reader is not None and not self._reader.done():
+            # Already connected, or reconnecting in the background
+            return
+        self._closing = asyncio.Event()
+        self._timeout = timeout
+        await self._open()
+        self._reader = asyncio.create_task(self._read_messages(), name=f"{self.url}-reader")
+
+    async def _open(self):
+        kwargs = {"open_timeout": self._timeout}
+        if self.ssl_options is not None and self.url.startswith("wss"):
+            kwargs["ssl"] = _ssl_context(self.ssl_options)
+        if self.proxy_config is not None:
+            # Only websockets >= 15 takes `proxy`
+            kwargs["proxy"] = f"{self.proxy_config.type}://{self.proxy_config.host}:{self.proxy_config.port}"
+
+        try:
+            self.ws = await websockets.connect(self.url, **kwargs)
+        except Exception:
+            self.error_counter += 1
+            raise
+        if self._closing.is_set():
+            # close() was called while we were connecting
+            await self.ws.close()
+            return
+        self.num_connections += 1
+        self._opened_at = time.monotonic()
+        self.connected = True
+
+        # Flush anything published while we weren't connected, in order, after
+        # restoring the subscriptions if this is a reconnect
+        if self.num_connections > 1:
+            subscriptions = list(self.subscriptions.values())
+            resubscribe = list(zip(_resubscribe_messages(subscriptions), [s.id for s in subscriptions]))
+            # Those REQs supersede any still queued for the same subscriptions
+            self._pending = resubscribe + [
+                (message, subscription_id)
+                for message, subscription_id in self._pending
+                if subscription_id is None or subscription_id not in self.subscriptions
+            ]
+            for subscription in subscriptions:
+                subscription.restart()
+        await self._flush_pending()
+
+    async def close(self):
+        self.connected = False
+        if self._closing is not None:
+            self._closing.set()
+        if self.ws is not None:
+            await self.ws.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+
+    def _should_reconnect(self) -> bool:
+        if self._closing.is_set() or not self.reconnect:
+            return False
+        return not (self.error_threshold and self.error_counter > self.error_threshold)
+
+    async def publish(self, message: str, subscription_id: str = None):
+        """
+            Sends the message, or queues it until the connection (re)opens. Pass the
+            subscription id with a REQ so its REQ -> EOSE latency is timed from when it's
+            actually sent and a reconnect's resubscribe doesn't send it twice.
+        """
+        self._pending.append((message, subscription_id))
+        if self.connected:
+            await self._flush_pending()
+
+    async def _flush_pending(self):
+        while self._pending and self.connected:
+            message, subscription_id = self._pending.pop(0)
+            try:
+                await self.ws.send(message)
+            except websockets.ConnectionClosed:
+                # Kept for the reconnect to send; the reader task notices the close
+                self.connected = False
+                self._pending.insert(0, (message, subscription_id))
+                return
+            self.num_sent_events += 1
+            self.metrics.on_sent(message)
+            if subscription_id is not None:
+                self.metrics.on_request_sent(subscription_id, time.perf_counter())
+
+    def add_subscription(self, id, filters: Filters):
+        self.subscriptions[id] = Subscription(id, filters)
+
+    def close_subscription(self, id: str) -> None:
+        self.subscriptions.pop(id, None)
+        self.metrics.on_subscription_closed(id)
+
+    def update_subscription(self, id: str, filters: Filters) -> None:
+        subscription = self.subscriptions[id]
+        subscription.filters = filters
+        # What was received for the old Filters says nothing about the new ones
+        subscription.last_created_at = None
+        subscription.restart()
+
+    def to_json_object(self) -> dict:
+        return {
+            "url": self.url,
+            "policy": self.policy.to_json_object(),
+            "subscriptions": [
+                subscription.to_json_object()
+                for subscription in self.subscriptions.values()
+            ],
+        }
+
+    async def _read_messages(self):
+        while True:
+            try:
+                async for message in self.ws:
+                    self.metrics.on_received(message)
+                    self.message_pool.add_message(message, self.url, self.subscriptions)
+            except websockets.ConnectionClosedError:
+                self.error_counter += 1
+            except websockets.ConnectionClosed:
+                pass
+            except BaseException:
+                # Not a connection problem (e.g. a bug in a MessagePool stage); drop the
+                # connection and surface it through the task rather than swallowing it
+                self.connected = False
+                await self.ws.close()
+                raise
+            self.connected = False
+            if self._opened_at is not None and time.monotonic() - self._opened_at >= self.reconnect_policy.min_uptime:
+                self.reconnect_scheduler.record_success()
+            self._opened_at = None
+            if not await self._reconnect():
+                return
+
+    async def _reconnect(self) -> bool:
+        """ Retries with backoff until connected (True) or told to stop (False) """
+        while self._should_reconnect():
+            delay = self.reconnect_scheduler.record_failure()
+            try:
+                await asyncio.wait_for(self._closing.wait(), delay)
+                return False
+            except asyncio.TimeoutError:
+                pass
+            self.metrics.reconnects += 1
+            self.reconnect_scheduler.before_attempt()
+            try:
+                await self._open()
+            except Exception:
+                continue
+            return self.connected
+        return False
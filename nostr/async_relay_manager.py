@@ -0,0 +1,127 @@
+import asyncio
+
+from . import codec
+from .async_relay import AsyncRelay
+from .event import Event
+from .event_store import EventStore
+from .filter import Filters
+from .message_pool import AsyncMessagePool, IngestOptions, VerificationStage
+from .metrics import to_prometheus
+from .relay import ReconnectPolicy, RelayPolicy, RelayProxyConnectionConfig
+from .relay_manager import RelayException
+from .request import Request
+
+
+
+class AsyncRelayManager:
+    """
+    asyncio counterpart to RelayManager. All relays share one event loop and one
+    AsyncMessagePool; consume it with e.g. `async for event_msg in manager.message_pool.iter_events()`.
+    """
+    def __init__(
+            self,
+            event_store: EventStore = None,
+            ingest_options: IngestOptions = None,
+            verifier: VerificationStage = None) -> None:
+        self.relays: dict[str, AsyncRelay] = {}
+        self.message_pool: AsyncMessagePool = AsyncMessagePool(
+            event_store=event_store, ingest_options=ingest_options, verifier=verifier
+        )
+
+    def add_relay(
+            self,
+            url: str,
+            policy: RelayPolicy = None,
+            ssl_options: dict = None,
+            proxy_config: RelayProxyConnectionConfig = None,
+            reconnect_policy: ReconnectPolicy = None) -> AsyncRelay:
+        """ Registers a relay; nothing connects until `open_connections` """
+        relay = AsyncRelay(
+            url, self.message_pool, policy or RelayPolicy(), ssl_options, proxy_config,
+            reconnect_policy or ReconnectPolicy()
+        )
+        self.relays[url] = relay
+        return relay
+
+    async def remove_relay(self, url: str):
+        if url in self.relays:
+            relay = self.relays.pop(url)
+            await relay.close()
+
+    async def open_connections(self, timeout: float = 10) -> dict[str, Exception]:
+        """
+            Connects to every relay concurrently. Returns the exceptions of any relays that
+            failed to connect, keyed by url; those relays stay registered but disconnected.
+        """
+        relays = [relay for relay in self.relays.values() if not relay.connected]
+        results = await asyncio.gather(*[relay.connect(timeout) for relay in relays], return_exceptions=True)
+        return {
+            relay.url: result
+            for relay, result in zip(relays, results)
+            if isinstance(result, Exception)
+        }
+
+    async def close_connections(self):
+        await asyncio.gather(*[relay.close() for relay in self.relays.values()])
+
+    async def add_subscription_on_relay(self, url: str, id: str, filters: Filters):
+        if url not in self.relays:
+            raise RelayException(f"Invalid relay url: no connection to {url}")
+        relay = self.relays[url]
+        if not relay.policy.should_read:
+            raise RelayException(f"Could not send request: {url} is not configured to read from")
+        relay.add_subscription(id, filters)
+        await relay.publish(Request(id, filters).to_message(), id)
+
+    async def add_subscription_on_all_relays(self, id: str, filters: Filters):
+        message = Request(id, filters).to_message()
+        relays = [relay for relay in self.relays.values() if relay.policy.should_read]
+        for relay in relays:
+            relay.add_subscription(id, filters)
+        await asyncio.gather(*[relay.publish(message, id) for relay in relays])
+
+    async def close_subscription_on_relay(self, url: str, id: str):
+        if url not in self.relays:
+            raise RelayException(f"Invalid relay url: no connection to {url}")
+        relay = self.relays[url]
+        relay.close_subscription(id)
+        await relay.publish(codec.dumps(["CLOSE", id]))
+
+    async def close_subscription_on_all_relays(self, id: str):
+        message = codec.dumps(["CLOSE", id])
+        for relay in self.relays.values():
+            relay.close_subscription(id)
+        await asyncio.gather(*[relay.publish(message) for relay in self.relays.values()])
+
+    def metrics(self) -> dict:
+        """ Per-relay metrics keyed by url, plus the AsyncMessagePool's queue depths """
+        self._refresh_metrics()
+        return {
+            "relays": {relay.url: relay.metrics.to_json_object() for relay in self.relays.values()},
+            "message_pool": self.message_pool.metrics(),
+        }
+
+    def prometheus_metrics(self) -> str:
+        """ The same metrics in the Prometheus text exposition format """
+        self._refresh_metrics()
+        return to_prometheus([relay.metrics for relay in self.relays.values()], self.message_pool.metrics())
+
+    def _refresh_metrics(self):
+        for relay in self.relays.values():
+            # Messages held back until the relay (re)connects
+            relay.metrics.send_queue_depth = len(relay._pending)
+
+    async def publish_event(self, event: Event):
+        """ Verifies that the Event is publishable before submitting it to relays """
+        if event.signature is None:
+            raise RelayException(f"Could not publish {event.id}: must be signed")
+
+        if not event.verify():
+            raise RelayException(f"Could not publish {event.id}: failed to verify signature {event.signature}")
+
+        message = event.to_message()
+        await asyncio.gather(*[
+            relay.publish(message)
+            for relay in self.relays.values()
+            if relay.policy.should_write
+        ])
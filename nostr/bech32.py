@@ -21,6 +21,8 @@
 """Reference implementation for Bech32/Bech32m and segwit addresses."""
 
 
+import base64
+import binascii
 from enum import Enum
 
 class Encoding(Enum):
@@ -31,15 +33,24 @@ class Encoding(Enum):
 CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
 BECH32M_CONST = 0x2bc830a3
 
-def bech32_polymod(values):
+_GENERATOR = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+
+def _generator_terms(top):
+    chk = 0
+    for i in range(5):
+        if (top >> i) & 1:
+            chk ^= _GENERATOR[i]
+    return chk
+
+# The generator terms to XOR in for each possible top 5 bits of the checksum state,
+# replacing the reference's inner 5-step loop with one lookup per symbol
+_POLYMOD_TABLE = tuple(_generator_terms(top) for top in range(32))
+
+def bech32_polymod(values, chk=1):
     """Internal function that computes the Bech32 checksum."""
-    generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
-    chk = 1
+    table = _POLYMOD_TABLE
     for value in values:
-        top = chk >> 25
-        chk = (chk & 0x1ffffff) << 5 ^ value
-        for i in range(5):
-            chk ^= generator[i] if ((top >> i) & 1) else 0
+        chk = ((chk & 0x1ffffff) << 5 ^ value) ^ table[chk >> 25]
     return chk
 
 
@@ -135,3 +146,104 @@ def encode(hrp, witver, witprog):
     if decode(hrp, ret) == (None, None):
         return None
     return ret
+
+
+# Table-driven codec working directly on bytes, used for nostr's npub/nsec/note
+# encodings. bytes <-> 5-bit groups goes through the C base32 codec (RFC 4648 packs
+# bits MSB-first and zero-pads exactly like convertbits(data, 8, 5)) and its alphabet
+# is translated to and from the bech32 charset with lookup tables.
+
+_B32_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+_B32_TO_CHARSET = bytes.maketrans(_B32_ALPHABET, CHARSET.encode())
+_CHARSET_TO_B32 = bytes.maketrans(CHARSET.encode(), _B32_ALPHABET)
+_B32_TO_VALUE = bytes.maketrans(_B32_ALPHABET, bytes(range(32)))
+_CHARSET_TO_VALUE = bytes(CHARSET.find(chr(c)) if chr(c) in CHARSET else 0xff for c in range(256))
+
+
+def _polymod_step2(chk):
+    # Two symbols' worth of generator terms for a top 10 bits of state
+    for _ in range(2):
+        chk = ((chk & 0x1ffffff) << 5) ^ _POLYMOD_TABLE[chk >> 25]
+    return chk
+
+# Consumes two symbols per lookup; the state is linear in its inputs, so the low 20
+# bits and the two new symbols shift in unchanged and only the top 10 need the table
+_POLYMOD_TABLE2 = tuple(_polymod_step2(top << 20) for top in range(1024))
+
+_PRINTABLE = bytes(range(33, 127))
+_B32_PADDING = (b"", b"", b"======", b"", b"====", b"===", b"", b"=")
+
+# Only the fixed NIP-19 prefixes are precomputed; HRPs come from untrusted input, so
+# caching every one seen would grow without bound
+_HRP_STATES = {
+    hrp: bech32_polymod(bech32_hrp_expand(hrp))
+    for hrp in ("npub", "nsec", "note", "nprofile", "nevent", "naddr", "nrelay")
+}
+
+def _hrp_state(hrp):
+    """Polymod state after the expanded HRP."""
+    state = _HRP_STATES.get(hrp)
+    if state is None:
+        state = bech32_polymod(bech32_hrp_expand(hrp))
+    return state
+
+
+def _polymod_bytes(values, chk):
+    """bech32_polymod over a bytes object of 5-bit values, two symbols at a time."""
+    table2 = _POLYMOD_TABLE2
+    n = len(values) & ~1
+    for i in range(0, n, 2):
+        chk = ((chk & 0xfffff) << 10 ^ values[i] << 5 ^ values[i + 1]) ^ table2[chk >> 20]
+    if n != len(values):
+        chk = ((chk & 0x1ffffff) << 5 ^ values[n]) ^ _POLYMOD_TABLE[chk >> 25]
+    return chk
+
+
+def bech32_encode_bytes(hrp, data, spec=Encoding.BECH32):
+    """Bech32 string for 8-bit `data`; same as bech32_encode(hrp, convertbits(data, 8, 5), spec)."""
+    b32 = base64.b32encode(data).rstrip(b"=")
+    const = BECH32M_CONST if spec == Encoding.BECH32M else 1
+    polymod = _polymod_bytes(b32.translate(_B32_TO_VALUE) + b"\0\0\0\0\0\0", _hrp_state(hrp)) ^ const
+    checksum = bytes(CHARSET.encode()[(polymod >> 5 * (5 - i)) & 31] for i in range(6))
+    return hrp + "1" + (b32.translate(_B32_TO_CHARSET) + checksum).decode()
+
+
+def bech32_decode_bytes(bech, max_length=90):
+    """
+    Validate a Bech32/Bech32m string of 8-bit data and return (hrp, data, spec), or
+    (None, None, None). Applies bech32_decode's checks, then requires the data to
+    convert to whole bytes like convertbits(data, 5, 8, pad=False). `max_length` can
+    be raised above BIP-173's 90 characters for longer payloads (e.g. NIP-19 TLVs).
+    """
+    try:
+        raw = bech.encode("ascii")
+    except UnicodeEncodeError:
+        return (None, None, None)
+    if raw.translate(None, _PRINTABLE) or (raw.lower() != raw and raw.upper() != raw):
+        return (None, None, None)
+    raw = raw.lower()
+    pos = raw.rfind(b"1")
+    if pos < 1 or pos + 7 > len(raw) or len(raw) > max_length:
+        return (None, None, None)
+    chars = raw[pos + 1:]
+    values = chars.translate(_CHARSET_TO_VALUE)
+    if b"\xff" in values:
+        return (None, None, None)
+    hrp = raw[:pos].decode()
+    const = _polymod_bytes(values, _hrp_state(hrp))
+    if const == 1:
+        spec = Encoding.BECH32
+    elif const == BECH32M_CONST:
+        spec = Encoding.BECH32M
+    else:
+        return (None, None, None)
+
+    data_chars = chars[:-6]
+    leftover = len(data_chars) * 5 % 8
+    if leftover >= 5 or (data_chars and values[len(data_chars) - 1] & ((1 << leftover) - 1)):
+        return (None, None, None)
+    try:
+        data = base64.b32decode(data_chars.translate(_CHARSET_TO_B32) + _B32_PADDING[len(data_chars) % 8])
+    except binascii.Error:
+        return (None, None, None)
+    return (hrp, data, spec)
@@ -0,0 +1,124 @@
+"""
+JSON codec used for relay messages and event serialization.
+
+Uses orjson or msgspec when installed and falls back to the stdlib `json` module
+otherwise. Every backend produces the NIP-01 canonical form
+(`json.dumps(..., separators=(',', ':'), ensure_ascii=False)`) so event ids are the
+same whichever one is active; anything a fast backend can't handle (e.g. integers
+beyond 64 bits, or input it rejects as invalid) is retried with the stdlib.
+
+`loads` takes a str or UTF-8 bytes (binary websocket frames arrive as bytes) and raises
+ValueError for anything else, including bytes that aren't valid UTF-8.
+
+    from nostr import codec
+    codec.set_backend("json")   # force the stdlib backend
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+
+
+class JsonCodec:
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        if isinstance(data, (bytes, bytearray)):
+            # json.loads would also sniff UTF-16/32; relay frames must be UTF-8
+            data = data.decode()
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return JsonCodec.dumps(self, obj).encode()
+
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # e.g. lone surrogates, which the stdlib accepts
+            return super().loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self.dumps_bytes(obj).decode()
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj)
+        except (TypeError, orjson.JSONEncodeError):
+            return super().dumps_bytes(obj)
+
+
+
+class MsgspecCodec(JsonCodec):
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError:
+            return super().loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self.dumps_bytes(obj).decode()
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        try:
+            return self._encoder.encode(obj)
+        except (TypeError, OverflowError, msgspec.EncodeError):
+            return super().dumps_bytes(obj)
+
+
+
+_BACKENDS = {"json": JsonCodec}
+if msgspec is not None:
+    _BACKENDS["msgspec"] = MsgspecCodec
+if orjson is not None:
+    _BACKENDS["orjson"] = OrjsonCodec
+
+def available_backends() -> "list[str]":
+    return list(_BACKENDS)
+
+def set_backend(name: str) -> None:
+    global _codec
+    if name not in _BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available; choose from {available_backends()}")
+    _codec = _BACKENDS[name]()
+
+def get_backend() -> str:
+    return _codec.name
+
+def loads(data: Union[str, bytes]) -> Any:
+    return _codec.loads(data)
+
+def dumps(obj: Any) -> str:
+    """ Compact JSON string, e.g. for relay messages """
+    return _codec.dumps(obj)
+
+def dumps_bytes(obj: Any) -> bytes:
+    """ NIP-01 canonical UTF-8 JSON, e.g. for event ids """
+    return _codec.dumps_bytes(obj)
+
+
+_codec: JsonCodec = None
+set_backend("orjson" if orjson is not None else "msgspec" if msgspec is not None else "json")
@@ -1,12 +1,15 @@
+import os
+import sys
 import time
-import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from enum import IntEnum
-from typing import List
+from functools import lru_cache
+from typing import Dict, List
 from secp256k1 import PublicKey
 from hashlib import sha256
 
-from . import bech32
+from . import codec, nip19
 from .message_type import ClientMessageType
 
 
@@ -31,6 +34,16 @@ class Event:
     signature: str = None
 
 
+    # Changing any of these fields changes the serialized form and therefore the id
+    _ID_FIELDS = frozenset(("content", "public_key", "created_at", "kind", "tags"))
+
+
+    def __setattr__(self, name, value):
+        if name in Event._ID_FIELDS:
+            self._invalidate_id()
+        super().__setattr__(name, value)
+
+
     def __post_init__(self):
         if self.content is not None and not isinstance(self.content, str):
             # DMs initialize content to None but all other kinds should pass in a str
@@ -43,8 +56,7 @@ class Event:
     @staticmethod
     def serialize(public_key: str, created_at: int, kind: int, tags: List[List[str]], content: str) -> bytes:
         data = [0, public_key, created_at, kind, tags, content]
-        data_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
-        return data_str.encode()
+        return codec.dumps_bytes(data)
 
 
     @staticmethod
@@ -52,48 +64,109 @@ class Event:
         return sha256(Event.serialize(public_key, created_at, kind, tags, content)).hexdigest()
 
 
+    @classmethod
+    def from_json_object(cls, e: dict) -> "Event":
+        """
+            Load an Event from its NIP-01 json object form (e.g. as received from a relay).
+
+            The supplied "id" is kept as-is rather than rehashed; call `verify_id` (or
+            `verify`, which includes it) to confirm that it matches the Event's contents.
+        """
+        event = cls(e["content"], e["pubkey"], e["created_at"], e["kind"], e["tags"], e["sig"])
+        object.__setattr__(event, "_id", e["id"])
+        object.__setattr__(event, "_id_supplied", True)
+        return event
+
+
+    def _invalidate_id(self):
+        object.__setattr__(self, "_id", None)
+        object.__setattr__(self, "_id_supplied", False)
+
+
+    def _cache_id(self, event_id: str):
+        """ Stores an id computed from the Event's current contents (e.g. by a signing worker) """
+        object.__setattr__(self, "_id", event_id)
+        object.__setattr__(self, "_id_supplied", False)
+
+
     @property
     def id(self) -> str:
-        # Always recompute the id to reflect the up-to-date state of the Event
-        return Event.compute_id(self.public_key, self.created_at, self.kind, self.tags, self.content)
+        # The id is cached and invalidated whenever one of the _ID_FIELDS is reassigned.
+        # In-place edits to `tags` must go through `add_pubkey_ref`/`add_event_ref` or
+        # be followed by a call to `_invalidate_id`.
+        if self._id is None:
+            object.__setattr__(self, "_id", Event.compute_id(self.public_key, self.created_at, self.kind, self.tags, self.content))
+        return self._id
+
+
+    def verify_id(self) -> bool:
+        """ Checks that an externally supplied id matches the Event's contents """
+        if not self._id_supplied:
+            return True
+        if Event.compute_id(self.public_key, self.created_at, self.kind, self.tags, self.content) != self._id:
+            return False
+        object.__setattr__(self, "_id_supplied", False)
+        return True
 
 
     @property
     def note_id(self) -> str:
-        converted_bits = bech32.convertbits(bytes.fromhex(self.id), 8, 5)
-        return bech32.bech32_encode("note", converted_bits, bech32.Encoding.BECH32)
+        # Memoized alongside the id it encodes, so any change that invalidates the id
+        # also invalidates this
+        event_id = self.id
+        cached = getattr(self, "_note_id", None)
+        if cached is None or cached[0] != event_id:
+            cached = (event_id, nip19.encode_note(event_id))
+            object.__setattr__(self, "_note_id", cached)
+        return cached[1]
+
+
+    def nevent(self, relays: List[str] = (), include_author: bool = True, include_kind: bool = True) -> str:
+        """ NIP-19 nevent for this Event, with optional relay hints """
+        return nip19.encode_nevent(
+            self.id,
+            relays,
+            self.public_key if include_author else None,
+            self.kind if include_kind else None,
+        )
 
 
     def add_pubkey_ref(self, pubkey:str):
         """ Adds a reference to a pubkey as a 'p' tag """
         self.tags.append(['p', pubkey])
+        self._invalidate_id()
 
 
     def add_event_ref(self, event_id:str):
         """ Adds a reference to an event_id as an 'e' tag """
         self.tags.append(['e', event_id])
+        self._invalidate_id()
 
 
     def verify(self) -> bool:
-        pub_key = PublicKey(bytes.fromhex("02" + self.public_key), True)  # add 02 for schnorr (bip340)
+        if not self.verify_id():
+            return False
+        return self._verify_signature(parse_schnorr_pubkey(self.public_key))
+
+
+    def _verify_signature(self, pub_key: PublicKey) -> bool:
         return pub_key.schnorr_verify(bytes.fromhex(self.id), bytes.fromhex(self.signature), None, raw=True)
 
 
+    def to_json_object(self) -> dict:
+        return {
+            "id": self.id,
+            "pubkey": self.public_key,
+            "created_at": self.created_at,
+            "kind": self.kind,
+            "tags": self.tags,
+            "content": self.content,
+            "sig": self.signature
+        }
+
+
     def to_message(self) -> str:
-        return json.dumps(
-            [
-                ClientMessageType.EVENT,
-                {
-                    "id": self.id,
-                    "pubkey": self.public_key,
-                    "created_at": self.created_at,
-                    "kind": self.kind,
-                    "tags": self.tags,
-                    "content": self.content,
-                    "sig": self.signature
-                }
-            ]
-        )
+        return codec.dumps([ClientMessageType.EVENT, self.to_json_object()])
 
 
 
@@ -128,3 +201,139 @@ class EncryptedDirectMessage(Event):
         if self.content is None:
             raise Exception("EncryptedDirectMessage `id` is undefined until its message is encrypted and stored in the `content` field")
         return super().id
+
+
+
+def _pack_hex(value: str, num_bytes: int):
+    """ Lowercase hex of the expected length is stored as raw bytes; anything else is kept as-is """
+    if isinstance(value, str) and len(value) == 2 * num_bytes:
+        try:
+            raw = bytes.fromhex(value)
+        except ValueError:
+            return value
+        if raw.hex() == value:
+            return raw
+    return value
+
+def _unpack_hex(value):
+    return value.hex() if isinstance(value, bytes) else value
+
+
+
+class CompactEvent:
+    """
+    Memory-compact, read-only form of an Event for holding large numbers of them.
+
+    The id, pubkey and signature are stored as raw bytes, tags as tuples with interned
+    tag names and 32-byte hex values (event ids and pubkeys in 'e'/'p' tags) as raw
+    bytes, and there is no per-instance `__dict__`. The hex accessors and `tags` layout
+    match Event, so a CompactEvent can be passed to `Filter.matches`.
+    `CompactEvent.from_event(event).to_event() == event` for any Event.
+    """
+    __slots__ = ("_id", "_public_key", "_signature", "created_at", "kind", "_tags", "content")
+
+    def __init__(self, id: str, public_key: str, created_at: int, kind: int, tags: List[List[str]], content: str, signature: str = None) -> None:
+        self._id = _pack_hex(id, 32)
+        self._public_key = _pack_hex(public_key, 32)
+        self._signature = _pack_hex(signature, 64)
+        self.created_at = created_at
+        self.kind = kind
+        self._tags = tuple(
+            tuple(sys.intern(v) if i == 0 and isinstance(v, str) else _pack_hex(v, 32) for i, v in enumerate(tag))
+            for tag in tags
+        )
+        self.content = content
+
+    @classmethod
+    def from_event(cls, event: Event) -> "CompactEvent":
+        return cls(event.id, event.public_key, event.created_at, event.kind, event.tags, event.content, event.signature)
+
+    def to_event(self) -> Event:
+        return Event.from_json_object(self.to_json_object())
+
+    def to_json_object(self) -> dict:
+        return {
+            "id": self.id,
+            "pubkey": self.public_key,
+            "created_at": self.created_at,
+            "kind": self.kind,
+            "tags": [[_unpack_hex(v) for v in tag] for tag in self._tags],
+            "content": self.content,
+            "sig": self.signature,
+        }
+
+    @property
+    def id(self) -> str:
+        return _unpack_hex(self._id)
+
+    @property
+    def public_key(self) -> str:
+        return _unpack_hex(self._public_key)
+
+    @property
+    def signature(self) -> str:
+        return _unpack_hex(self._signature)
+
+    @property
+    def tags(self) -> "tuple[tuple[str, ...], ...]":
+        return tuple(tuple(_unpack_hex(v) for v in tag) for tag in self._tags)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactEvent):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in CompactEvent.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(self._id)
+
+    def __repr__(self) -> str:
+        return f"CompactEvent(id={self.id!r}, public_key={self.public_key!r}, created_at={self.created_at!r}, kind={self.kind!r})"
+
+
+
+@lru_cache(maxsize=16_384)
+def parse_schnorr_pubkey(public_key: str) -> PublicKey:
+    """ The secp256k1 PublicKey for a hex BIP-340 x-only pubkey, e.g. to verify signatures by it """
+    # Cached so verifying many Events from the same authors parses each pubkey once;
+    # the parsed keys are only read from, so they're safe to share between threads
+    return PublicKey(bytes.fromhex("02" + public_key), True)  # add 02 for schnorr (bip340)
+
+
+def verify_events(events: List[Event], max_workers: int = None, min_batch_size: int = 64) -> List[bool]:
+    """
+        Batch equivalent of `Event.verify`, returning one result per Event in order.
+
+        Each distinct pubkey is parsed once and shared by all of that author's Events.
+        Batches of at least `min_batch_size` Events are split into chunks that are
+        verified on a thread pool (libsecp256k1 runs without holding the GIL). An Event
+        whose pubkey or signature cannot be parsed yields False instead of raising.
+    """
+    pub_keys: Dict[str, PublicKey] = {}
+    for event in events:
+        if event.public_key not in pub_keys:
+            try:
+                pub_keys[event.public_key] = parse_schnorr_pubkey(event.public_key)
+            except Exception:
+                pub_keys[event.public_key] = None
+
+    def verify_chunk(chunk: List[Event]) -> List[bool]:
+        results = []
+        for event in chunk:
+            pub_key = pub_keys[event.public_key]
+            try:
+                results.append(pub_key is not None and event.verify_id() and event._verify_signature(pub_key))
+            except Exception:
+                results.append(False)
+        return results
+
+    if len(events) < min_batch_size:
+        return verify_chunk(events)
+
+    num_workers = max_workers or os.cpu_count() or 1
+    chunk_size = -(-len(events) // num_workers)
+    chunks = [events[i:i + chunk_size] for i in range(0, len(events), chunk_size)]
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        results = []
+        for chunk_results in executor.map(verify_chunk, chunks):
+            results.extend(chunk_results)
+    return results
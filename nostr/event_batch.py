@@ -0,0 +1,128 @@
+from typing import Dict, List, Sequence
+import numpy as np
+
+from .event import Event
+from .filter import Filter, Filters
+
+
+
+class EventBatch:
+    """
+    Column-wise container of Events for vectorized filtering.
+
+    created_at and kind are stored as integer arrays, authors as codes into
+    `author_dictionary`, and tags as a flattened index: one entry per tag holding the
+    row of its Event and a code for its (name, value) pair. `mask` evaluates a Filter
+    over every row at once with the same semantics as `Filter.matches`, and `select`
+    returns the subset matching any of several Filters.
+
+        batch = EventBatch(events)
+        notes = batch.select(Filters([Filter(kinds=[EventKind.TEXT_NOTE], since=...)]))
+    """
+    def __init__(self, events: Sequence[Event]) -> None:
+        self.events: List[Event] = list(events)
+        n = len(self.events)
+        self.created_at = np.fromiter((e.created_at for e in self.events), dtype=np.int64, count=n)
+        self.kinds = np.fromiter((e.kind for e in self.events), dtype=np.int64, count=n)
+
+        self.author_dictionary: Dict[str, int] = {}
+        self.author_codes = np.fromiter(
+            (self.author_dictionary.setdefault(e.public_key, len(self.author_dictionary)) for e in self.events),
+            dtype=np.int32,
+            count=n,
+        )
+
+        self._event_array = np.empty(n, dtype=object)
+        self._event_array[:] = self.events
+        self._rows_by_id: Dict[str, List[int]] = None
+
+        self.tag_dictionary: Dict["tuple[str, str]", int] = {}
+        tag_rows, tag_codes = [], []
+        num_tags = np.zeros(n, dtype=np.int32)
+        for row, e in enumerate(self.events):
+            num_tags[row] = len(e.tags)
+            for tag in e.tags:
+                if len(tag) > 1:
+                    tag_rows.append(row)
+                    tag_codes.append(self.tag_dictionary.setdefault((tag[0], tag[1]), len(self.tag_dictionary)))
+        self.tag_rows = np.array(tag_rows, dtype=np.int64)
+        self.tag_codes = np.array(tag_codes, dtype=np.int64)
+        self.has_tags = num_tags > 0
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __getitem__(self, row: int) -> Event:
+        return self.events[row]
+
+    def mask(self, filter: Filter) -> np.ndarray:
+        """ Boolean array with True for every row that `filter.matches` """
+        n = len(self.events)
+        mask = np.ones(n, dtype=bool)
+
+        if filter.event_ids is not None:
+            if self._rows_by_id is None:
+                # Built on first use; ids are the only column that isn't vectorized
+                self._rows_by_id = {}
+                for row, e in enumerate(self.events):
+                    self._rows_by_id.setdefault(e.id, []).append(row)
+            id_mask = np.zeros(n, dtype=bool)
+            for event_id in filter.event_ids:
+                id_mask[self._rows_by_id.get(event_id, [])] = True
+            mask &= id_mask
+        if filter.kinds is not None:
+            mask &= np.isin(self.kinds, np.array([int(k) for k in filter.kinds], dtype=np.int64))
+        if filter.authors is not None:
+            codes = [self.author_dictionary[a] for a in filter.authors if a in self.author_dictionary]
+            mask &= np.isin(self.author_codes, np.array(codes, dtype=np.int32))
+        if filter.since is not None:
+            mask &= self.created_at >= filter.since
+        if filter.until is not None:
+            mask &= self.created_at <= filter.until
+        if filter.event_refs is not None or filter.pubkey_refs is not None:
+            mask &= self.has_tags
+
+        for f_tag, f_tag_values in filter.tags.items():
+            # Omit any NIP-01 or NIP-12 "#" chars on single-letter tags
+            name = f_tag.replace("#", "")
+            codes = [self.tag_dictionary[(name, v)] for v in f_tag_values if (name, v) in self.tag_dictionary]
+            tag_mask = np.zeros(n, dtype=bool)
+            tag_mask[self.tag_rows[np.isin(self.tag_codes, np.array(codes, dtype=np.int64))]] = True
+            mask &= tag_mask
+
+        return mask
+
+    def match(self, filters: Filters) -> np.ndarray:
+        """ Boolean array with True for every row matching any of the Filters """
+        mask = np.zeros(len(self.events), dtype=bool)
+        for filter in filters:
+            mask |= self.mask(filter)
+        return mask
+
+    def select(self, filters: Filters) -> "EventBatch":
+        """ The rows matching any of the Filters, in their original order """
+        return self.take(np.flatnonzero(self.match(filters)))
+
+    def take(self, rows: np.ndarray) -> "EventBatch":
+        """ A new EventBatch of the given rows, sharing this batch's dictionaries """
+        subset = EventBatch.__new__(EventBatch)
+        subset._event_array = self._event_array[rows]
+        subset.events = subset._event_array.tolist()
+        subset.created_at = self.created_at[rows]
+        subset.kinds = self.kinds[rows]
+        subset.author_dictionary = self.author_dictionary
+        subset.author_codes = self.author_codes[rows]
+        subset._rows_by_id = None
+
+        new_rows = np.full(len(self.events), -1, dtype=np.int64)
+        new_rows[rows] = np.arange(len(rows))
+        tag_rows = new_rows[self.tag_rows] if len(self.tag_rows) else self.tag_rows
+        keep = tag_rows >= 0
+        subset.tag_dictionary = self.tag_dictionary
+        subset.tag_rows = tag_rows[keep]
+        subset.tag_codes = self.tag_codes[keep]
+        subset.has_tags = self.has_tags[rows]
+        return subset
@@ -0,0 +1,243 @@
+import sqlite3
+from threading import Lock, Timer
+from typing import Iterable, List
+
+from . import codec
+from .event import Event
+from .filter import Filter, Filters
+
+
+# Value lists longer than this are bound through a temp table rather than one `?` each,
+# which keeps large filters under SQLite's limit on bound variables
+MAX_INLINE_VALUES = 100
+
+
+class EventStore:
+    """
+    Embedded SQLite store of Events, deduplicated by id.
+
+    Events are indexed by author, kind and created_at, and single-letter tags are
+    indexed by (name, value). `query` answers Filters the way a NIP-01 relay would:
+    each Filter's `limit` keeps its newest matches and the results are returned newest
+    first. Candidates found through the indexes are confirmed with `Filter.matches`,
+    so results agree with in-memory matching (including multi-letter tag filters,
+    which aren't indexed).
+
+    Pass an EventStore to MessagePool (or RelayManager) to persist received events, and
+    use `narrow_filters` to request only what's newer than what's already stored.
+
+    `add` commits once every `commit_every` events, or `commit_interval` seconds after
+    the first uncommitted write, so that bulk ingest isn't one transaction per event.
+    Until then the write transaction stays open, which keeps other connections from
+    writing to the file and from seeing the new events; `flush` commits straight away.
+    """
+    def __init__(self, path: str = ":memory:", commit_every: int = 100, commit_interval: float = 1.0) -> None:
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self.lock: Lock = Lock()
+        self._uncommitted = 0
+        self._commit_timer: Timer = None
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id TEXT PRIMARY KEY,
+                    pubkey TEXT NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    kind INTEGER NOT NULL,
+                    tags TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    sig TEXT
+                );
+                CREATE TABLE IF NOT EXISTS tags (
+                    event_id TEXT NOT NULL REFERENCES events(id) ON DELETE CASCADE,
+                    name TEXT NOT NULL,
+                    value TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS events_pubkey ON events(pubkey, created_at);
+                CREATE INDEX IF NOT EXISTS events_kind ON events(kind, created_at);
+                CREATE INDEX IF NOT EXISTS events_created_at ON events(created_at);
+                CREATE INDEX IF NOT EXISTS tags_name_value ON tags(name, value);
+                CREATE TEMP TABLE query_values (slot INTEGER NOT NULL, value);
+            """)
+
+    def close(self) -> None:
+        with self.lock:
+            self._commit()
+            self._conn.close()
+
+    def flush(self) -> None:
+        """ Commits any events stored by `add` since the last commit """
+        with self.lock:
+            self._commit()
+
+    def add(self, event: Event) -> bool:
+        """ Stores the Event; returns False if one with the same id was already stored """
+        with self.lock:
+            if not self._conn.in_transaction:
+                self._conn.execute("BEGIN")
+            # A savepoint so that a failed insert doesn't discard the other uncommitted events
+            self._conn.execute("SAVEPOINT add_event")
+            try:
+                added = self._insert(event)
+            except BaseException:
+                self._conn.execute("ROLLBACK TO add_event")
+                raise
+            finally:
+                self._conn.execute("RELEASE add_event")
+            if added:
+                self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self._commit()
+            elif self._commit_timer is None:
+                # Even an ignored duplicate leaves the write transaction open
+                self._commit_timer = Timer(self.commit_interval, self._on_commit_timer)
+                self._commit_timer.daemon = True
+                self._commit_timer.start()
+        return added
+
+    def add_events(self, events: Iterable[Event]) -> int:
+        """ Stores Events in a single transaction; returns how many were new """
+        with self.lock:
+            self._commit()
+            with self._conn:
+                return sum(self._insert(event) for event in events)
+
+    def _insert(self, event: Event) -> bool:
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (event.id, event.public_key, event.created_at, int(event.kind), codec.dumps(event.tags), event.content, event.signature)
+        )
+        if cursor.rowcount == 0:
+            return False
+        self._conn.executemany(
+            "INSERT INTO tags VALUES (?, ?, ?)",
+            [(event.id, tag[0], tag[1]) for tag in event.tags if len(tag) > 1 and len(tag[0]) == 1]
+        )
+        return True
+
+    def _on_commit_timer(self) -> None:
+        with self.lock:
+            # None if something else committed (or closed the store) in the meantime
+            if self._commit_timer is not None:
+                self._commit()
+
+    def _commit(self) -> None:
+        if self._commit_timer is not None:
+            self._commit_timer.cancel()
+            self._commit_timer = None
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def get(self, event_id: str) -> Event:
+        with self.lock:
+            row = self._conn.execute("SELECT * FROM events WHERE id = ?", (event_id,)).fetchone()
+        return EventStore._to_event(row) if row is not None else None
+
+    def __contains__(self, event_id: str) -> bool:
+        with self.lock:
+            return self._conn.execute("SELECT 1 FROM events WHERE id = ?", (event_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def query(self, filters: Filters) -> List[Event]:
+        """ Returns the stored Events matching any of the Filters, newest first """
+        results = {}
+        for filter in filters:
+            for event in self._query_filter(filter):
+                results[event.id] = event
+        return sorted(results.values(), key=lambda event: event.created_at, reverse=True)
+
+    def narrow_filters(self, filters: Filters) -> Filters:
+        """
+            Copies of the Filters with `since` moved up to the newest stored match, so a
+            relay only needs to send what we don't have yet. The newest match itself is
+            included again in case other events share its created_at; MessagePool
+            deduplicates it.
+        """
+        narrowed = Filters()
+        for filter in filters:
+            newest = self._query_filter(filter, limit=1)
+            copy = filter.copy()
+            if newest and (filter.since is None or newest[0].created_at > filter.since):
+                copy.since = newest[0].created_at
+            narrowed.append(copy)
+        return narrowed
+
+    def _query_filter(self, filter: Filter, limit: int = None) -> List[Event]:
+        if limit is None:
+            limit = filter.limit
+        if limit == 0:
+            return []
+        clauses, params, slots = [], [], []
+
+        def values_in(values: list) -> str:
+            if len(values) <= MAX_INLINE_VALUES:
+                params.extend(values)
+                return f"IN ({', '.join('?' * len(values))})"
+            params.append(len(slots))
+            slots.append(values)
+            return "IN (SELECT value FROM temp.query_values WHERE slot = ?)"
+
+        for column, values in (("id", filter.event_ids), ("pubkey", filter.authors), ("kind", filter.kinds)):
+            if values is None:
+                continue
+            if not values:
+                return []
+            clauses.append(f"{column} {values_in([int(v) for v in values] if column == 'kind' else values)}")
+        if filter.since is not None:
+            clauses.append("created_at >= ?")
+            params.append(filter.since)
+        if filter.until is not None:
+            clauses.append("created_at <= ?")
+            params.append(filter.until)
+        for f_tag, f_tag_values in filter.tags.items():
+            name = f_tag.replace("#", "")
+            if len(name) != 1:
+                # Not indexed; left to Filter.matches
+                continue
+            if not f_tag_values:
+                return []
+            params.append(name)
+            clauses.append(f"id IN (SELECT event_id FROM tags WHERE name = ? AND value {values_in(f_tag_values)})")
+
+        sql = "SELECT * FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY created_at DESC"
+
+        events = []
+        with self.lock:
+            if slots:
+                self._conn.execute("DELETE FROM temp.query_values")
+                self._conn.executemany(
+                    "INSERT INTO temp.query_values VALUES (?, ?)",
+                    [(slot, value) for slot, values in enumerate(slots) for value in values]
+                )
+            for row in self._conn.execute(sql, params):
+                event = EventStore._to_event(row)
+                if not filter.matches(event):
+                    continue
+                events.append(event)
+                if limit is not None and len(events) >= limit:
+                    break
+            if slots and not self._uncommitted:
+                # Only temp.query_values was written; don't leave its transaction open
+                self._conn.commit()
+        return events
+
+    @staticmethod
+    def _to_event(row: tuple) -> Event:
+        id, pubkey, created_at, kind, tags, content, sig = row
+        return Event.from_json_object({
+            "id": id,
+            "pubkey": pubkey,
+            "created_at": created_at,
+            "kind": kind,
+            "tags": codec.loads(tags),
+            "content": content,
+            "sig": sig,
+        })
@@ -1,8 +1,13 @@
 from collections import UserList
-from typing import List
+from typing import TYPE_CHECKING, List
 
 from .event import Event, EventKind
 
+if TYPE_CHECKING:
+    # numpy is optional and event_batch imports this module
+    import numpy as np
+    from .event_batch import EventBatch
+
 
 
 class Filter:
@@ -46,6 +51,28 @@ class Filter:
             self.add_arbitrary_tag('p', self.pubkey_refs)
 
 
+    def __setattr__(self, name, value):
+        # Any change to the Filter's criteria invalidates its compiled form
+        super().__setattr__("_compiled", None)
+        super().__setattr__(name, value)
+
+
+    def copy(self) -> "Filter":
+        """ A Filter with the same criteria, whose attributes can be changed independently """
+        copy = Filter(
+            event_ids=self.event_ids,
+            kinds=self.kinds,
+            authors=self.authors,
+            since=self.since,
+            until=self.until,
+            limit=self.limit,
+        )
+        copy.event_refs = self.event_refs
+        copy.pubkey_refs = self.pubkey_refs
+        copy.tags = dict(self.tags)
+        return copy
+
+
     def add_arbitrary_tag(self, tag: str, values: list):
         """
             Filter on any arbitrary tag with explicit handling for NIP-01 and NIP-12
@@ -54,14 +81,27 @@ class Filter:
          # NIP-01 'e' and 'p' tags and any NIP-12 single-letter tags must be prefixed with "#"
         tag_key = tag if len(tag) > 1 else f"#{tag}"
         self.tags[tag_key] = values
+        self._compiled = None
+
+
+    def _compile(self) -> "_CompiledFilter":
+        """
+            Compiled once and reused by `matches` until the Filter is changed. In-place
+            edits to the lists passed in (e.g. `filter.authors.append(...)`) aren't
+            detected; reassign the attribute instead.
+        """
+        if self._compiled is None:
+            self._compiled = _CompiledFilter(self)
+        return self._compiled
 
 
     def matches(self, event: Event) -> bool:
-        if self.event_ids is not None and event.id not in self.event_ids:
+        compiled = self._compile()
+        if compiled.event_ids is not None and event.id not in compiled.event_ids:
             return False
-        if self.kinds is not None and event.kind not in self.kinds:
+        if compiled.kinds is not None and event.kind not in compiled.kinds:
             return False
-        if self.authors is not None and event.public_key not in self.authors:
+        if compiled.authors is not None and event.public_key not in compiled.authors:
             return False
         if self.since is not None and event.created_at < self.since:
             return False
@@ -70,31 +110,32 @@ class Filter:
         if (self.event_refs is not None or self.pubkey_refs is not None) and len(event.tags) == 0:
             return False
 
-        if self.tags:
-            e_tag_identifiers = set([e_tag[0] for e_tag in event.tags])
-            for f_tag, f_tag_values in self.tags.items():
-                # Omit any NIP-01 or NIP-12 "#" chars on single-letter tags
-                f_tag = f_tag.replace("#", "")
-
-                if f_tag not in e_tag_identifiers:
-                    # Event is missing a tag type that we're looking for
-                    return False
-                
-                # Multiple values within f_tag_values are treated as OR search; an Event
-                # needs to match only one.
-                # Note: an Event could have multiple entries of the same tag type
-                # (e.g. a reply to multiple people) so we have to check all of them.
-                match_found = False
-                for e_tag in event.tags:
-                    if e_tag[0] == f_tag and e_tag[1] in f_tag_values:
-                        match_found = True
-                        break
-                if not match_found:
-                    return False
+        if compiled.tags:
+            # Multiple values within a tag constraint are treated as OR search; an Event
+            # needs to match only one. Every constraint must be met, and an Event could
+            # have multiple entries of the same tag type (e.g. a reply to multiple people),
+            # so a single pass over the Event's tags ticks constraints off as they match.
+            unmatched = set(range(compiled.num_tag_constraints))
+            for e_tag in event.tags:
+                constraints = compiled.tags.get(e_tag[0])
+                if constraints is None or len(e_tag) < 2:
+                    continue
+                for i, f_tag_values in constraints:
+                    if e_tag[1] in f_tag_values:
+                        unmatched.discard(i)
+                if not unmatched:
+                    break
+            if unmatched:
+                return False
 
         return True
 
 
+    def matches_batch(self, batch: "EventBatch") -> "np.ndarray":
+        """ Vectorized `matches` over every Event in an EventBatch; returns a boolean mask """
+        return batch.mask(self)
+
+
     def to_json_object(self) -> dict:
         res = {}
         if self.event_ids is not None:
@@ -116,6 +157,24 @@ class Filter:
 
 
 
+class _CompiledFilter:
+    """ Set-backed form of a Filter's criteria, with tag keys normalized to event tag names """
+    __slots__ = ("event_ids", "kinds", "authors", "tags", "num_tag_constraints")
+
+    def __init__(self, filter: Filter) -> None:
+        self.event_ids = frozenset(filter.event_ids) if filter.event_ids is not None else None
+        self.kinds = frozenset(filter.kinds) if filter.kinds is not None else None
+        self.authors = frozenset(filter.authors) if filter.authors is not None else None
+
+        # event tag name -> [(constraint index, values)]; omit any NIP-01 or NIP-12 "#"
+        # chars on single-letter tags
+        self.tags: "dict[str, list[tuple[int, frozenset]]]" = {}
+        for i, (f_tag, f_tag_values) in enumerate(filter.tags.items()):
+            self.tags.setdefault(f_tag.replace("#", ""), []).append((i, frozenset(f_tag_values)))
+        self.num_tag_constraints = len(filter.tags)
+
+
+
 class Filters(UserList):
     def __init__(self, initlist: "list[Filter]"=[]) -> None:
         super().__init__(initlist)
@@ -127,5 +186,9 @@ class Filters(UserList):
                 return True
         return False
 
+    def match_batch(self, batch: "EventBatch") -> "EventBatch":
+        """ The Events in an EventBatch that match any of the Filters """
+        return batch.select(self)
+
     def to_json_array(self) -> list:
         return [filter.to_json_object() for filter in self.data]
\ No newline at end of file
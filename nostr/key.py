@@ -1,79 +1,243 @@
+import os
+import time
 import secrets
 import base64
+import binascii
 import secp256k1
 from cffi import FFI
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from threading import RLock
+from typing import Callable, Iterable, List, Optional, Tuple
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives import padding
 from hashlib import sha256
 
 from .delegation import Delegation
-from .event import EncryptedDirectMessage, Event, EventKind
-from . import bech32
+from .event import EncryptedDirectMessage, Event, EventKind, parse_schnorr_pubkey
+from . import bech32, nip19
 
 
 class PublicKey:
     def __init__(self, raw_bytes: bytes=None) -> None:
         self.raw_bytes = raw_bytes
+        self._npub = None
 
     def bech32(self) -> str:
-        converted_bits = bech32.convertbits(self.raw_bytes, 8, 5)
-        return bech32.bech32_encode("npub", converted_bits, bech32.Encoding.BECH32)
+        # Memoized alongside the bytes it encodes in case raw_bytes is reassigned
+        cached = self._npub
+        if cached is None or cached[0] != self.raw_bytes:
+            cached = self._npub = (self.raw_bytes, bech32.bech32_encode_bytes("npub", self.raw_bytes))
+        return cached[1]
+
+    def nprofile(self, relays: List[str] = ()) -> str:
+        """ NIP-19 nprofile for this key, with optional relay hints """
+        return nip19.encode_nprofile(self.hex(), relays)
 
     def hex(self) -> str:
         return self.raw_bytes.hex()
 
     def verify_signed_message_hash(self, hash: str, sig: str) -> bool:
-        pk = secp256k1.PublicKey(b"\x02" + self.raw_bytes, True)
-        return pk.schnorr_verify(bytes.fromhex(hash), bytes.fromhex(sig), None, True)
+        return parse_schnorr_pubkey(self.hex()).schnorr_verify(bytes.fromhex(hash), bytes.fromhex(sig), None, True)
 
     @classmethod
     def from_npub(cls, npub: str):
         """ Load a PublicKey from its bech32/npub form """
-        hrp, data, spec = bech32.bech32_decode(npub)
-        raw_public_key = bech32.convertbits(data, 5, 8)[:-1]
-        return cls(bytes(raw_public_key))
+        return cls(_decode_key(npub, "npub"))
+
+
+def _decode_key(entity: str, hrp: str) -> bytes:
+    try:
+        decoded_hrp, value = nip19.decode(entity)
+    except ValueError:
+        decoded_hrp = None
+    if decoded_hrp != hrp:
+        # Don't echo what might be a secret key back in the error
+        raise ValueError(f"invalid {hrp}")
+    return bytes.fromhex(value)
+
+
+def _zeroize(buffer: bytearray) -> None:
+    buffer[:] = bytes(len(buffer))
+
+
+class SharedSecretCache:
+    """
+    Bounded LRU of ECDH shared secrets, keyed by the peer's hex pubkey.
+
+    Secrets are kept in bytearrays that are overwritten with zeros when evicted or
+    cleared instead of being left for the garbage collector. `lock` only guards the
+    cache's bookkeeping: callers `acquire` a secret, use it without holding the lock,
+    then `release` it, and a secret evicted while acquired is only zeroed once the
+    last user releases it.
+    """
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = capacity
+        self.lock: RLock = RLock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._secrets: "OrderedDict[str, bytearray]" = OrderedDict()
+        self._users: dict[int, int] = {}  # id of an acquired secret -> number of users
+        self._retired: set = set()        # ids of acquired secrets to zero on release
+
+    def get(self, public_key_hex: str) -> Optional[bytearray]:
+        """ The cached secret, which may be zeroed by another thread at any time; see `acquire` """
+        with self.lock:
+            secret = self._secrets.get(public_key_hex)
+            if secret is None:
+                self.misses += 1
+                return None
+            self._secrets.move_to_end(public_key_hex)
+            self.hits += 1
+            return secret
+
+    def acquire(self, public_key_hex: str) -> Optional[bytearray]:
+        """ The cached secret, kept intact until it's passed to `release` """
+        with self.lock:
+            secret = self.get(public_key_hex)
+            if secret is not None:
+                self._users[id(secret)] = self._users.get(id(secret), 0) + 1
+            return secret
+
+    def add(self, public_key_hex: str, secret: bytearray) -> bytearray:
+        """
+            Caches a newly computed secret and acquires it. If another thread cached one
+            for the same peer meanwhile, that one is acquired instead and `secret` zeroed.
+        """
+        with self.lock:
+            cached = self._secrets.get(public_key_hex)
+            if cached is not None:
+                _zeroize(secret)
+                secret = cached
+            # Acquired before it's cached, which with a capacity of 0 evicts it straight away
+            self._users[id(secret)] = self._users.get(id(secret), 0) + 1
+            if cached is None:
+                self.put(public_key_hex, secret)
+            return secret
+
+    def release(self, secret: bytearray) -> None:
+        with self.lock:
+            users = self._users.pop(id(secret)) - 1
+            if users:
+                self._users[id(secret)] = users
+            elif id(secret) in self._retired:
+                self._retired.discard(id(secret))
+                _zeroize(secret)
+
+    def put(self, public_key_hex: str, secret: bytearray) -> None:
+        with self.lock:
+            previous = self._secrets.pop(public_key_hex, None)
+            if previous is not None and previous is not secret:
+                self._retire(previous)
+            self._secrets[public_key_hex] = secret
+            while len(self._secrets) > self.capacity:
+                _, evicted = self._secrets.popitem(last=False)
+                self._retire(evicted)
+                self.evictions += 1
+
+    def _retire(self, secret: bytearray) -> None:
+        if id(secret) in self._users:
+            self._retired.add(id(secret))
+        else:
+            _zeroize(secret)
+
+    def clear(self) -> None:
+        with self.lock:
+            for secret in self._secrets.values():
+                self._retire(secret)
+            self._secrets.clear()
+
+    def __len__(self) -> int:
+        return len(self._secrets)
+
+    def __contains__(self, public_key_hex: str) -> bool:
+        return public_key_hex in self._secrets
 
 
 class PrivateKey:
-    def __init__(self, raw_secret: bytes=None) -> None:
+    def __init__(self, raw_secret: bytes=None, shared_secret_cache_size: int = 1024) -> None:
         if not raw_secret is None:
             self.raw_secret = raw_secret
         else:
             self.raw_secret = secrets.token_bytes(32)
 
-        sk = secp256k1.PrivateKey(self.raw_secret)
-        self.public_key = PublicKey(sk.pubkey.serialize()[1:])
+        self.public_key = PublicKey(self._native_key.pubkey.serialize()[1:])
+        # NIP-04 shared secrets by peer pubkey; 0 disables caching
+        self.shared_secrets: SharedSecretCache = SharedSecretCache(shared_secret_cache_size)
+
+    @property
+    def _native_key(self) -> secp256k1.PrivateKey:
+        # Parsed once (with its keypair) and reused for signing; rebuilt if raw_secret is replaced
+        native = self.__dict__.get("_native")
+        if native is None or native.private_key is not self.raw_secret:
+            native = secp256k1.PrivateKey(self.raw_secret)
+            self.__dict__["_native"] = native
+        return native
+
+    def __getstate__(self) -> dict:
+        # Cached secrets (and the cache's lock) and the native key aren't pickled
+        state = self.__dict__.copy()
+        state["shared_secrets"] = self.shared_secrets.capacity
+        state.pop("_native", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        state["shared_secrets"] = SharedSecretCache(state["shared_secrets"])
+        self.__dict__.update(state)
 
     @classmethod
     def from_nsec(cls, nsec: str):
         """ Load a PrivateKey from its bech32/nsec form """
-        hrp, data, spec = bech32.bech32_decode(nsec)
-        raw_secret = bech32.convertbits(data, 5, 8)[:-1]
-        return cls(bytes(raw_secret))
+        return cls(_decode_key(nsec, "nsec"))
 
     def bech32(self) -> str:
-        converted_bits = bech32.convertbits(self.raw_secret, 8, 5)
-        return bech32.bech32_encode("nsec", converted_bits, bech32.Encoding.BECH32)
+        return bech32.bech32_encode_bytes("nsec", self.raw_secret)
 
     def hex(self) -> str:
         return self.raw_secret.hex()
 
     def tweak_add(self, scalar: bytes) -> bytes:
-        sk = secp256k1.PrivateKey(self.raw_secret)
-        return sk.tweak_add(scalar)
+        return self._native_key.tweak_add(scalar)
+
+    def _ecdh(self, public_key_hex: str) -> bytearray:
+        try:
+            pk = parse_schnorr_pubkey(public_key_hex)
+        except Exception as e:
+            raise ValueError(f"invalid pubkey {public_key_hex}") from e
+        output = secp256k1.ffi.new("unsigned char [32]")
+        if not secp256k1.lib.secp256k1_ecdh(secp256k1.secp256k1_ctx, output, pk.public_key, self.raw_secret, copy_x, secp256k1.ffi.NULL):
+            raise ValueError(f"ECDH failed for pubkey {public_key_hex}")
+        secret = bytearray(secp256k1.ffi.buffer(output, 32))
+        secp256k1.ffi.memmove(output, bytes(32), 32)
+        return secret
+
+    def _with_shared_secret(self, public_key_hex: str, use: Callable[[bytearray], object]):
+        """
+            Calls `use` with the (cached) shared secret, which stays intact until it
+            returns. The cache is only locked to look up or insert the secret, so ECDH
+            and `use` run concurrently across threads.
+        """
+        cache = self.shared_secrets
+        secret = cache.acquire(public_key_hex)
+        if secret is None:
+            secret = cache.add(public_key_hex, self._ecdh(public_key_hex))
+        try:
+            return use(secret)
+        finally:
+            # With a capacity of 0 this zeroes it straight away
+            cache.release(secret)
 
     def compute_shared_secret(self, public_key_hex: str) -> bytes:
-        pk = secp256k1.PublicKey(bytes.fromhex("02" + public_key_hex), True)
-        return pk.ecdh(self.raw_secret, hashfn=copy_x)
+        return self._with_shared_secret(public_key_hex, bytes)
 
     def encrypt_message(self, message: str, public_key_hex: str) -> str:
         padder = padding.PKCS7(128).padder()
         padded_data = padder.update(message.encode()) + padder.finalize()
 
         iv = secrets.token_bytes(16)
-        cipher = Cipher(algorithms.AES(self.compute_shared_secret(public_key_hex)), modes.CBC(iv))
-
-        encryptor = cipher.encryptor()
+        encryptor = self._with_shared_secret(public_key_hex, lambda secret: Cipher(algorithms.AES(secret), modes.CBC(iv)).encryptor())
         encrypted_message = encryptor.update(padded_data) + encryptor.finalize()
 
         return f"{base64.b64encode(encrypted_message).decode()}?iv={base64.b64encode(iv).decode()}"
@@ -82,24 +246,49 @@ class PrivateKey:
         dm.content = self.encrypt_message(message=dm.cleartext_content, public_key_hex=dm.recipient_pubkey)
 
     def decrypt_message(self, encoded_message: str, public_key_hex: str) -> str:
-        encoded_data = encoded_message.split('?iv=')
-        encoded_content, encoded_iv = encoded_data[0], encoded_data[1]
-
-        iv = base64.b64decode(encoded_iv)
-        cipher = Cipher(algorithms.AES(self.compute_shared_secret(public_key_hex)), modes.CBC(iv))
-        encrypted_content = base64.b64decode(encoded_content)
-
-        decryptor = cipher.decryptor()
-        decrypted_message = decryptor.update(encrypted_content) + decryptor.finalize()
-
-        unpadder = padding.PKCS7(128).unpadder()
-        unpadded_data = unpadder.update(decrypted_message) + unpadder.finalize()
-
-        return unpadded_data.decode()
+        encrypted_content, iv = _split_encoded_message(encoded_message)
+        decryptor = self._with_shared_secret(public_key_hex, lambda secret: Cipher(algorithms.AES(secret), modes.CBC(iv)).decryptor())
+        return _decrypt(decryptor, encrypted_content)
+
+    def decrypt_messages(self, messages: Iterable[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+            Bulk `decrypt_message` over (encoded_message, sender public_key_hex) pairs,
+            e.g. a DM inbox backlog. Messages are grouped by sender so each peer costs
+            at most one ECDH however small the shared secret cache is. Results are in
+            input order, with None for any message that can't be decrypted.
+        """
+        messages = list(messages)
+        by_sender: dict[str, List[int]] = {}
+        for i, (_, public_key_hex) in enumerate(messages):
+            by_sender.setdefault(public_key_hex, []).append(i)
+
+        results: List[Optional[str]] = [None] * len(messages)
+        for public_key_hex, indexes in by_sender.items():
+            parsed = {}
+            for i in indexes:
+                try:
+                    parsed[i] = _split_encoded_message(messages[i][0])
+                except ValueError:
+                    pass
+            if not parsed:
+                continue
+            try:
+                decryptors = self._with_shared_secret(public_key_hex, lambda secret: {
+                    i: Cipher(algorithms.AES(secret), modes.CBC(iv)).decryptor()
+                    for i, (_, iv) in parsed.items()
+                })
+            except ValueError:
+                # Not a valid pubkey
+                continue
+            for i, decryptor in decryptors.items():
+                try:
+                    results[i] = _decrypt(decryptor, parsed[i][0])
+                except ValueError:
+                    pass
+        return results
 
     def sign_message_hash(self, hash: bytes) -> str:
-        sk = secp256k1.PrivateKey(self.raw_secret)
-        sig = sk.schnorr_sign(hash, None, raw=True)
+        sig = self._native_key.schnorr_sign(hash, None, raw=True)
         return sig.hex()
 
     def sign_event(self, event: Event) -> None:
@@ -109,6 +298,46 @@ class PrivateKey:
             event.public_key = self.public_key.hex()
         event.signature = self.sign_message_hash(bytes.fromhex(event.id))
 
+    def sign_events(self, events: List[Event], num_workers: int = 1, min_parallel_batch: int = 5_000, chunk_size: int = 2_000) -> List[Event]:
+        """
+            Bulk `sign_event`: signs the Events in place and returns them.
+
+            Each Event is serialized and hashed once and signed with this key's parsed
+            native keypair; the id is cached on the Event so `to_message` doesn't hash it
+            again. With `num_workers` > 1 (None: one per CPU), batches of at least
+            `min_parallel_batch` Events are hashed and signed in chunks of `chunk_size`
+            on a process pool. That sends this key's raw secret to the worker processes
+            (pickled over the pool's pipes), so keep the default of 1 wherever the secret
+            mustn't leave this process.
+        """
+        for event in events:
+            if event.kind == EventKind.ENCRYPTED_DIRECT_MESSAGE and event.content is None:
+                self.encrypt_dm(event)
+            if event.public_key is None:
+                event.public_key = self.public_key.hex()
+
+        num_workers = num_workers or os.cpu_count() or 1
+        if num_workers > 1 and len(events) >= min_parallel_batch:
+            chunks = [events[i:i + chunk_size] for i in range(0, len(events), chunk_size)]
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                results = executor.map(
+                    _sign_chunk,
+                    [self.raw_secret] * len(chunks),
+                    [[(e.public_key, e.created_at, e.kind, e.tags, e.content) for e in chunk] for chunk in chunks]
+                )
+                for chunk, signed in zip(chunks, results):
+                    for event, (event_id, signature) in zip(chunk, signed):
+                        event._cache_id(event_id)
+                        event.signature = signature
+            return events
+
+        native_key = self._native_key
+        for event in events:
+            digest = sha256(Event.serialize(event.public_key, event.created_at, event.kind, event.tags, event.content)).digest()
+            event._cache_id(digest.hex())
+            event.signature = native_key.schnorr_sign(digest, None, raw=True).hex()
+        return events
+
     def sign_delegation(self, delegation: Delegation) -> None:
         delegation.signature = self.sign_message_hash(sha256(delegation.delegation_token.encode()).digest())
 
@@ -116,19 +345,190 @@ class PrivateKey:
         return self.raw_secret == other.raw_secret
 
 
+def _sign_chunk(raw_secret: bytes, items: "list[tuple]") -> "list[tuple[str, str]]":
+    # Module-level so it can be sent to a process pool; returns (id, signature) pairs
+    native_key = secp256k1.PrivateKey(raw_secret)
+    signed = []
+    for public_key, created_at, kind, tags, content in items:
+        digest = sha256(Event.serialize(public_key, created_at, kind, tags, content)).digest()
+        signed.append((digest.hex(), native_key.schnorr_sign(digest, None, raw=True).hex()))
+    return signed
+
+
+def _split_encoded_message(encoded_message: str) -> "tuple[bytes, bytes]":
+    """ NIP-04 "<base64 ciphertext>?iv=<base64 iv>" -> (ciphertext, iv) """
+    encoded_content, separator, encoded_iv = encoded_message.partition('?iv=')
+    if not separator:
+        raise ValueError("encrypted message has no iv")
+    try:
+        iv = base64.b64decode(encoded_iv)
+        encrypted_content = base64.b64decode(encoded_content)
+    except binascii.Error as e:
+        raise ValueError("encrypted message is not valid base64") from e
+    if len(iv) != 16:
+        raise ValueError("iv must be 16 bytes")
+    return encrypted_content, iv
+
+
+def _decrypt(decryptor, encrypted_content: bytes) -> str:
+    decrypted_message = decryptor.update(encrypted_content) + decryptor.finalize()
+
+    unpadder = padding.PKCS7(128).unpadder()
+    unpadded_data = unpadder.update(decrypted_message) + unpadder.finalize()
+
+    return unpadded_data.decode()
+
+
+# Order of the secp256k1 group
+SECP256K1_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+
+@dataclass
+class VanityKeyResult:
+    private_key: "PrivateKey"   # None while mining is in progress or if it was cancelled/timed out
+    attempts: int
+    elapsed: float
+    expected_attempts: int
+
+    @property
+    def hash_rate(self) -> float:
+        """ Candidate keys checked per second """
+        return self.attempts / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def expected_time(self) -> float:
+        """ Expected seconds to find a match at the current hash rate (attempts are memoryless) """
+        return self.expected_attempts / self.hash_rate if self.hash_rate > 0 else float("inf")
+
+
+def _vanity_prefix_mask(prefix: str) -> "tuple[int, int]":
+    """
+        The npub data chars map 5 bits at a time onto the raw x-only pubkey, so a prefix
+        becomes a (value, shift) pair: int(raw_key) >> shift == value.
+    """
+    if prefix is None:
+        return 0, 256
+    if len(prefix) > 51:
+        raise ValueError("prefix can be at most 51 characters")
+    value = 0
+    for c in prefix:
+        d = bech32.CHARSET.find(c)
+        if d == -1:
+            raise ValueError(f"'{c}' is not a valid bech32 character")
+        value = value << 5 | d
+    return value, 256 - 5 * len(prefix)
+
+def _check_vanity_suffix(suffix: str) -> None:
+    # The suffix overlaps the checksum so it can't be masked; candidates passing the
+    # prefix mask are bech32-encoded instead.
+    if suffix is not None and any(c not in bech32.CHARSET for c in suffix):
+        raise ValueError(f"'{suffix}' contains non-bech32 characters")
+
+def expected_vanity_attempts(prefix: str = None, suffix: str = None) -> int:
+    return 32 ** (len(prefix or "") + len(suffix or ""))
+
+def _mine_vanity_range(start_secret: int, count: int, prefix_value: int, prefix_shift: int, suffix: str) -> "tuple[int, int]":
+    """
+        Checks the pubkeys of start_secret, start_secret + 1, ... by repeatedly adding G
+        rather than doing a full scalar multiplication per candidate.
+
+        Returns (secret, attempts) for the first match, or (None, attempts).
+    """
+    ffi, lib, ctx = secp256k1.ffi, secp256k1.lib, secp256k1.secp256k1_ctx
+    generator = secp256k1.PrivateKey((1).to_bytes(32, "big")).pubkey.public_key
+    point = secp256k1.PrivateKey(start_secret.to_bytes(32, "big")).pubkey.public_key
+    serialized = ffi.new("unsigned char [33]")
+    serialized_len = ffi.new("size_t *")
+
+    for i in range(count):
+        serialized_len[0] = 33
+        lib.secp256k1_ec_pubkey_serialize(ctx, serialized, serialized_len, point, secp256k1.EC_COMPRESSED)
+        raw_pubkey = bytes(ffi.buffer(serialized, 33))[1:]
+        if int.from_bytes(raw_pubkey, "big") >> prefix_shift == prefix_value:
+            if suffix is None or PublicKey(raw_pubkey).bech32().endswith(suffix):
+                return (start_secret + i) % SECP256K1_ORDER, i + 1
+
+        next_point = ffi.new("secp256k1_pubkey *")
+        if not lib.secp256k1_ec_pubkey_combine(ctx, next_point, [point, generator], 2):
+            # Only fails if we stepped onto the point at infinity
+            break
+        point = next_point
+
+    return None, count
+
+def _random_vanity_start(count: int) -> int:
+    while True:
+        start = int.from_bytes(secrets.token_bytes(32), "big")
+        if 0 < start < SECP256K1_ORDER - count:
+            return start
+
 def mine_vanity_key(prefix: str = None, suffix: str = None) -> PrivateKey:
     if prefix is None and suffix is None:
         raise ValueError("Expected at least one of 'prefix' or 'suffix' arguments")
 
+    prefix_value, prefix_shift = _vanity_prefix_mask(prefix)
+    _check_vanity_suffix(suffix)
+
     while True:
-        sk = PrivateKey()
-        if prefix is not None and not sk.public_key.bech32()[5:5+len(prefix)] == prefix:
-            continue
-        if suffix is not None and not sk.public_key.bech32()[-len(suffix):] == suffix:
-            continue
-        break
-
-    return sk
+        secret, _ = _mine_vanity_range(_random_vanity_start(100_000), 100_000, prefix_value, prefix_shift, suffix)
+        if secret is not None:
+            return PrivateKey(secret.to_bytes(32, "big"))
+
+def mine_vanity_key_parallel(
+        prefix: str = None,
+        suffix: str = None,
+        num_workers: int = None,
+        timeout: float = None,
+        progress: Callable[[VanityKeyResult], None] = None,
+        chunk_size: int = 20_000) -> VanityKeyResult:
+    """
+        Vanity npub mining across a process pool.
+
+        Each worker walks `chunk_size` consecutive keys from a fresh random starting secret.
+        `progress` is called with the running totals and expected time to solution each
+        time a chunk completes.
+    """
+    if prefix is None and suffix is None:
+        raise ValueError("Expected at least one of 'prefix' or 'suffix' arguments")
+
+    prefix_value, prefix_shift = _vanity_prefix_mask(prefix)
+    _check_vanity_suffix(suffix)
+    num_workers = num_workers or os.cpu_count() or 1
+
+    result = VanityKeyResult(None, 0, 0.0, expected_vanity_attempts(prefix, suffix))
+    started = time.monotonic()
+    deadline = started + timeout if timeout is not None else None
+    secret = None
+
+    def submit():
+        return executor.submit(_mine_vanity_range, _random_vanity_start(chunk_size), chunk_size, prefix_value, prefix_shift, suffix)
+
+    executor = ProcessPoolExecutor(max_workers=num_workers)
+    try:
+        pending = {submit() for _ in range(num_workers)}
+        while pending:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, attempts = future.result()
+                result.attempts += attempts
+                if found is not None and secret is None:
+                    secret = found
+            result.elapsed = time.monotonic() - started
+            if secret is not None:
+                break
+            if progress is not None and done:
+                progress(result)
+            pending |= {submit() for _ in done}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    result.elapsed = time.monotonic() - started
+    if secret is not None:
+        result.private_key = PrivateKey(secret.to_bytes(32, "big"))
+    return result
 
 
 ffi = FFI()
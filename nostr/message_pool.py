@@ -1,8 +1,21 @@
-import json
+import asyncio
+import heapq
+import itertools
+import queue
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from queue import Queue
-from threading import Lock
+from threading import Lock, RLock
+from typing import Callable
+from . import codec
 from .message_type import RelayMessageType
 from .event import Event
+from .event_store import EventStore
+from .metrics import RelayMetrics
+from .subscription import Subscription
 
 class EventMessage:
     def __init__(self, event: Event, subscription_id: str, url: str) -> None:
@@ -20,16 +33,313 @@ class EndOfStoredEventsMessage:
         self.subscription_id = subscription_id
         self.url = url
 
-class MessagePool:
+class OkMessage:
+    """ A relay's NIP-20 response to a published event """
+    def __init__(self, event_id: str, accepted: bool, message: str, url: str) -> None:
+        self.event_id = event_id
+        self.accepted = accepted
+        self.message = message
+        self.url = url
+
+class DedupSet:
+    """
+    Bounded set of recently seen event ids.
+
+    Ids are stored as 32-byte binary keys in least-recently-seen order. Once `capacity`
+    ids are held the least recently seen one is evicted, and if `max_age` is set ids not
+    seen within the last `max_age` seconds are expired as well. An evicted id that comes
+    back is treated as new, so size the set to cover the window in which relays are
+    expected to send duplicates.
+    """
+    def __init__(self, capacity: int = 100_000, max_age: float = None) -> None:
+        self.capacity = capacity
+        self.max_age = max_age
+        self._ids: "OrderedDict[bytes, float]" = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @staticmethod
+    def _key(event_id: str) -> bytes:
+        try:
+            return bytes.fromhex(event_id)
+        except ValueError:
+            # Not a hex id; still dedup on it rather than reject it here
+            return event_id.encode()
+
+    def add(self, event_id: str) -> bool:
+        """ Records the id and returns True if it had not been seen (or had been evicted) """
+        key = DedupSet._key(event_id)
+        now = time.monotonic()
+        self._expire(now)
+
+        if key in self._ids:
+            self._ids.move_to_end(key)
+            self._ids[key] = now
+            self.hits += 1
+            return False
+
+        self._ids[key] = now
+        self.misses += 1
+        if len(self._ids) > self.capacity:
+            self._ids.popitem(last=False)
+            self.evictions += 1
+        return True
+
+    def discard(self, event_id: str) -> None:
+        """ Forgets the id, e.g. so a valid copy can be accepted after an invalid one was rejected """
+        self._ids.pop(DedupSet._key(event_id), None)
+
+    def _expire(self, now: float) -> None:
+        if self.max_age is None:
+            return
+        cutoff = now - self.max_age
+        while self._ids:
+            key, last_seen = next(iter(self._ids.items()))
+            if last_seen >= cutoff:
+                break
+            del self._ids[key]
+            self.evictions += 1
+
+    def __contains__(self, event_id: str) -> bool:
+        return DedupSet._key(event_id) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def memory_bytes(self) -> int:
+        """ Approximate memory held by the set: the dict itself plus its keys and timestamps """
+        per_entry = sys.getsizeof(bytes(32)) + sys.getsizeof(0.0)
+        return sys.getsizeof(self._ids) + len(self._ids) * per_entry
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+            "memory_bytes": self.memory_bytes,
+        }
+
+@dataclass
+class IngestOptions:
+    """
+    Optional stages of MessagePool's ingest pipeline. Each relay frame is decoded once
+    and then goes through:
+
+        validate -> subscription -> dedup -> verify -> filter -> enqueue
+
+    Dedup runs before signature verification so copies of an event from other relays
+    are never verified again. While an event is being verified, copies of it from other
+    relays are held back rather than dropped; if it fails, the next copy is verified
+    instead, so a forgery can't shadow the valid event. An event rejected by `filter` is
+    forgotten by the dedup stage so a matching copy can still be accepted later.
+    """
+    decode: Callable[["str | bytes"], object] = None  # parses a frame; defaults to codec.loads
+    validate: bool = True               # check the frame's structure and field types
+    require_subscription: bool = False  # drop EVENTs for subscriptions the relay doesn't know about
+    dedup: bool = True                  # drop events already received (from any relay)
+    verify_signatures: bool = False     # check each new event's id and signature
+    apply_filters: bool = False         # drop EVENTs that don't match their subscription's Filters
+
+
+
+class StageStats:
+    __slots__ = ("count", "rejected", "seconds")
+
     def __init__(self) -> None:
+        self.count: int = 0
+        self.rejected: int = 0
+        self.seconds: float = 0.0
+
+    def to_json_object(self) -> dict:
+        return {
+            "count": self.count,
+            "rejected": self.rejected,
+            "seconds": self.seconds,
+            "mean_us": self.seconds / self.count * 1e6 if self.count else 0.0,
+        }
+
+
+
+def _verify_event(event: Event) -> bool:
+    # Module-level so it can be sent to a process pool
+    return event.verify()
+
+
+
+class _PendingVerification:
+    __slots__ = ("verified", "on_verified")
+
+    def __init__(self, on_verified: Callable[[bool], None]) -> None:
+        self.verified: bool = None
+        self.on_verified = on_verified
+
+
+
+class VerificationStage:
+    """
+    Runs MessagePool's signature verification on an executor instead of the relay's
+    websocket callback thread, so reads aren't blocked while secp256k1 runs.
+
+    Pass one to MessagePool or AsyncMessagePool (with
+    `IngestOptions.verify_signatures`). Any concurrent.futures Executor works; by
+    default a thread pool is used, which runs in parallel because libsecp256k1
+    releases the GIL. With `preserve_order`, results for the same subscription are
+    delivered to the pool in the order the frames arrived; otherwise each is
+    delivered as soon as it is verified.
+    """
+    def __init__(self, executor: Executor = None, max_workers: int = None, preserve_order: bool = True) -> None:
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nostr-verify")
+        self.preserve_order = preserve_order
+        self.latency: StageStats = StageStats()  # submit -> verified, including time spent queued
+        self.queue_depth: int = 0                # submitted but not yet delivered
+        self._pending: dict[str, deque] = {}
+        # Reentrant: delivering a result can submit a retry from within the lock
+        self.lock: RLock = RLock()
+
+    def submit(self, event: Event, subscription_id: str, on_verified: Callable[[bool], None]) -> None:
+        pending = _PendingVerification(on_verified)
+        submitted = time.perf_counter()
+        with self.lock:
+            self.queue_depth += 1
+            if self.preserve_order:
+                self._pending.setdefault(subscription_id, deque()).append(pending)
+        try:
+            future = self.executor.submit(_verify_event, event)
+        except Exception:
+            # e.g. the executor has been shut down. Deliver it as unverified rather than
+            # leave the subscription's later results and EOSE queued behind it forever
+            future = Future()
+            future.set_result(False)
+        future.add_done_callback(lambda future: self._on_done(future, pending, subscription_id, submitted))
+
+    def after_pending(self, subscription_id: str, callback: Callable[[], None]) -> None:
+        """ Runs `callback` once everything already submitted for the subscription has been delivered """
+        with self.lock:
+            queue = self._pending.get(subscription_id) if self.preserve_order else None
+            if not queue:
+                callback()
+                return
+            barrier = _PendingVerification(lambda verified: callback())
+            barrier.verified = True
+            queue.append(barrier)
+            self.queue_depth += 1
+
+    def _on_done(self, future: Future, pending: _PendingVerification, subscription_id: str, submitted: float) -> None:
+        try:
+            pending.verified = future.result()
+        except Exception:
+            pending.verified = False
+
+        # Delivery happens under the lock so in-order results can't be overtaken by
+        # another worker delivering a later one
+        with self.lock:
+            self.latency.count += 1
+            self.latency.seconds += time.perf_counter() - submitted
+            if not pending.verified:
+                self.latency.rejected += 1
+
+            if not self.preserve_order:
+                ready = [pending]
+            else:
+                queue = self._pending[subscription_id]
+                ready = []
+                while queue and queue[0].verified is not None:
+                    ready.append(queue.popleft())
+                if not queue:
+                    del self._pending[subscription_id]
+
+            self.queue_depth -= len(ready)
+            for p in ready:
+                p.on_verified(p.verified)
+
+    def stats(self) -> dict:
+        return {"queue_depth": self.queue_depth, "latency": self.latency.to_json_object()}
+
+    def close(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
+
+
+
+_EVENT_FIELD_TYPES = (
+    ("id", str),
+    ("pubkey", str),
+    ("created_at", int),
+    ("kind", int),
+    ("tags", list),
+    ("content", str),
+    ("sig", str),
+)
+
+def _is_valid_frame(message_json) -> bool:
+    if not isinstance(message_json, list) or len(message_json) < 2:
+        return False
+    message_type = message_json[0]
+    if message_type == RelayMessageType.EVENT:
+        if len(message_json) != 3 or not isinstance(message_json[1], str):
+            return False
+        e = message_json[2]
+        if not isinstance(e, dict):
+            return False
+        for key, field_type in _EVENT_FIELD_TYPES:
+            if not isinstance(e.get(key), field_type):
+                return False
+        return all(isinstance(tag, list) for tag in e["tags"])
+    if message_type == RelayMessageType.NOTICE or message_type == RelayMessageType.END_OF_STORED_EVENTS:
+        return isinstance(message_json[1], str)
+    if message_type == RelayMessageType.OK:
+        # ["OK", <event id>, <accepted>, <message>]; some relays omit the message
+        return (
+            len(message_json) in (3, 4)
+            and isinstance(message_json[1], str)
+            and isinstance(message_json[2], bool)
+            and (len(message_json) == 3 or isinstance(message_json[3], str))
+        )
+    return False
+
+class MessagePool:
+    STAGES = ("decode", "validate", "subscription", "dedup", "verify", "filter", "enqueue")
+
+    def __init__(
+            self,
+            dedup_capacity: int = 100_000,
+            dedup_max_age: float = None,
+            event_store: EventStore = None,
+            ingest_options: IngestOptions = None,
+            verifier: VerificationStage = None,
+            ok_notices_capacity: int = 1_000) -> None:
         self.events: Queue[EventMessage] = Queue()
         self.notices: Queue[NoticeMessage] = Queue()
         self.eose_notices: Queue[EndOfStoredEventsMessage] = Queue()
-        self._unique_events: set = set()
+        # OKs are usually consumed through listeners (see PublishResult), so the queue
+        # only keeps the most recent `ok_notices_capacity` of them
+        self.ok_notices: Queue[OkMessage] = Queue(maxsize=ok_notices_capacity)
+        self.ok_notices_dropped: int = 0
+        self._ok_listeners: dict[str, list[Callable[[OkMessage], None]]] = {}
+        self._ok_listener_expiry: list = []  # heap of (deadline, seq, event_id, callback)
+        self._ok_listener_seq = itertools.count()
+        self._unique_events: DedupSet = DedupSet(dedup_capacity, dedup_max_age)
+        self.event_store = event_store  # if set, every new event is also persisted here
+        self.ingest_options = ingest_options or IngestOptions()
+        self.verifier = verifier  # if set, signatures are verified off the calling thread
+        self._in_flight: dict[str, list] = {}  # event id -> duplicate copies received while it's being verified
+        self.stage_stats: dict[str, StageStats] = {stage: StageStats() for stage in MessagePool.STAGES}
+        self._relay_metrics: dict[str, RelayMetrics] = {}
         self.lock: Lock = Lock()
+        self._stats_lock: Lock = Lock()  # relays' threads and verification workers all record stages
     
-    def add_message(self, message: str, url: str):
-        self._process_message(message, url)
+    def add_message(self, message: "str | bytes", url: str, subscriptions: dict[str, Subscription] = None):
+        """ `subscriptions` are the relay's, for the subscription and filter stages """
+        self._process_message(message, url, subscriptions)
 
     def get_event(self):
         return self.events.get()
@@ -49,27 +359,298 @@ class MessagePool:
     def has_eose_notices(self):
         return self.eose_notices.qsize() > 0
 
-    def _process_message(self, message: str, url: str):
-        message_json = json.loads(message)
+    def get_ok_notice(self):
+        return self.ok_notices.get()
+
+    def has_ok_notices(self):
+        return self.ok_notices.qsize() > 0
+
+    def add_ok_listener(self, event_id: str, callback: Callable[[OkMessage], None], expires_after: float = None) -> None:
+        """
+            Calls `callback` with each OK received for `event_id`, on the receiving relay's
+            thread. With `expires_after` the listener is dropped that many seconds later
+            even if it's never removed, e.g. because a relay never answers.
+        """
+        with self.lock:
+            self._expire_ok_listeners()
+            self._ok_listeners.setdefault(event_id, []).append(callback)
+            if expires_after is not None:
+                heapq.heappush(
+                    self._ok_listener_expiry,
+                    (time.monotonic() + expires_after, next(self._ok_listener_seq), event_id, callback)
+                )
+
+    def remove_ok_listener(self, event_id: str, callback: Callable[[OkMessage], None]) -> None:
+        with self.lock:
+            self._remove_ok_listener(event_id, callback)
+
+    def _remove_ok_listener(self, event_id: str, callback: Callable[[OkMessage], None]) -> None:
+        listeners = self._ok_listeners.get(event_id)
+        if listeners and callback in listeners:
+            listeners.remove(callback)
+            if not listeners:
+                del self._ok_listeners[event_id]
+
+    def _expire_ok_listeners(self) -> None:
+        # Called with the lock held
+        expiry = self._ok_listener_expiry
+        now = time.monotonic()
+        while expiry and expiry[0][0] <= now:
+            _, _, event_id, callback = heapq.heappop(expiry)
+            self._remove_ok_listener(event_id, callback)
+
+    def _put_ok_notice(self, ok: OkMessage) -> None:
+        # Called with the lock held, so only consumers can change the queue meanwhile
+        if self.ok_notices.full():
+            try:
+                self.ok_notices.get_nowait()
+            except (queue.Empty, asyncio.QueueEmpty):
+                pass
+            self.ok_notices_dropped += 1
+        self.ok_notices.put_nowait(ok)
+
+    def dedup_stats(self) -> dict:
+        with self.lock:
+            return self._unique_events.stats()
+
+    def relay_metrics(self, url: str) -> RelayMetrics:
+        """ The RelayMetrics that messages from `url` are recorded against """
+        with self.lock:
+            if url not in self._relay_metrics:
+                self._relay_metrics[url] = RelayMetrics(url)
+            return self._relay_metrics[url]
+
+    def metrics(self) -> dict:
+        """ Current queue depths and dedup set size """
+        res = {
+            "events_queue_depth": self.events.qsize(),
+            "notices_queue_depth": self.notices.qsize(),
+            "eose_notices_queue_depth": self.eose_notices.qsize(),
+            "ok_notices_queue_depth": self.ok_notices.qsize(),
+            "ok_notices_dropped": self.ok_notices_dropped,
+            "ok_listeners": len(self._ok_listeners),
+            "dedup_size": len(self._unique_events),
+        }
+        if self.verifier is not None:
+            res["verification_queue_depth"] = self.verifier.queue_depth
+        return res
+
+    def ingest_stats(self) -> dict:
+        with self._stats_lock:
+            return {stage: stats.to_json_object() for stage, stats in self.stage_stats.items()}
+
+    def _stage(self, stage: str, started: float, passed: bool = True) -> float:
+        """ Records the time since `started` against the stage and returns the current time """
+        now = time.perf_counter()
+        stats = self.stage_stats[stage]
+        with self._stats_lock:
+            stats.count += 1
+            stats.seconds += now - started
+            if not passed:
+                stats.rejected += 1
+        return now
+
+    def _process_message(self, message: "str | bytes", url: str, subscriptions: dict[str, Subscription] = None):
+        options = self.ingest_options
+        metrics = self._relay_metrics.get(url)
+        started = time.perf_counter()
+        try:
+            message_json = (options.decode or codec.loads)(message)
+        except ValueError:
+            self._stage("decode", started, False)
+            return
+        t = self._stage("decode", started)
+        if metrics is not None:
+            metrics.parse_seconds.observe(t - started)
+
+        if options.validate:
+            valid = _is_valid_frame(message_json)
+            t = self._stage("validate", t, valid)
+            if not valid:
+                return
+
         message_type = message_json[0]
         if message_type == RelayMessageType.EVENT:
             subscription_id = message_json[1]
-            e = message_json[2]
-            event = Event(
-                e["content"],
-                e["pubkey"],
-                e["created_at"],
-                e["kind"],
-                e["tags"],
-                e["sig"],
-            )
-            with self.lock:
-                if not event.id in self._unique_events:
-                    self.events.put(EventMessage(event, subscription_id, url))
-                    self._unique_events.add(event.id)
+            subscription = subscriptions.get(subscription_id) if subscriptions is not None else None
+            if options.require_subscription or options.apply_filters:
+                known = subscription is not None or not options.require_subscription
+                t = self._stage("subscription", t, known)
+                if not known:
+                    return
+
+            event = Event.from_json_object(message_json[2])
+            is_new = True
+            if options.dedup:
+                with self.lock:
+                    is_new = self._unique_events.add(event.id)
+                    if is_new and options.verify_signatures:
+                        # Only counts as seen for good once a copy verifies (see _after_verify)
+                        self._in_flight[event.id] = []
+                    elif not is_new and event.id in self._in_flight:
+                        # Hold on to this copy in case the one being verified turns out to be invalid
+                        self._in_flight[event.id].append((event, subscription_id, subscription, url))
+                t = self._stage("dedup", t, is_new)
+            if metrics is not None:
+                metrics.events_received += 1
+                if not is_new:
+                    metrics.duplicate_events += 1
+            if not is_new:
+                return
+
+            if options.verify_signatures:
+                if self.verifier is not None:
+                    self._submit_verification(event, subscription_id, subscription, url, t)
+                else:
+                    self._verify(event, subscription_id, subscription, url, t)
+                return
+
+            self._accept_event(event, subscription_id, subscription, url, t)
         elif message_type == RelayMessageType.NOTICE:
-            self.notices.put(NoticeMessage(message_json[1], url))
+            self.notices.put_nowait(NoticeMessage(message_json[1], url))
+            self._stage("enqueue", t)
         elif message_type == RelayMessageType.END_OF_STORED_EVENTS:
-            self.eose_notices.put(EndOfStoredEventsMessage(message_json[1], url))
+            eose = EndOfStoredEventsMessage(message_json[1], url)
+            subscription = subscriptions.get(eose.subscription_id) if subscriptions is not None else None
+            if metrics is not None:
+                metrics.on_eose(eose.subscription_id, t)
+            if options.verify_signatures and self.verifier is not None:
+                # Don't let EOSE overtake the subscription's stored events still being verified
+                deliver = self._from_worker(self._deliver_eose)
+                self.verifier.after_pending(eose.subscription_id, lambda: deliver(eose, subscription))
+            else:
+                self._deliver_eose(eose, subscription)
+            self._stage("enqueue", t)
+        elif message_type == RelayMessageType.OK:
+            ok = OkMessage(message_json[1], message_json[2], message_json[3] if len(message_json) > 3 else "", url)
+            with self.lock:
+                self._expire_ok_listeners()
+                listeners = list(self._ok_listeners.get(ok.event_id, ()))
+                self._put_ok_notice(ok)
+            for callback in listeners:
+                callback(ok)
+            self._stage("enqueue", t)
+
+    def _deliver_eose(self, eose: EndOfStoredEventsMessage, subscription: Subscription) -> None:
+        if subscription is not None:
+            subscription.on_eose()
+        self.eose_notices.put_nowait(eose)
+
+    def _verify(self, event: Event, subscription_id: str, subscription: Subscription, url: str, t: float):
+        """ The verify stage on the calling thread, moving on to held copies while they fail """
+        copy = (event, subscription_id, subscription, url)
+        while copy is not None:
+            event, subscription_id, subscription, url = copy
+            copy = self._after_verify(event, event.verify(), subscription_id, subscription, url, t)
+            t = time.perf_counter()
+
+    def _submit_verification(self, event: Event, subscription_id: str, subscription: Subscription, url: str, t: float):
+        def on_verified(verified: bool):
+            retry = self._after_verify(event, verified, subscription_id, subscription, url, t)
+            if retry is not None:
+                self._submit_verification(*retry, time.perf_counter())
+
+        self.verifier.submit(event, subscription_id, self._from_worker(on_verified))
+
+    def _from_worker(self, callback: Callable) -> Callable:
+        """ Wraps a callback the VerificationStage will run on one of its worker threads """
+        return callback
+
+    def _after_verify(self, event: Event, verified: bool, subscription_id: str, subscription: Subscription, url: str, t: float):
+        """ Returns the next held copy of the event to verify if this one failed """
+        submitted, t = t, self._stage("verify", t, verified)
+        metrics = self._relay_metrics.get(url)
+        if metrics is not None:
+            metrics.verify_seconds.observe(t - submitted)
+        retry = None
+        with self.lock:
+            parked = self._in_flight.pop(event.id, None)
+            if not verified:
+                if parked:
+                    # The id stays marked as seen while the next copy is verified
+                    retry = parked.pop(0)
+                    self._in_flight[event.id] = parked
+                elif self.ingest_options.dedup:
+                    self._unique_events.discard(event.id)
+        if not verified:
+            return retry
+        self._accept_event(event, subscription_id, subscription, url, t)
+        return None
+
+    def _accept_event(self, event: Event, subscription_id: str, subscription: Subscription, url: str, t: float):
+        """ The filter and enqueue stages """
+        if self.ingest_options.apply_filters and subscription is not None and subscription.filters:
+            matched = subscription.filters.match(event)
+            t = self._stage("filter", t, matched)
+            if not matched:
+                if self.ingest_options.dedup:
+                    with self.lock:
+                        self._unique_events.discard(event.id)
+                return
+
+        if subscription is not None:
+            subscription.on_event(event.created_at)
+        self.events.put_nowait(EventMessage(event, subscription_id, url))
+        if self.event_store is not None:
+            self.event_store.add(event)
+        self._stage("enqueue", t)
+
+
+
+
+class AsyncMessagePool(MessagePool):
+    """
+    MessagePool for use on an asyncio event loop (see AsyncRelayManager).
+
+    Messages are parsed and deduplicated exactly as in MessagePool but are delivered
+    through asyncio queues, either by awaiting `get_*` or via the async iterators.
+    Messages must be added from the event loop's thread. With a VerificationStage,
+    verification results are handed back to that loop (asyncio queues aren't
+    thread-safe), still in order.
+    """
+    def __init__(
+            self,
+            dedup_capacity: int = 100_000,
+            dedup_max_age: float = None,
+            event_store: EventStore = None,
+            ingest_options: IngestOptions = None,
+            verifier: VerificationStage = None,
+            ok_notices_capacity: int = 1_000) -> None:
+        super().__init__(dedup_capacity, dedup_max_age, event_store, ingest_options, verifier, ok_notices_capacity)
+        self.events: asyncio.Queue[EventMessage] = asyncio.Queue()
+        self.notices: asyncio.Queue[NoticeMessage] = asyncio.Queue()
+        self.eose_notices: asyncio.Queue[EndOfStoredEventsMessage] = asyncio.Queue()
+        self.ok_notices: asyncio.Queue[OkMessage] = asyncio.Queue(maxsize=ok_notices_capacity)
+
+    def _from_worker(self, callback: Callable) -> Callable:
+        # Called on the loop's thread, when the message being verified was added
+        loop = asyncio.get_running_loop()
+        return lambda *args: loop.call_soon_threadsafe(callback, *args)
+
+    async def get_event(self) -> EventMessage:
+        return await self.events.get()
+
+    async def get_notice(self) -> NoticeMessage:
+        return await self.notices.get()
+
+    async def get_eose_notice(self) -> EndOfStoredEventsMessage:
+        return await self.eose_notices.get()
+
+    async def get_ok_notice(self) -> OkMessage:
+        return await self.ok_notices.get()
+
+    async def iter_events(self):
+        while True:
+            yield await self.events.get()
+
+    async def iter_notices(self):
+        while True:
+            yield await self.notices.get()
 
+    async def iter_eose_notices(self):
+        while True:
+            yield await self.eose_notices.get()
 
+    async def iter_ok_notices(self):
+        while True:
+            yield await self.ok_notices.get()
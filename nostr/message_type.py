@@ -7,9 +7,10 @@ class RelayMessageType:
     EVENT = "EVENT"
     NOTICE = "NOTICE"
     END_OF_STORED_EVENTS = "EOSE"
+    OK = "OK"
 
     @staticmethod
     def is_valid(type: str) -> bool:
-        if type == RelayMessageType.EVENT or type == RelayMessageType.NOTICE or type == RelayMessageType.END_OF_STORED_EVENTS:
+        if type == RelayMessageType.EVENT or type == RelayMessageType.NOTICE or type == RelayMessageType.END_OF_STORED_EVENTS or type == RelayMessageType.OK:
             return True
         return False
\ No newline at end of file
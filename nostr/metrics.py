@@ -0,0 +1,155 @@
+"""
+Counters and latency histograms for relays and the MessagePool.
+
+Each Relay and AsyncRelay owns a RelayMetrics (`relay.metrics`), which its receive
+and send paths and the MessagePool update in place: plain attribute increments and a
+bisect per histogram observation, with no locks, so a count may very occasionally be
+lost to a race between threads. Read them with `to_json_object`, or render a
+Prometheus text exposition with `to_prometheus` (see `RelayManager.metrics` /
+`prometheus_metrics`, which AsyncRelayManager also has).
+"""
+from bisect import bisect_left
+from typing import Iterable, Tuple
+
+
+# Seconds, from 10us (parsing a small frame) up to 10s (a slow REQ -> EOSE)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last one counts values above every bound
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> "list[tuple[float, int]]":
+        """ (upper bound, observations <= bound) pairs, ending with +Inf """
+        total = 0
+        buckets = []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+    def to_json_object(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+        }
+
+
+
+class RelayMetrics:
+    COUNTERS = (
+        "messages_received", "bytes_received", "messages_sent", "bytes_sent",
+        "events_received", "duplicate_events", "reconnects",
+    )
+    HISTOGRAMS = ("parse_seconds", "verify_seconds", "req_to_eose_seconds")
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.messages_received: int = 0
+        self.bytes_received: int = 0
+        self.messages_sent: int = 0
+        self.bytes_sent: int = 0
+        self.events_received: int = 0   # EVENT frames that reached deduplication
+        self.duplicate_events: int = 0
+        self.reconnects: int = 0
+        self.send_queue_depth: int = 0  # refreshed when the metrics are read
+        self.parse_seconds: Histogram = Histogram()
+        self.verify_seconds: Histogram = Histogram()
+        self.req_to_eose_seconds: Histogram = Histogram()
+        self._req_sent: dict[str, float] = {}  # subscription id -> when its REQ was sent
+
+    def on_received(self, message: "str | bytes") -> None:
+        self.messages_received += 1
+        self.bytes_received += len(message) if isinstance(message, bytes) or message.isascii() else len(message.encode())
+
+    def on_sent(self, message: str) -> None:
+        self.messages_sent += 1
+        self.bytes_sent += len(message) if message.isascii() else len(message.encode())
+
+    def on_request_sent(self, subscription_id: str, sent: float) -> None:
+        """ Called by the Relay when it adds (or re-sends) a subscription rather than per frame sent """
+        self._req_sent[subscription_id] = sent
+
+    def on_subscription_closed(self, subscription_id: str) -> None:
+        self._req_sent.pop(subscription_id, None)
+
+    def on_eose(self, subscription_id: str, received: float) -> None:
+        sent = self._req_sent.pop(subscription_id, None)
+        if sent is not None:
+            self.req_to_eose_seconds.observe(received - sent)
+
+    @property
+    def duplicate_ratio(self) -> float:
+        return self.duplicate_events / self.events_received if self.events_received else 0.0
+
+    def to_json_object(self) -> dict:
+        res = {name: getattr(self, name) for name in RelayMetrics.COUNTERS}
+        res["duplicate_ratio"] = self.duplicate_ratio
+        res["send_queue_depth"] = self.send_queue_depth
+        for name in RelayMetrics.HISTOGRAMS:
+            res[name] = getattr(self, name).to_json_object()
+        return res
+
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def to_prometheus(relay_metrics: Iterable[RelayMetrics], pool_gauges: dict = None, prefix: str = "nostr") -> str:
+    """
+        Prometheus text exposition (format 0.0.4) of the relays' metrics, labelled by
+        relay url, plus unlabelled `pool_gauges` (e.g. MessagePool queue depths).
+    """
+    relay_metrics = list(relay_metrics)
+    lines = []
+
+    for name in RelayMetrics.COUNTERS:
+        metric = f"{prefix}_relay_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for metrics in relay_metrics:
+            lines.append(f'{metric}{{relay="{_escape_label(metrics.url)}"}} {getattr(metrics, name)}')
+
+    for name in ("duplicate_ratio", "send_queue_depth"):
+        metric = f"{prefix}_relay_{name}"
+        lines.append(f"# TYPE {metric} gauge")
+        for metrics in relay_metrics:
+            lines.append(f'{metric}{{relay="{_escape_label(metrics.url)}"}} {getattr(metrics, name)}')
+
+    for name in RelayMetrics.HISTOGRAMS:
+        metric = f"{prefix}_relay_{name}"
+        lines.append(f"# TYPE {metric} histogram")
+        for metrics in relay_metrics:
+            label = f'relay="{_escape_label(metrics.url)}"'
+            histogram = getattr(metrics, name)
+            for bound, count in histogram.cumulative():
+                lines.append(f'{metric}_bucket{{{label},le="{_format_bound(bound)}"}} {count}')
+            lines.append(f"{metric}_sum{{{label}}} {histogram.sum}")
+            lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+
+    for name, value in (pool_gauges or {}).items():
+        metric = f"{prefix}_pool_{name}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,193 @@
+"""
+Streaming import and export of Events as newline-delimited JSON (NDJSON / JSONL).
+
+Each line holds one Event in its NIP-01 json object form. Both directions work on
+generators, so archives of any size are processed in constant memory. Reading
+detects gzip and zstd compression from the file's magic bytes; writing picks it from
+the file extension (`.gz`, `.zst`). zstd needs the optional `zstandard` package.
+
+    from nostr import ndjson
+    ndjson.write_events(events, "archive.jsonl.gz")
+    for event in ndjson.read_events("archive.jsonl.zst", filters=filters, verify=True):
+        ...
+"""
+import gzip
+import io
+import os
+from contextlib import contextmanager
+from typing import IO, Iterable, Iterator, Optional, Union
+
+from . import codec
+from .event import Event, verify_events
+from .filter import Filters
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+PathOrFile = Union[str, os.PathLike, IO[bytes]]
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise ImportError("zstd compression requires the 'zstandard' package")
+
+
+def _compression_from_path(path) -> Optional[str]:
+    name = os.fspath(path)
+    if name.endswith(".gz"):
+        return "gzip"
+    if name.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+class _RawReader(io.RawIOBase):
+    """ Adapts any binary file object with `read` so io.BufferedReader can wrap it """
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        self._fileobj = fileobj
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._fileobj.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _compression_from_magic(fileobj: IO[bytes]) -> Optional[str]:
+    # Needs `peek` so the magic bytes aren't consumed; see _open_for_reading
+    head = fileobj.peek(4)[:4]
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+@contextmanager
+def _open_for_reading(source: PathOrFile, compression: str):
+    fileobj = open(source, "rb") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        if compression == "auto":
+            if not hasattr(fileobj, "peek"):
+                # e.g. BytesIO or a socket file; closing this doesn't close `source`
+                fileobj = io.BufferedReader(_RawReader(fileobj))
+            compression = _compression_from_magic(fileobj)
+        # Closing the decompressors releases their state but leaves `fileobj` open
+        if compression == "gzip":
+            with gzip.GzipFile(fileobj=fileobj, mode="rb") as reader:
+                yield reader
+        elif compression == "zstd":
+            _require_zstandard()
+            with io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(fileobj, closefd=False)) as reader:
+                yield reader
+        elif compression is None:
+            yield fileobj
+        else:
+            raise ValueError(f"unsupported compression '{compression}'")
+    finally:
+        if fileobj is not source:
+            fileobj.close()
+
+
+@contextmanager
+def _open_for_writing(destination: PathOrFile, compression: str, level: Optional[int]):
+    is_path = isinstance(destination, (str, os.PathLike))
+    if compression == "auto":
+        compression = _compression_from_path(destination) if is_path else None
+    if compression == "zstd":
+        _require_zstandard()
+    elif compression not in ("gzip", None):
+        raise ValueError(f"unsupported compression '{compression}'")
+
+    fileobj = open(destination, "wb") if is_path else destination
+    try:
+        if compression == "gzip":
+            with gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=9 if level is None else level) as writer:
+                yield writer
+        elif compression == "zstd":
+            compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+            with compressor.stream_writer(fileobj, closefd=False) as writer:
+                yield writer
+        else:
+            yield fileobj
+    finally:
+        if is_path:
+            fileobj.close()
+
+
+def write_events(events: Iterable[Event], destination: PathOrFile, compression: str = "auto", level: int = None) -> int:
+    """
+        Writes Events (or CompactEvents) to `destination`, one json object per line, and
+        returns how many were written.
+
+        `destination` is a path or a binary file object. With `compression="auto"` a
+        path ending in `.gz` or `.zst` is compressed accordingly and a file object is
+        written uncompressed; pass "gzip", "zstd" or None to choose explicitly.
+    """
+    count = 0
+    with _open_for_writing(destination, compression, level) as writer:
+        for event in events:
+            writer.write(codec.dumps_bytes(event.to_json_object()) + b"\n")
+            count += 1
+    return count
+
+
+def read_events(
+        source: PathOrFile,
+        filters: Filters = None,
+        verify: bool = False,
+        compression: str = "auto",
+        skip_invalid: bool = False,
+        max_workers: int = None,
+        batch_size: int = 4096) -> Iterator[Event]:
+    """
+        Yields the Events stored one per line in `source`, in file order.
+
+        `source` is a path or a binary file object; gzip and zstd input is detected
+        from its magic bytes unless `compression` says otherwise. Only Events that
+        match `filters` (if given) are yielded. With `verify=True` Events whose id or
+        signature doesn't check out are dropped; matching Events are verified in
+        batches of `batch_size` on up to `max_workers` threads (see `verify_events`).
+
+        A line that isn't a valid event raises ValueError naming its line number, or
+        is skipped when `skip_invalid` is set. Blank lines are ignored.
+    """
+    pending = []
+    with _open_for_reading(source, compression) as reader:
+        for line_number, line in enumerate(reader, start=1):
+            if not line.strip():
+                continue
+            try:
+                event = Event.from_json_object(codec.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                if skip_invalid:
+                    continue
+                raise ValueError(f"line {line_number}: not a valid event ({e})") from e
+
+            if filters is not None and not filters.match(event):
+                continue
+            if not verify:
+                yield event
+                continue
+
+            pending.append(event)
+            if len(pending) >= batch_size:
+                yield from _verified(pending, max_workers)
+                pending = []
+
+    if pending:
+        yield from _verified(pending, max_workers)
+
+
+def _verified(events: "list[Event]", max_workers: int) -> Iterator[Event]:
+    for event, valid in zip(events, verify_events(events, max_workers=max_workers)):
+        if valid:
+            yield event
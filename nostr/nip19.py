@@ -0,0 +1,213 @@
+"""
+NIP-19 bech32-encoded entities.
+
+Bare keys and ids (npub, nsec, note) encode their 32 bytes directly. nprofile,
+nevent, naddr and nrelay carry TLV records (type, length, value) so they can include
+relay hints, authors and kinds; they routinely exceed BIP-173's 90 characters, so
+decoding allows up to MAX_LENGTH. Unknown TLV types are ignored, as NIP-19 requires.
+The encoders and `decode` raise ValueError for invalid input.
+
+    from nostr import nip19
+    nip19.encode_nprofile(public_key_hex, relays=["wss://relay.example.com"])
+    hrp, value = nip19.decode("nevent1...")   # value is an EventPointer
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+from . import bech32
+
+
+MAX_LENGTH = 5_000
+
+# TLV types
+TLV_SPECIAL = 0
+TLV_RELAY = 1
+TLV_AUTHOR = 2
+TLV_KIND = 3
+
+
+
+@dataclass
+class ProfilePointer:
+    public_key: str
+    relays: List[str] = field(default_factory=list)
+
+
+
+@dataclass
+class EventPointer:
+    event_id: str
+    relays: List[str] = field(default_factory=list)
+    author: Optional[str] = None
+    kind: Optional[int] = None
+
+
+
+@dataclass
+class AddressPointer:
+    identifier: str     # the "d" tag of a parameterized replaceable event
+    public_key: str
+    kind: int
+    relays: List[str] = field(default_factory=list)
+
+
+
+def _raw_32(value: str, name: str) -> bytes:
+    try:
+        raw = bytes.fromhex(value)
+    except (TypeError, ValueError):
+        raw = b""
+    if len(raw) != 32:
+        raise ValueError(f"{name} must be 32 bytes of hex")
+    return raw
+
+
+def _encode(hrp: str, data: bytes) -> str:
+    return bech32.bech32_encode_bytes(hrp, data)
+
+
+def _tlv(records: "list[tuple[int, bytes]]") -> bytes:
+    out = bytearray()
+    for tlv_type, value in records:
+        if len(value) > 255:
+            raise ValueError(f"TLV value too long ({len(value)} bytes)")
+        out += bytes((tlv_type, len(value))) + value
+    return bytes(out)
+
+
+def _parse_tlv(data: bytes) -> "dict[int, list[bytes]]":
+    records: "dict[int, list[bytes]]" = {}
+    i = 0
+    while i < len(data):
+        if i + 2 > len(data):
+            raise ValueError("truncated TLV record")
+        tlv_type, length = data[i], data[i + 1]
+        value = data[i + 2:i + 2 + length]
+        if len(value) != length:
+            raise ValueError("truncated TLV record")
+        records.setdefault(tlv_type, []).append(value)
+        i += 2 + length
+    return records
+
+
+def _relay_records(relays: "list[str]") -> "list[tuple[int, bytes]]":
+    # A bare str would otherwise be encoded as one relay per character
+    if isinstance(relays, str) or not all(isinstance(relay, str) for relay in relays):
+        raise ValueError(f"relays must be a list of relay urls, not {relays!r}")
+    return [(TLV_RELAY, relay.encode()) for relay in relays]
+
+
+def _kind_record(kind: int) -> "tuple[int, bytes]":
+    if isinstance(kind, bool) or not isinstance(kind, int) or not 0 <= kind < 2 ** 32:
+        raise ValueError(f"kind must be an int from 0 to 2^32 - 1, not {kind!r}")
+    return (TLV_KIND, kind.to_bytes(4, "big"))
+
+
+def encode_npub(public_key: str) -> str:
+    return _encode("npub", _raw_32(public_key, "public_key"))
+
+
+def encode_nsec(private_key: str) -> str:
+    return _encode("nsec", _raw_32(private_key, "private_key"))
+
+
+def encode_note(event_id: str) -> str:
+    return _encode("note", _raw_32(event_id, "event_id"))
+
+
+def encode_nprofile(public_key: str, relays: "list[str]" = ()) -> str:
+    return _encode("nprofile", _tlv([(TLV_SPECIAL, _raw_32(public_key, "public_key"))] + _relay_records(relays)))
+
+
+def encode_nevent(event_id: str, relays: "list[str]" = (), author: str = None, kind: int = None) -> str:
+    records = [(TLV_SPECIAL, _raw_32(event_id, "event_id"))] + _relay_records(relays)
+    if author is not None:
+        records.append((TLV_AUTHOR, _raw_32(author, "author")))
+    if kind is not None:
+        records.append(_kind_record(kind))
+    return _encode("nevent", _tlv(records))
+
+
+def encode_naddr(identifier: str, public_key: str, kind: int, relays: "list[str]" = ()) -> str:
+    records = [(TLV_SPECIAL, identifier.encode())] + _relay_records(relays)
+    records.append((TLV_AUTHOR, _raw_32(public_key, "public_key")))
+    records.append(_kind_record(kind))
+    return _encode("naddr", _tlv(records))
+
+
+def encode_nrelay(relay: str) -> str:
+    """ Deprecated by NIP-19 but still seen in the wild """
+    return _encode("nrelay", _tlv([(TLV_SPECIAL, relay.encode())]))
+
+
+def _single_32(records: "dict[int, list[bytes]]", tlv_type: int, name: str, required: bool = True) -> Optional[str]:
+    values = records.get(tlv_type)
+    if not values:
+        if required:
+            raise ValueError(f"missing {name}")
+        return None
+    if len(values[0]) != 32:
+        raise ValueError(f"{name} must be 32 bytes")
+    return values[0].hex()
+
+
+def _kind(records: "dict[int, list[bytes]]", required: bool) -> Optional[int]:
+    values = records.get(TLV_KIND)
+    if not values:
+        if required:
+            raise ValueError("missing kind")
+        return None
+    if len(values[0]) != 4:
+        raise ValueError("kind must be 4 bytes")
+    return int.from_bytes(values[0], "big")
+
+
+def _relays(records: "dict[int, list[bytes]]") -> "list[str]":
+    return [value.decode() for value in records.get(TLV_RELAY, [])]
+
+
+def decode(entity: str) -> Tuple[str, Union[str, ProfilePointer, EventPointer, AddressPointer]]:
+    """
+        Decodes any NIP-19 entity into (hrp, value). npub, nsec and note give their hex;
+        nprofile, nevent and naddr give a ProfilePointer, EventPointer or AddressPointer;
+        nrelay gives the relay url. Raises ValueError if the string isn't a valid entity.
+    """
+    if entity.startswith("nostr:"):
+        # NIP-21 URI
+        entity = entity[len("nostr:"):]
+    hrp, data, spec = bech32.bech32_decode_bytes(entity, MAX_LENGTH)
+    if hrp is None or spec != bech32.Encoding.BECH32:
+        raise ValueError(f"invalid bech32 entity: {entity[:100]}")
+
+    if hrp in ("npub", "nsec", "note"):
+        if len(data) != 32:
+            raise ValueError(f"{hrp} must encode 32 bytes")
+        return hrp, data.hex()
+
+    try:
+        records = _parse_tlv(data)
+        if hrp == "nprofile":
+            return hrp, ProfilePointer(_single_32(records, TLV_SPECIAL, "public_key"), _relays(records))
+        if hrp == "nevent":
+            return hrp, EventPointer(
+                _single_32(records, TLV_SPECIAL, "event_id"),
+                _relays(records),
+                _single_32(records, TLV_AUTHOR, "author", required=False),
+                _kind(records, required=False),
+            )
+        if hrp == "naddr":
+            if not records.get(TLV_SPECIAL):
+                raise ValueError("missing identifier")
+            return hrp, AddressPointer(
+                records[TLV_SPECIAL][0].decode(),
+                _single_32(records, TLV_AUTHOR, "public_key"),
+                _kind(records, required=True),
+                _relays(records),
+            )
+        if hrp == "nrelay":
+            if not records.get(TLV_SPECIAL):
+                raise ValueError("missing relay")
+            return hrp, records[TLV_SPECIAL][0].decode()
+    except UnicodeDecodeError as e:
+        raise ValueError(f"invalid {hrp}: {e}") from e
+    raise ValueError(f"unknown NIP-19 entity type: {hrp}")
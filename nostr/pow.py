@@ -1,4 +1,10 @@
+import multiprocessing
+import os
 import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from hashlib import sha256
+from threading import Event as CancelEvent
 from .event import Event
 from .key import PrivateKey
 
@@ -25,23 +31,148 @@ def count_leading_zero_bits(hex_str: str) -> int:
 
     return total
 
-def mine_event(content: str, difficulty: int, public_key: str, kind: int, tags: list=[]) -> Event:
-    all_tags = [["nonce", "1", str(difficulty)]]
+
+_NONCE_PLACEHOLDER = "__nonce__"
+
+# How many nonces a worker hashes between checks of its stop event, and how often
+# mine_event_parallel polls `cancel` while waiting on workers
+_STOP_CHECK_INTERVAL = 10_000
+_CANCEL_POLL_INTERVAL = 0.05
+
+_stop_event = None  # set in mine_event_parallel's pool workers by _init_worker
+
+
+@dataclass
+class PowResult:
+    event: Event    # None if mining was cancelled or timed out before a match was found
+    attempts: int
+    elapsed: float
+
+    @property
+    def hash_rate(self) -> float:
+        """ Attempts per second """
+        return self.attempts / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _split_serialized_event(public_key: str, created_at: int, kind: int, tags: list, content: str) -> "tuple[bytes, bytes]":
+    """
+        Serializes the event with a placeholder nonce (which must be in the first tag) and
+        returns the bytes before and after it. The pubkey, created_at and kind can't contain
+        the placeholder so its first occurrence is always the nonce tag.
+    """
+    serialized = Event.serialize(public_key, created_at, kind, tags, content)
+    prefix, suffix = serialized.split(_NONCE_PLACEHOLDER.encode(), 1)
+    return prefix, suffix
+
+def _target(difficulty: int) -> bytes:
+    """ A digest has at least `difficulty` leading zero bits iff it sorts below this value """
+    if difficulty < 0 or difficulty > 256:
+        raise ValueError("difficulty must be between 0 and 256")
+    if difficulty == 0:
+        return b"\xff" * 33  # longer than any digest so everything sorts below it
+    return (1 << (256 - difficulty)).to_bytes(32, "big")
+
+def _init_worker(stop_event) -> None:
+    global _stop_event
+    _stop_event = stop_event
+
+def _mine_nonce_range(prefix: bytes, suffix: bytes, target: bytes, start: int, stop: int) -> "tuple[int, int]":
+    """
+        Returns (nonce, attempts) for the first matching nonce in [start, stop), or (None, attempts).
+        In a pool worker it also gives up early once the pool's stop event is set.
+    """
+    midstate = sha256(prefix)
+    for block_start in range(start, stop, _STOP_CHECK_INTERVAL):
+        if _stop_event is not None and _stop_event.is_set():
+            return None, block_start - start
+        for nonce in range(block_start, min(block_start + _STOP_CHECK_INTERVAL, stop)):
+            h = midstate.copy()
+            h.update(str(nonce).encode())
+            h.update(suffix)
+            if h.digest() < target:
+                return nonce, nonce - start + 1
+    return None, stop - start
+
+def _build_tags(nonce: int, difficulty: int, tags: list) -> list:
+    all_tags = [["nonce", str(nonce), str(difficulty)]]
     all_tags.extend(tags)
+    return all_tags
 
+def mine_event(content: str, difficulty: int, public_key: str, kind: int, tags: list=[]) -> Event:
     created_at = int(time.time())
-    event_id = Event.compute_id(public_key, created_at, kind, all_tags, content)
-    num_leading_zero_bits = count_leading_zero_bits(event_id)
+    prefix, suffix = _split_serialized_event(public_key, created_at, kind, _build_tags(_NONCE_PLACEHOLDER, difficulty, tags), content)
+    target = _target(difficulty)
 
-    attempts = 1
-    while num_leading_zero_bits < difficulty:
-        attempts += 1
-        all_tags[0][1] = str(attempts)
-        created_at = int(time.time())
-        event_id = Event.compute_id(public_key, created_at, kind, all_tags, content)
-        num_leading_zero_bits = count_leading_zero_bits(event_id)
+    start = 1
+    nonce = None
+    while nonce is None:
+        nonce, attempts = _mine_nonce_range(prefix, suffix, target, start, start + 100_000)
+        start += attempts
+
+    return Event(content=content, public_key=public_key, created_at=created_at, kind=kind, tags=_build_tags(nonce, difficulty, tags))
+
+def mine_event_parallel(
+        content: str,
+        difficulty: int,
+        public_key: str,
+        kind: int,
+        tags: list=[],
+        num_workers: int = None,
+        timeout: float = None,
+        cancel: CancelEvent = None,
+        chunk_size: int = 100_000) -> PowResult:
+    """
+        NIP-13 proof-of-work across a process pool.
+
+        Workers search disjoint chunks of `chunk_size` nonces, hashing only the nonce and
+        the serialized bytes after it on top of a precomputed sha256 midstate. Mining stops
+        once a match is found, `timeout` seconds have elapsed or `cancel` is set; workers
+        then abandon their chunks within `_STOP_CHECK_INTERVAL` nonces.
+    """
+    created_at = int(time.time())
+    prefix, suffix = _split_serialized_event(public_key, created_at, kind, _build_tags(_NONCE_PLACEHOLDER, difficulty, tags), content)
+    target = _target(difficulty)
+    num_workers = num_workers or os.cpu_count() or 1
+
+    started = time.monotonic()
+    deadline = started + timeout if timeout is not None else None
+    next_start = 1
+    attempts = 0
+    nonce = None
+
+    stop_event = multiprocessing.Event()
+    executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=(stop_event,))
+    try:
+        pending = set()
+        for _ in range(num_workers):
+            pending.add(executor.submit(_mine_nonce_range, prefix, suffix, target, next_start, next_start + chunk_size))
+            next_start += chunk_size
+
+        while pending:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            if cancel is not None:
+                remaining = min(remaining, _CANCEL_POLL_INTERVAL) if remaining is not None else _CANCEL_POLL_INTERVAL
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, chunk_attempts = future.result()
+                attempts += chunk_attempts
+                if found is not None and (nonce is None or found < nonce):
+                    nonce = found
+            if nonce is not None or (cancel is not None and cancel.is_set()):
+                break
+            for _ in done:
+                pending.add(executor.submit(_mine_nonce_range, prefix, suffix, target, next_start, next_start + chunk_size))
+                next_start += chunk_size
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    return Event(public_key, content, created_at, kind, all_tags, event_id)
+    event = None
+    if nonce is not None:
+        event = Event(content=content, public_key=public_key, created_at=created_at, kind=kind, tags=_build_tags(nonce, difficulty, tags))
+    return PowResult(event, attempts, time.monotonic() - started)
 
 def mine_key(difficulty: int) -> PrivateKey:
     sk = PrivateKey()
@@ -0,0 +1,113 @@
+import time
+from dataclasses import dataclass
+from threading import Condition
+from typing import Iterable
+
+from .message_pool import MessagePool, OkMessage
+
+
+
+@dataclass
+class RelayAck:
+    url: str
+    accepted: bool
+    message: str
+    latency: float  # seconds from publishing to the relay's OK
+
+
+
+class PublishResult:
+    """
+    Tracks the NIP-20 `OK` responses to one published Event.
+
+    Returned by `RelayManager.publish_event`. The publish succeeds once `quorum` relays
+    have accepted the Event; `wait` blocks until that happens, until it can no longer
+    happen (too many relays rejected it), or until the timeout. OKs are collected in
+    `acks` as they arrive, including any that arrive after `wait` returned, until
+    every relay has answered, `wait` times out, `close` is called, or `ack_window`
+    seconds have passed (so a relay that never answers doesn't leak the listener).
+    Relays that hadn't answered by then are listed in `timed_out`.
+    """
+    def __init__(
+            self,
+            event_id: str,
+            urls: Iterable[str],
+            message_pool: MessagePool,
+            quorum: int = 1,
+            timeout: float = None,
+            ack_window: float = 60.0) -> None:
+        self.event_id = event_id
+        self.urls: "list[str]" = list(urls)
+        self.quorum = quorum if quorum is not None else len(self.urls)
+        self.timeout = timeout
+        self.ack_window = ack_window
+        self.acks: dict[str, RelayAck] = {}
+        self._message_pool = message_pool
+        self._cond: Condition = Condition()
+        self._started: float = time.perf_counter()
+        self._closed: bool = False
+        if self.urls:
+            message_pool.add_ok_listener(event_id, self._on_ok, expires_after=max(ack_window, timeout or 0))
+
+    def _on_ok(self, ok: OkMessage) -> None:
+        with self._cond:
+            if self._closed or ok.url not in self.urls or ok.url in self.acks:
+                return
+            self.acks[ok.url] = RelayAck(ok.url, ok.accepted, ok.message, time.perf_counter() - self._started)
+            finished = len(self.acks) == len(self.urls)
+            self._cond.notify_all()
+        if finished:
+            self.close()
+
+    @property
+    def accepted(self) -> "list[str]":
+        return [url for url, ack in self.acks.items() if ack.accepted]
+
+    @property
+    def rejected(self) -> "list[str]":
+        return [url for url, ack in self.acks.items() if not ack.accepted]
+
+    @property
+    def pending(self) -> "list[str]":
+        return [url for url in self.urls if url not in self.acks]
+
+    @property
+    def timed_out(self) -> "list[str]":
+        """ Relays that hadn't answered when collection stopped """
+        with self._cond:
+            return self.pending if self._closed else []
+
+    @property
+    def succeeded(self) -> bool:
+        return len(self.accepted) >= self.quorum
+
+    def done(self) -> bool:
+        """ True once the outcome is known: quorum reached, no longer reachable, or collection stopped """
+        with self._cond:
+            return self._done()
+
+    def _done(self) -> bool:
+        return self._closed or self.succeeded or len(self.accepted) + len(self.pending) < self.quorum
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+            Blocks until `done` or `timeout` (default: the one given at publish, or else
+            what's left of `ack_window`) and returns `succeeded`. Stops collecting OKs if
+            it times out.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            timeout = max(0.0, self._started + self.ack_window - time.perf_counter())
+        with self._cond:
+            done = self._cond.wait_for(self._done, timeout)
+            succeeded = self.succeeded
+        if not done:
+            self.close()
+        return succeeded
+
+    def close(self) -> None:
+        """ Stops collecting OKs for this Event and wakes any `wait` """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._message_pool.remove_ok_listener(self.event_id, self._on_ok)
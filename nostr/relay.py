@@ -1,14 +1,16 @@
-import json
+import random
 import time
-from dataclasses import dataclass
-from queue import Queue
-from threading import Lock
-from typing import Optional
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from queue import Full
+from threading import Condition, Event, Lock
+from typing import Iterable, Optional
 from websocket import WebSocketApp
-from .event import Event
 from .filter import Filters
 from .message_pool import MessagePool
-from .message_type import RelayMessageType
+from .metrics import RelayMetrics
+from .request import Request
 from .subscription import Subscription
 
 @dataclass
@@ -30,22 +32,167 @@ class RelayProxyConnectionConfig:
 
 
 
+@dataclass
+class ReconnectPolicy:
+    initial_delay: float = 1.0      # seconds before the first reconnect attempt
+    max_delay: float = 60.0
+    multiplier: float = 2.0         # delay growth per consecutive failure
+    jitter: float = 0.5             # each delay is randomly shortened by up to this fraction
+    failure_threshold: int = 0      # consecutive failures that open the circuit (0 = never)
+    open_duration: float = 300.0    # seconds the circuit stays open before a trial attempt
+    min_uptime: float = 10.0        # a connection that drops sooner still counts as a failure
+
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"        # reconnecting with backoff
+    OPEN = "open"            # too many failures; waiting out `open_duration`
+    HALF_OPEN = "half_open"  # trial attempt after the circuit was open
+
+
+
+class ReconnectScheduler:
+    """
+    Decides how long a Relay waits before each reconnect attempt.
+
+    Delays grow exponentially from `initial_delay` up to `max_delay` with random jitter,
+    so clients don't reconnect in lockstep after an outage. After `failure_threshold`
+    consecutive failures the circuit opens and attempts pause for `open_duration`; the
+    next attempt is a trial, and a failed trial opens the circuit again. A connection
+    that stays up for `min_uptime` resets everything, so a relay that accepts and then
+    immediately drops connections still backs off.
+    """
+    def __init__(self, policy: ReconnectPolicy = None, rng: random.Random = None) -> None:
+        self.policy = policy or ReconnectPolicy()
+        self.state: CircuitState = CircuitState.CLOSED
+        self.consecutive_failures: int = 0
+        self._rng = rng or random.Random()
+
+    def record_success(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> float:
+        """ Records a dropped or failed connection and returns the delay before the next attempt """
+        policy = self.policy
+        self.consecutive_failures += 1
+        if self.state == CircuitState.HALF_OPEN or (
+                policy.failure_threshold and self.consecutive_failures >= policy.failure_threshold):
+            self.state = CircuitState.OPEN
+            delay = policy.open_duration
+        else:
+            delay = min(policy.max_delay, policy.initial_delay * policy.multiplier ** (self.consecutive_failures - 1))
+        return delay * (1 - policy.jitter * self._rng.random())
+
+    def before_attempt(self) -> None:
+        if self.state == CircuitState.OPEN:
+            self.state = CircuitState.HALF_OPEN
+
+
+
+class SendQueueOverflowPolicy(Enum):
+    BLOCK = "block"              # publish() waits for space
+    DROP_OLDEST = "drop_oldest"  # discard the oldest queued message to make room
+    DROP_NEWEST = "drop_newest"  # discard the message being published
+    RAISE = "raise"              # publish() raises queue.Full
+
+
+
+class SendQueue:
+    """
+    FIFO of outgoing messages that the Relay's queue worker drains once the connection
+    is ready. Consumers block on a condition rather than polling, failed sends are put
+    back at the front so ordering survives retries, and `maxsize` (0 = unbounded)
+    applies backpressure according to `overflow_policy`.
+    """
+    def __init__(self, maxsize: int = 0, overflow_policy: SendQueueOverflowPolicy = SendQueueOverflowPolicy.BLOCK) -> None:
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.num_dropped: int = 0
+        self._messages: deque = deque()
+        self._ready: bool = False
+        self._cond: Condition = Condition()
+
+    def put(self, message: str) -> None:
+        with self._cond:
+            if self.maxsize and len(self._messages) >= self.maxsize:
+                if self.overflow_policy == SendQueueOverflowPolicy.BLOCK:
+                    self._cond.wait_for(lambda: len(self._messages) < self.maxsize)
+                elif self.overflow_policy == SendQueueOverflowPolicy.DROP_OLDEST:
+                    self._messages.popleft()
+                    self.num_dropped += 1
+                elif self.overflow_policy == SendQueueOverflowPolicy.DROP_NEWEST:
+                    self.num_dropped += 1
+                    return
+                else:
+                    raise Full(f"send queue is full ({self.maxsize} messages)")
+            self._messages.append(message)
+            self._cond.notify_all()
+
+    def get_batch(self, max_batch_size: int = 100) -> "list[str]":
+        """ Blocks until the connection is ready and messages are queued, then takes up to `max_batch_size` """
+        with self._cond:
+            self._cond.wait_for(lambda: self._ready and self._messages)
+            batch = [self._messages.popleft() for _ in range(min(max_batch_size, len(self._messages)))]
+            self._cond.notify_all()
+            return batch
+
+    def requeue(self, messages: "list[str]") -> None:
+        """ Puts unsent messages back at the front, in their original order """
+        with self._cond:
+            self._messages.extendleft(reversed(messages))
+            self._cond.notify_all()
+
+    def set_ready(self, ready: bool) -> None:
+        with self._cond:
+            self._ready = ready
+            self._cond.notify_all()
+
+    def qsize(self) -> int:
+        return len(self._messages)
+
+
+
+def _resubscribe_messages(subscriptions: "Iterable[Subscription]") -> "list[str]":
+    now = int(time.time())
+    messages = []
+    for subscription in subscriptions:
+        filters = subscription.filters
+        if subscription.last_created_at is not None:
+            since = min(subscription.last_created_at, now)
+            filters = Filters([filter.copy() for filter in filters])
+            for filter in filters:
+                if filter.since is None or since > filter.since:
+                    filter.since = since
+        messages.append(Request(subscription.id, filters).to_message())
+    return messages
+
+
+
 @dataclass
 class Relay:
     url: str
     message_pool: MessagePool
-    policy: RelayPolicy = RelayPolicy()
+    policy: RelayPolicy = field(default_factory=RelayPolicy)
     ssl_options: Optional[dict] = None
     proxy_config: RelayProxyConnectionConfig = None
+    max_queue_size: int = 0
+    queue_overflow_policy: SendQueueOverflowPolicy = SendQueueOverflowPolicy.BLOCK
+    reconnect_policy: ReconnectPolicy = field(default_factory=ReconnectPolicy)
 
     def __post_init__(self):
-        self.queue = Queue()
+        self.queue = SendQueue(self.max_queue_size, self.queue_overflow_policy)
+        self.metrics: RelayMetrics = self.message_pool.relay_metrics(self.url)
         self.subscriptions: dict[str, Subscription] = {}
         self.num_sent_events: int = 0
         self.connected: bool = False
         self.reconnect: bool = True
         self.error_counter: int = 0
-        self.error_threshold: int = 0
+        self.error_threshold: int = 0  # if set, stop reconnecting after this many errors
+        self.reconnect_scheduler: ReconnectScheduler = ReconnectScheduler(self.reconnect_policy)
+        self.num_connections: int = 0
+        self._opened_at: float = None
+        self._closing: Event = Event()
         self.lock: Lock = Lock()
         self.ws: WebSocketApp = WebSocketApp(
             self.url,
@@ -56,53 +203,89 @@ class Relay:
         )
 
     def connect(self):
-        self.ws.run_forever(
-            sslopt=self.ssl_options,
-            http_proxy_host=self.proxy_config.host if self.proxy_config is not None else None, 
-            http_proxy_port=self.proxy_config.port if self.proxy_config is not None else None,
-            proxy_type=self.proxy_config.type if self.proxy_config is not None else None,
-        )
+        """
+            Runs the connection until `close` is called, reconnecting whenever it drops
+            (unless `reconnect` is False or `error_threshold` is exceeded) after the delay
+            chosen by `reconnect_scheduler`. Returns straight away if the Relay has been
+            closed; call `reopen` first to connect it again.
+        """
+        while not self._closing.is_set():
+            self.reconnect_scheduler.before_attempt()
+            self.ws.run_forever(
+                sslopt=self.ssl_options,
+                http_proxy_host=self.proxy_config.host if self.proxy_config is not None else None, 
+                http_proxy_port=self.proxy_config.port if self.proxy_config is not None else None,
+                proxy_type=self.proxy_config.type if self.proxy_config is not None else None,
+            )
+            self.connected = False
+            if self._opened_at is not None and time.monotonic() - self._opened_at >= self.reconnect_policy.min_uptime:
+                self.reconnect_scheduler.record_success()
+            self._opened_at = None
+            if not self._should_reconnect():
+                break
+            delay = self.reconnect_scheduler.record_failure()
+            if self._closing.wait(delay):
+                break
+            self.metrics.reconnects += 1
 
     def close(self):
+        self._closing.set()
         self.ws.close()
 
-    def check_reconnect(self):
-        try:
-            self.close()
-        except:
-            pass
-        self.connected = False
-        if self.reconnect:
-            time.sleep(1)
-            self.connect()
+    def reopen(self):
+        """ Lets `connect` run again after `close` """
+        self._closing.clear()
+
+    def _should_reconnect(self) -> bool:
+        if self._closing.is_set() or not self.reconnect:
+            return False
+        return not (self.error_threshold and self.error_counter > self.error_threshold)
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @connected.setter
+    def connected(self, connected: bool):
+        # Wakes the queue worker as soon as the connection opens
+        self._connected = connected
+        self.queue.set_ready(connected)
 
     def publish(self, message: str):
         self.queue.put(message)
-        
+
     def queue_worker(self):
         while True:
-            if self.connected:
-                message = self.queue.get()
+            batch = self.queue.get_batch()
+            for i, message in enumerate(batch):
                 try:
                     self.ws.send(message)
                     self.num_sent_events += 1
+                    self.metrics.on_sent(message)
                 except:
-                    self.queue.put(message)
-            else:
-                time.sleep(0.1)
+                    # Keep the unsent remainder in order and wait for the connection to reopen
+                    self.queue.requeue(batch[i:])
+                    self.connected = False
+                    break
 
     def add_subscription(self, id, filters: Filters):
         with self.lock:
             self.subscriptions[id] = Subscription(id, filters)
+        self.metrics.on_request_sent(id, time.perf_counter())
 
     def close_subscription(self, id: str) -> None:
         with self.lock:
             self.subscriptions.pop(id, None)
+        self.metrics.on_subscription_closed(id)
 
     def update_subscription(self, id: str, filters: Filters) -> None:
         with self.lock:
             subscription = self.subscriptions[id]
             subscription.filters = filters
+            # What was received for the old Filters says nothing about the new ones
+            subscription.last_created_at = None
+            subscription.restart()
+        self.metrics.on_request_sent(id, time.perf_counter())
 
     def to_json_object(self) -> dict:
         return {
@@ -114,57 +297,37 @@ class Relay:
             ],
         }
 
+    def resubscribe_messages(self) -> "list[str]":
+        """
+            REQ messages that restore the active subscriptions after a reconnect. Filters
+            resume from the newest created_at received up to that subscription's EOSE or
+            since (inclusive, as other events may share it; MessagePool drops the repeats).
+            A subscription that was still receiving stored events resumes from where its
+            previous backfill had already completed, as the backfill arrives newest first.
+        """
+        with self.lock:
+            return _resubscribe_messages(self.subscriptions.values())
+
     def _on_open(self, class_obj):
+        self.num_connections += 1
+        if self.num_connections > 1:
+            # Ahead of anything published while disconnected
+            self.queue.requeue(self.resubscribe_messages())
+            with self.lock:
+                for subscription in self.subscriptions.values():
+                    subscription.restart()
+                    self.metrics.on_request_sent(subscription.id, time.perf_counter())
+        self._opened_at = time.monotonic()
         self.connected = True
 
     def _on_close(self, class_obj, status_code, message):
         self.connected = False
 
-    def _on_message(self, class_obj, message: str):
-        self.message_pool.add_message(message, self.url)
-    
+    def _on_message(self, class_obj, message: "str | bytes"):
+        self.metrics.on_received(message)
+        self.message_pool.add_message(message, self.url, self.subscriptions)
+
     def _on_error(self, class_obj, error):
+        # run_forever returns after an error and `connect` decides whether to reconnect
         self.connected = False
         self.error_counter += 1
-        if self.error_threshold and self.error_counter > self.error_threshold:
-            pass
-        else:
-            self.check_reconnect()
-
-    def _is_valid_message(self, message: str) -> bool:
-        message = message.strip("\n")
-        if not message or message[0] != "[" or message[-1] != "]":
-            return False
-
-        message_json = json.loads(message)
-        message_type = message_json[0]
-        if not RelayMessageType.is_valid(message_type):
-            return False
-        if message_type == RelayMessageType.EVENT:
-            if not len(message_json) == 3:
-                return False
-
-            subscription_id = message_json[1]
-            with self.lock:
-                if subscription_id not in self.subscriptions:
-                    return False
-
-            e = message_json[2]
-            event = Event(
-                e["content"],
-                e["pubkey"],
-                e["created_at"],
-                e["kind"],
-                e["tags"],
-                e["sig"],
-            )
-            if not event.verify():
-                return False
-
-            with self.lock:
-                subscription = self.subscriptions[subscription_id]
-
-            if subscription.filters and not subscription.filters.match(event):
-                return False
-
-        return True
@@ -1,14 +1,17 @@
-import json
 import time
 import threading
 from dataclasses import dataclass
 from threading import Lock
 
+from . import codec
 from .event import Event
+from .event_store import EventStore
 from .filter import Filters
 from .message_pool import MessagePool
 from .message_type import ClientMessageType
-from .relay import Relay, RelayPolicy, RelayProxyConnectionConfig
+from .metrics import to_prometheus
+from .publish import PublishResult
+from .relay import Relay, ReconnectPolicy, RelayPolicy, RelayProxyConnectionConfig, SendQueueOverflowPolicy
 from .request import Request
 
 
@@ -20,9 +23,11 @@ class RelayException(Exception):
 
 @dataclass
 class RelayManager:
+    event_store: EventStore = None  # if set, received events are persisted to it
+
     def __post_init__(self):
         self.relays: dict[str, Relay] = {}
-        self.message_pool: MessagePool = MessagePool()
+        self.message_pool: MessagePool = MessagePool(event_store=self.event_store)
         self.lock: Lock = Lock()
 
     def add_relay(
@@ -30,9 +35,15 @@ class RelayManager:
             url: str, 
             policy: RelayPolicy = RelayPolicy(),
             ssl_options: dict = None,
-            proxy_config: RelayProxyConnectionConfig = None):
+            proxy_config: RelayProxyConnectionConfig = None,
+            max_queue_size: int = 0,
+            queue_overflow_policy: SendQueueOverflowPolicy = SendQueueOverflowPolicy.BLOCK,
+            reconnect_policy: ReconnectPolicy = None):
 
-        relay = Relay(url, self.message_pool, policy, ssl_options, proxy_config)
+        relay = Relay(
+            url, self.message_pool, policy, ssl_options, proxy_config, max_queue_size, queue_overflow_policy,
+            reconnect_policy or ReconnectPolicy()
+        )
 
         with self.lock:
             self.relays[url] = relay
@@ -81,7 +92,7 @@ class RelayManager:
             if url in self.relays:
                 relay = self.relays[url]
                 relay.close_subscription(id)
-                relay.publish(json.dumps(["CLOSE", id]))
+                relay.publish(codec.dumps(["CLOSE", id]))
             else:
                 raise RelayException(f"Invalid relay url: no connection to {url}")
 
@@ -89,7 +100,7 @@ class RelayManager:
         with self.lock:
             for relay in self.relays.values():
                 relay.close_subscription(id)
-                relay.publish(json.dumps(["CLOSE", id]))
+                relay.publish(codec.dumps(["CLOSE", id]))
 
     def close_all_relay_connections(self):
         with self.lock:
@@ -97,15 +108,46 @@ class RelayManager:
                 relay = self.relays[url]
                 relay.close()
 
-    def publish_event(self, event: Event):
-        """ Verifies that the Event is publishable before submitting it to relays """
+    def metrics(self) -> dict:
+        """ Per-relay metrics keyed by url, plus the MessagePool's queue depths """
+        relays = self._refresh_metrics()
+        return {
+            "relays": {relay.url: relay.metrics.to_json_object() for relay in relays},
+            "message_pool": self.message_pool.metrics(),
+        }
+
+    def prometheus_metrics(self) -> str:
+        """ The same metrics in the Prometheus text exposition format """
+        relays = self._refresh_metrics()
+        return to_prometheus([relay.metrics for relay in relays], self.message_pool.metrics())
+
+    def _refresh_metrics(self) -> "list[Relay]":
+        with self.lock:
+            relays = list(self.relays.values())
+        for relay in relays:
+            relay.metrics.send_queue_depth = relay.queue.qsize()
+        return relays
+
+    def publish_event(self, event: Event, quorum: int = 1, timeout: float = None) -> PublishResult:
+        """
+            Verifies that the Event is publishable before submitting it to relays.
+
+            The message is serialized once and handed to every write relay's send queue,
+            so a slow relay doesn't hold up the others. The returned PublishResult collects
+            each relay's OK; `result.wait()` blocks until `quorum` relays have accepted the
+            Event (None: all of them) or `timeout` seconds have passed.
+        """
         if event.signature is None:
             raise RelayException(f"Could not publish {event.id}: must be signed")
 
         if not event.verify():
             raise RelayException(f"Could not publish {event.id}: failed to verify signature {event.signature}")
 
+        message = event.to_message()
         with self.lock:
-            for relay in self.relays.values():
-                if relay.policy.should_write:
-                    relay.publish(event.to_message())
+            relays = [relay for relay in self.relays.values() if relay.policy.should_write]
+
+        result = PublishResult(event.id, [relay.url for relay in relays], self.message_pool, quorum, timeout)
+        for relay in relays:
+            relay.publish(message)
+        return result
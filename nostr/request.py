@@ -1,6 +1,6 @@
-import json
 from dataclasses import dataclass
 
+from . import codec
 from .filter import Filters
 from .message_type import ClientMessageType
 
@@ -12,4 +12,4 @@ class Request:
     def to_message(self) -> str:
         message = [ClientMessageType.REQUEST, self.subscription_id]
         message.extend(self.filters.to_json_array())
-        return json.dumps(message)
+        return codec.dumps(message)
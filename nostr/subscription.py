@@ -1,12 +1,134 @@
-from .filter import Filters
+from collections import defaultdict
+from .event import Event
+from .filter import Filter, Filters
 
 class Subscription:
     def __init__(self, id: str, filters: Filters=None) -> None:
         self.id = id
         self.filters = filters
+        self.last_created_at: int = None  # newest created_at known to be complete, to resume from after a reconnect
+        self.eose_received: bool = False
+        # Stored events arrive newest first, so until EOSE the newest one says nothing
+        # about what's still to come; it only becomes the resume point at EOSE
+        self._backfill_created_at: int = None
+
+    def on_event(self, created_at: int) -> None:
+        """ Records an event received for this subscription """
+        if self.eose_received:
+            if self.last_created_at is None or created_at > self.last_created_at:
+                self.last_created_at = created_at
+        elif self._backfill_created_at is None or created_at > self._backfill_created_at:
+            self._backfill_created_at = created_at
+
+    def on_eose(self) -> None:
+        """ Records the end of stored events, after which `last_created_at` can resume from the backfill """
+        self.eose_received = True
+        if self._backfill_created_at is not None:
+            if self.last_created_at is None or self._backfill_created_at > self.last_created_at:
+                self.last_created_at = self._backfill_created_at
+            self._backfill_created_at = None
+
+    def restart(self) -> None:
+        """ The REQ is being sent again; events until the next EOSE are a new backfill """
+        self.eose_received = False
+        self._backfill_created_at = None
 
     def to_json_object(self):
         return { 
             "id": self.id, 
             "filters": self.filters.to_json_array() 
         }
+
+
+class SubscriptionRouter:
+    """
+    Inverted index from Event attributes to the subscriptions whose Filters could match.
+
+    Each Filter is posted under its most selective constraint (ids, then authors, then
+    tag values, then kinds; unconstrained Filters go on a wildcard list). Routing an
+    Event looks up its id, pubkey, kind and tag values, then confirms each candidate
+    with `Filter.matches` (which also applies since/until), so results are always
+    consistent with it.
+
+    Filters are indexed when added; to change a subscription's Filters, add it again
+    with the new ones.
+    """
+    def __init__(self) -> None:
+        self._filters: dict[int, "tuple[str, Filter]"] = {}
+        self._handles_by_subscription: dict[str, "list[int]"] = {}
+        self._postings: dict[int, "tuple[dict, list]"] = {}
+        self._by_id: dict[str, set] = defaultdict(set)
+        self._by_author: dict[str, set] = defaultdict(set)
+        self._by_tag: dict["tuple[str, str]", set] = defaultdict(set)
+        self._by_kind: dict[int, set] = defaultdict(set)
+        self._wildcard: set = set()
+        self._next_handle = 0
+
+    def add_subscription(self, id: str, filters: Filters) -> None:
+        self.remove_subscription(id)
+        handles = []
+        for filter in filters:
+            handle = self._next_handle
+            self._next_handle += 1
+            self._filters[handle] = (id, filter)
+            self._post(handle, filter)
+            handles.append(handle)
+        self._handles_by_subscription[id] = handles
+
+    def remove_subscription(self, id: str) -> None:
+        for handle in self._handles_by_subscription.pop(id, []):
+            del self._filters[handle]
+            index, keys = self._postings.pop(handle)
+            for key in keys:
+                index[key].discard(handle)
+                if not index[key]:
+                    del index[key]
+            self._wildcard.discard(handle)
+
+    def _post(self, handle: int, filter: Filter) -> None:
+        if filter.event_ids is not None:
+            index, keys = self._by_id, list(filter.event_ids)
+        elif filter.authors is not None:
+            index, keys = self._by_author, list(filter.authors)
+        elif filter.tags:
+            # Any one tag constraint must be met, so post under the one with the fewest values
+            f_tag, f_tag_values = min(filter.tags.items(), key=lambda item: len(item[1]))
+            f_tag = f_tag.replace("#", "")
+            index, keys = self._by_tag, [(f_tag, value) for value in f_tag_values]
+        elif filter.kinds is not None:
+            index, keys = self._by_kind, list(filter.kinds)
+        else:
+            self._wildcard.add(handle)
+            self._postings[handle] = ({}, [])
+            return
+
+        for key in keys:
+            index[key].add(handle)
+        self._postings[handle] = (index, keys)
+
+    def route(self, event: Event) -> "set[str]":
+        """ Returns the ids of all subscriptions with a Filter that matches the Event """
+        candidates = set(self._wildcard)
+        if self._by_id:
+            candidates.update(self._by_id.get(event.id, ()))
+        if self._by_author:
+            candidates.update(self._by_author.get(event.public_key, ()))
+        if self._by_kind:
+            candidates.update(self._by_kind.get(event.kind, ()))
+        if self._by_tag:
+            for e_tag in event.tags:
+                if len(e_tag) > 1:
+                    candidates.update(self._by_tag.get((e_tag[0], e_tag[1]), ()))
+
+        matched = set()
+        for handle in candidates:
+            subscription_id, filter = self._filters[handle]
+            if subscription_id not in matched and filter.matches(event):
+                matched.add(subscription_id)
+        return matched
+
+    def __len__(self) -> int:
+        return len(self._handles_by_subscription)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._handles_by_subscription
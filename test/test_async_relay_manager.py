@@ -0,0 +1,218 @@
+import asyncio
+import json
+import pytest
+
+websockets = pytest.importorskip("websockets")
+
+from nostr.async_relay_manager import AsyncRelayManager
+from nostr.event import Event
+from nostr.filter import Filter, Filters
+from nostr.key import PrivateKey
+from nostr.relay import ReconnectPolicy
+from nostr.relay_manager import RelayException
+
+
+class LocalRelay:
+    """ Minimal in-process relay: stores published events and replays them on REQ """
+    def __init__(self) -> None:
+        self.events = []
+
+    async def handler(self, ws):
+        async for message in ws:
+            message = json.loads(message)
+            if message[0] == "EVENT":
+                self.events.append(message[1])
+            elif message[0] == "REQ":
+                for e in self.events:
+                    await ws.send(json.dumps(["EVENT", message[1], e]))
+                await ws.send(json.dumps(["EOSE", message[1]]))
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, timeout=10))
+
+
+def test_publish_and_subscribe_across_relays():
+    """ events published to several relays should be delivered once, with one EOSE per relay """
+    pk = PrivateKey()
+    events = []
+    for i in range(3):
+        event = Event(content=f"event {i}")
+        pk.sign_event(event)
+        events.append(event)
+
+    async def scenario():
+        local_relay = LocalRelay()
+        async with websockets.serve(local_relay.handler, "localhost", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            urls = [f"ws://localhost:{port}/{i}" for i in range(5)]
+
+            relay_manager = AsyncRelayManager()
+            for url in urls:
+                relay_manager.add_relay(url)
+            assert await relay_manager.open_connections() == {}
+
+            for event in events:
+                await relay_manager.publish_event(event)
+
+            await relay_manager.add_subscription_on_all_relays("sub", Filters([Filter(authors=[pk.public_key.hex()])]))
+
+            eose_urls = set()
+            async for eose in relay_manager.message_pool.iter_eose_notices():
+                eose_urls.add(eose.url)
+                if len(eose_urls) == len(urls):
+                    break
+
+            received = []
+            while relay_manager.message_pool.has_events():
+                received.append(await relay_manager.message_pool.get_event())
+
+            await relay_manager.close_connections()
+            return eose_urls, received, urls
+
+    eose_urls, received, urls = run(scenario())
+    assert eose_urls == set(urls)
+    assert sorted(e.event.id for e in received) == sorted(e.id for e in events)
+
+
+def test_open_connections_reports_failures():
+    """ relays that can't be reached should be reported without blocking the others """
+    async def scenario():
+        relay_manager = AsyncRelayManager()
+        relay_manager.add_relay("ws://localhost:1")
+        failures = await relay_manager.open_connections(timeout=1)
+        return relay_manager, failures
+
+    relay_manager, failures = run(scenario())
+    assert list(failures) == ["ws://localhost:1"]
+    assert relay_manager.relays["ws://localhost:1"].connected is False
+
+
+def test_publish_unsigned_event_raises():
+    """ publish_event should refuse unsigned Events """
+    relay_manager = AsyncRelayManager()
+    with pytest.raises(RelayException):
+        run(relay_manager.publish_event(Event(content="unsigned")))
+
+
+def test_reconnects_after_clean_close():
+    """ a relay closed cleanly by the server should reconnect and re-send its subscriptions """
+    requests = []
+
+    async def handler(ws):
+        async for message in ws:
+            message = json.loads(message)
+            if message[0] == "REQ":
+                requests.append(message[1])
+                await ws.send(json.dumps(["EOSE", message[1]]))
+                if len(requests) == 1:
+                    await ws.close()
+
+    async def scenario():
+        async with websockets.serve(handler, "localhost", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            relay_manager = AsyncRelayManager()
+            relay = relay_manager.add_relay(
+                f"ws://localhost:{port}",
+                reconnect_policy=ReconnectPolicy(initial_delay=0.01, jitter=0)
+            )
+            assert await relay_manager.open_connections() == {}
+            await relay_manager.add_subscription_on_all_relays("sub", Filters([Filter(kinds=[1])]))
+
+            await relay_manager.message_pool.get_eose_notice()
+            await relay_manager.message_pool.get_eose_notice()
+            num_connections = relay.num_connections
+            await relay_manager.close_connections()
+            return num_connections, relay
+
+    num_connections, relay = run(scenario())
+    assert requests == ["sub", "sub"]
+    assert num_connections == 2
+    assert relay.connected is False and relay.error_counter == 0
+
+
+def test_async_relay_metrics():
+    """ AsyncRelay should record traffic and REQ -> EOSE latency like Relay """
+    pk = PrivateKey()
+    event = Event(content="metrics")
+    pk.sign_event(event)
+
+    async def scenario():
+        local_relay = LocalRelay()
+        async with websockets.serve(local_relay.handler, "localhost", 0) as server:
+            url = f"ws://localhost:{server.sockets[0].getsockname()[1]}"
+            relay_manager = AsyncRelayManager()
+            relay_manager.add_relay(url)
+            assert await relay_manager.open_connections() == {}
+            await relay_manager.publish_event(event)
+            await relay_manager.add_subscription_on_all_relays("sub", Filters([Filter(authors=[pk.public_key.hex()])]))
+            await relay_manager.message_pool.get_eose_notice()
+            await relay_manager.close_connections()
+            return relay_manager, url
+
+    relay_manager, url = run(scenario())
+    metrics = relay_manager.metrics()["relays"][url]
+    assert metrics["messages_sent"] == 2 and metrics["messages_received"] == 2
+    assert metrics["events_received"] == 1
+    assert metrics["req_to_eose_seconds"]["count"] == 1
+    assert f'nostr_relay_messages_sent_total{{relay="{url}"}} 2' in relay_manager.prometheus_metrics().splitlines()
+
+
+def test_resubscribe_replaces_queued_requests():
+    """ a REQ queued while disconnected should be sent once on reconnect, with any updated filters and no stale since """
+    requests = []
+
+    async def handler(ws):
+        async for message in ws:
+            message = json.loads(message)
+            if message[0] == "REQ":
+                requests.append(message[1:])
+                await ws.send(json.dumps(["EOSE", message[1]]))
+                if len(requests) == 1:
+                    await ws.close()
+
+    async def scenario():
+        async with websockets.serve(handler, "localhost", 0) as server:
+            url = f"ws://localhost:{server.sockets[0].getsockname()[1]}"
+            relay_manager = AsyncRelayManager()
+            relay = relay_manager.add_relay(url, reconnect_policy=ReconnectPolicy(initial_delay=0.3, jitter=0))
+            assert await relay_manager.open_connections() == {}
+            await relay_manager.add_subscription_on_relay(url, "sub", Filters([Filter(kinds=[1])]))
+            await relay_manager.message_pool.get_eose_notice()
+            while relay.connected:
+                await asyncio.sleep(0.01)
+
+            # Both happen while the relay is waiting to reconnect
+            relay.subscriptions["sub"].last_created_at = 1_000
+            relay.update_subscription("sub", Filters([Filter(kinds=[7])]))
+            await relay_manager.add_subscription_on_relay(url, "sub2", Filters([Filter(kinds=[1])]))
+            assert [subscription_id for _, subscription_id in relay._pending] == ["sub2"]
+
+            await relay_manager.message_pool.get_eose_notice()
+            await relay_manager.message_pool.get_eose_notice()
+            await relay_manager.close_connections()
+            return relay
+
+    relay = run(scenario())
+    assert requests == [["sub", {"kinds": [1]}], ["sub", {"kinds": [7]}], ["sub2", {"kinds": [1]}]]
+    assert relay.metrics.req_to_eose_seconds.count == 3
+
+
+def test_publish_requeues_when_connection_closed():
+    """ a message whose send fails because the connection closed should be kept for the reconnect """
+    class ClosedWebSocket:
+        async def send(self, message):
+            raise websockets.ConnectionClosed(None, None)
+
+    async def scenario():
+        relay = AsyncRelayManager().add_relay("ws://localhost")
+        relay.ws = ClosedWebSocket()
+        relay.connected = True
+        await relay.publish("first")
+        await relay.publish("second")
+        return relay
+
+    relay = run(scenario())
+    assert relay.connected is False
+    assert relay._pending == [("first", None), ("second", None)]
+    assert relay.metrics.messages_sent == 0
@@ -0,0 +1,61 @@
+import random
+
+from nostr import bech32
+from nostr.key import PrivateKey, PublicKey
+
+
+
+class TestBytesCodec:
+    def setup_class(self):
+        self.rng = random.Random(1)
+
+
+    def test_encode_matches_reference(self):
+        """ bech32_encode_bytes should produce exactly the reference encoding for any length, HRP and spec """
+        for n in range(0, 48):  # stays under the 90 character limit
+            data = self.rng.randbytes(n)
+            for hrp in ("npub", "nsec", "note", "bc"):
+                for spec in bech32.Encoding:
+                    expected = bech32.bech32_encode(hrp, bech32.convertbits(data, 8, 5), spec)
+                    encoded = bech32.bech32_encode_bytes(hrp, data, spec)
+                    assert encoded == expected
+                    assert bech32.bech32_decode_bytes(encoded) == (hrp, data, spec)
+                    assert bech32.bech32_decode_bytes(encoded.upper()) == (hrp, data, spec)
+
+
+    def test_decode_rejects_what_reference_rejects(self):
+        """ bech32_decode_bytes should reject every corrupted string the reference decoder rejects """
+        for _ in range(2_000):
+            chars = list(bech32.bech32_encode_bytes("npub", self.rng.randbytes(32)))
+            chars[self.rng.randrange(len(chars))] = self.rng.choice(bech32.CHARSET + "1QB!é ")
+            corrupted = "".join(chars)
+            hrp, data, spec = bech32.bech32_decode(corrupted)
+            if hrp is None:
+                assert bech32.bech32_decode_bytes(corrupted) == (None, None, None)
+            else:
+                assert bech32.bech32_decode_bytes(corrupted) == (hrp, bytes(bech32.convertbits(data, 5, 8, False)), spec)
+
+        # Data that doesn't convert to whole bytes
+        assert bech32.bech32_decode_bytes(bech32.bech32_encode("npub", [1], bech32.Encoding.BECH32)) == (None, None, None)
+        assert bech32.bech32_decode_bytes(bech32.bech32_encode("npub", [0, 1], bech32.Encoding.BECH32)) == (None, None, None)
+
+
+    def test_untrusted_hrps_not_cached(self):
+        """ decoding strings with arbitrary HRPs shouldn't grow any per-HRP state """
+        cached = dict(bech32._HRP_STATES)
+        for i in range(200):
+            hrp = "h" + "".join(self.rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(self.rng.randrange(1, 200)))
+            encoded = bech32.bech32_encode_bytes(hrp, self.rng.randbytes(32))
+            assert bech32.bech32_decode_bytes(encoded, max_length=1000)[0] == hrp
+        assert bech32._HRP_STATES == cached
+
+
+    def test_known_keys(self):
+        """ should round-trip a known npub and nsec """
+        npub = "npub180cvv07tjdrrgpa0j7j7tmnyl2yr6yr7l8j4s3evf6u64th6gkwsyjh6w6"
+        pubkey = PublicKey.from_npub(npub)
+        assert pubkey.hex() == "3bf0c63fcb93463407af97a5e5ee64fa883d107ef9e558472c4eb9aaaefa459d"
+        assert pubkey.bech32() == npub
+
+        pk = PrivateKey()
+        assert PrivateKey.from_nsec(pk.bech32()) == pk
@@ -0,0 +1,46 @@
+import json
+import pytest
+from nostr import codec
+from nostr.event import Event
+
+
+TRICKY_CONTENT = "".join(chr(i) for i in range(0x00, 0x300)) + "  ﻿😀 \"quoted\" back\\slash /slash"
+
+
+@pytest.fixture(params=codec.available_backends())
+def backend(request):
+    previous = codec.get_backend()
+    codec.set_backend(request.param)
+    yield request.param
+    codec.set_backend(previous)
+
+
+def test_canonical_serialization(backend):
+    """ every backend should produce the stdlib's NIP-01 canonical serialization byte for byte """
+    data = [0, "ab" * 32, 1673361254, 1, [["e", "cd" * 32], ["t", TRICKY_CONTENT]], TRICKY_CONTENT]
+    assert codec.dumps_bytes(data) == json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def test_known_event_id(backend):
+    """ a real-world note should hash to its published id whichever backend is active """
+    event = Event(
+        content="hello",
+        public_key="3bf0c63fcb93463407af97a5e5ee64fa883d107ef9e558472c4eb9aaaefa459d",
+        created_at=1673361254,
+        kind=1,
+    )
+    assert event.id == "deb8b23368b6c658c36cf16396927a045dee0b7707b4133d714fb67264cc10cc"
+
+
+def test_falls_back_to_stdlib(backend):
+    """ values a fast backend rejects should still round trip like the stdlib """
+    big = [2 ** 70]
+    assert codec.dumps_bytes(big) == json.dumps(big).encode()
+
+    lone_surrogate = '["\\ud800"]'
+    assert codec.loads(lone_surrogate) == json.loads(lone_surrogate)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        codec.set_backend("not-a-backend")
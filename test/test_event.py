@@ -2,7 +2,8 @@ import pytest
 import time
 
 from nostr import bech32
-from nostr.event import Event, EncryptedDirectMessage
+from nostr.event import CompactEvent, Event, EncryptedDirectMessage, verify_events
+from nostr.filter import Filter
 from nostr.key import PrivateKey
 
 
@@ -36,7 +37,49 @@ class TestEvent:
 
         # Recomputed id should now be different
         assert event.id != event_id
-    
+
+
+    def test_event_id_recomputes_after_tag_refs(self):
+        """ should recompute the cached Event.id after in-place tag edits via add_*_ref """
+        event = Event(content="some event")
+        event_id = event.id
+
+        event.add_pubkey_ref("some_pubkey")
+        assert event.id != event_id
+
+        event_id = event.id
+        event.add_event_ref("some_event_id")
+        assert event.id != event_id
+        assert event.id == Event.compute_id(event.public_key, event.created_at, event.kind, event.tags, event.content)
+
+
+    def test_from_json_object_keeps_supplied_id(self):
+        """ should keep the wire-supplied id and only check it when asked to """
+        pk = PrivateKey()
+        event = Event(content="some event")
+        pk.sign_event(event)
+        e = {
+            "id": event.id,
+            "pubkey": event.public_key,
+            "created_at": event.created_at,
+            "kind": event.kind,
+            "tags": event.tags,
+            "content": event.content,
+            "sig": event.signature,
+        }
+        assert Event.from_json_object(e).verify()
+
+        # A forged id is kept as-is but fails verification
+        e["id"] = "0" * 64
+        forged = Event.from_json_object(e)
+        assert forged.id == "0" * 64
+        assert forged.verify_id() is False
+        assert forged.verify() is False
+
+        # Editing a field discards the supplied id
+        forged.content = "edited"
+        assert forged.id != "0" * 64
+
 
     def test_note_id_bech32_conversion(self):
         """ should convert the event id to its `note`-prepended bech32 form """
@@ -131,3 +174,69 @@ class TestEncryptedDirectMessage:
         # But once we encrypt it, we can request its id
         self.sender_pk.encrypt_dm(dm)
         assert dm.id is not None
+
+
+
+class TestVerifyEvents:
+    def setup_class(self):
+        self.pks = [PrivateKey() for _ in range(3)]
+
+
+    def test_verify_events_matches_verify(self):
+        """ verify_events should give the same result as Event.verify for every Event """
+        events = []
+        for i in range(100):
+            event = Event(content=f"event {i}")
+            self.pks[i % len(self.pks)].sign_event(event)
+            events.append(event)
+
+        # Tamper with a few: bad signature, edited content, unparseable pubkey
+        events[3].signature = events[4].signature
+        events[10].content = "edited after signing"
+        events[20] = Event(content="bad pubkey", public_key="00" * 32, signature="00" * 64)
+
+        expected = [event.verify() if event.public_key != "00" * 32 else False for event in events]
+        assert expected.count(False) == 3
+
+        # Serial and threaded paths should agree
+        assert verify_events(events, min_batch_size=len(events) + 1) == expected
+        assert verify_events(events, max_workers=4, min_batch_size=1) == expected
+
+
+
+class TestCompactEvent:
+    def test_roundtrip(self):
+        """ converting to a CompactEvent and back should be lossless """
+        pk = PrivateKey()
+        event = Event(content="hello", tags=[['e', "ab" * 32], ['t', "nostr"], ['client', "test", "extra"]])
+        pk.sign_event(event)
+
+        compact = CompactEvent.from_event(event)
+        assert isinstance(compact._id, bytes) and isinstance(compact._public_key, bytes) and isinstance(compact._signature, bytes)
+        assert compact.id == event.id
+        assert compact.public_key == event.public_key
+        assert compact.signature == event.signature
+
+        restored = compact.to_event()
+        assert restored == event
+        assert restored.id == event.id
+        assert restored.verify()
+
+
+    def test_non_hex_fields_kept(self):
+        """ fields that aren't canonical hex should survive the round trip unchanged """
+        event = Event(content="hello", public_key="ABCD" * 16, tags=[['p', "not hex"]])
+        compact = CompactEvent.from_event(event)
+        assert compact.public_key == "ABCD" * 16
+        assert compact.signature is None
+        assert compact.to_event() == event
+
+
+    def test_filter_matches_compact_event(self):
+        """ Filters should give the same result for a CompactEvent as for its Event """
+        event = Event(content="hello", public_key="ab" * 32, tags=[['t', "nostr"]])
+        compact = CompactEvent.from_event(event)
+        tagged = Filter(kinds=[event.kind], authors=["ab" * 32])
+        tagged.add_arbitrary_tag('t', ["nostr"])
+        for filter in [tagged, Filter(event_ids=[event.id]), Filter(pubkey_refs=["cd" * 32])]:
+            assert filter.matches(compact) == filter.matches(event)
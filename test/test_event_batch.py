@@ -0,0 +1,81 @@
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from nostr.event import Event, EventKind
+from nostr.event_batch import EventBatch
+from nostr.filter import Filter, Filters
+from nostr.key import PrivateKey
+
+
+
+class TestEventBatch:
+    def setup_class(self):
+        rng = random.Random(2)
+        self.pubkeys = [PrivateKey().public_key.hex() for _ in range(6)]
+        self.events = []
+        for i in range(300):
+            tags = []
+            if self.events and rng.random() < 0.5:
+                tags.append(['e', rng.choice(self.events).id])
+            if rng.random() < 0.5:
+                tags.append(['p', rng.choice(self.pubkeys)])
+            if rng.random() < 0.3:
+                tags.append(['t', rng.choice(["nostr", "bitcoin", "zaps"])])
+            if rng.random() < 0.1:
+                tags.append(['client'])
+            self.events.append(Event(
+                public_key=rng.choice(self.pubkeys),
+                content=f"event {i}",
+                created_at=1_000 + rng.randrange(100),
+                kind=rng.choice([EventKind.TEXT_NOTE, EventKind.ENCRYPTED_DIRECT_MESSAGE, EventKind.SET_METADATA, 7]),
+                tags=tags,
+            ))
+        self.batch = EventBatch(self.events)
+
+        self.filters = [Filter(), Filter(kinds=[]), Filter(authors=["unknown"]), Filter(event_refs=[])]
+        for _ in range(200):
+            kwargs = {}
+            if rng.random() < 0.2:
+                kwargs["event_ids"] = [e.id for e in rng.sample(self.events, 20)] + ["unknown"]
+            if rng.random() < 0.4:
+                kwargs["authors"] = rng.sample(self.pubkeys, 2)
+            if rng.random() < 0.4:
+                kwargs["kinds"] = rng.sample([EventKind.TEXT_NOTE, EventKind.SET_METADATA, 7], 2)
+            if rng.random() < 0.3:
+                kwargs["since"] = 1_000 + rng.randrange(100)
+            if rng.random() < 0.3:
+                kwargs["until"] = 1_000 + rng.randrange(100)
+            if rng.random() < 0.3:
+                kwargs["pubkey_refs"] = rng.sample(self.pubkeys, 2)
+            if rng.random() < 0.2:
+                kwargs["event_refs"] = [e.id for e in rng.sample(self.events, 50)]
+            filter = Filter(**kwargs)
+            if rng.random() < 0.2:
+                filter.add_arbitrary_tag('t', ["nostr", "zaps"])
+            self.filters.append(filter)
+
+
+    def test_mask_matches_filter(self):
+        """ the vectorized mask should agree with Filter.matches for every Event """
+        for filter in self.filters:
+            expected = [filter.matches(e) for e in self.events]
+            assert filter.matches_batch(self.batch).tolist() == expected
+
+
+    def test_select_matches_filters(self):
+        """ select should return the Events matching any of the Filters, in order """
+        for i in range(0, len(self.filters) - 1, 2):
+            filters = Filters(self.filters[i:i + 2])
+            selected = filters.match_batch(self.batch)
+            assert selected.events == [e for e in self.events if filters.match(e)]
+
+            # A subset should itself filter consistently
+            filter = self.filters[-1 - i]
+            assert selected.mask(filter).tolist() == [filter.matches(e) for e in selected.events]
+
+
+    def test_empty_batch(self):
+        batch = EventBatch([])
+        assert len(batch.select(Filters([Filter(kinds=[EventKind.TEXT_NOTE])]))) == 0
@@ -0,0 +1,157 @@
+import json
+import sqlite3
+import time
+from nostr.event import Event, EventKind
+from nostr.event_store import EventStore
+from nostr.filter import Filter, Filters
+from nostr.key import PrivateKey
+from nostr.message_pool import MessagePool
+
+
+
+class TestEventStore:
+    def setup_class(self):
+        self.pk1 = PrivateKey()
+        self.pk2 = PrivateKey()
+        self.events = []
+        for i in range(20):
+            pk = self.pk1 if i % 2 == 0 else self.pk2
+            event = Event(
+                content=f"event {i}",
+                created_at=1_000 + i,
+                kind=EventKind.TEXT_NOTE if i % 3 else EventKind.SET_METADATA,
+                tags=[['t', "even" if i % 2 == 0 else "odd"], ['client', "test"]],
+            )
+            if self.events:
+                event.add_event_ref(self.events[-1].id)
+            pk.sign_event(event)
+            self.events.append(event)
+
+        self.store = EventStore()
+        self.store.add_events(self.events)
+
+
+    def expected(self, filter: Filter) -> list:
+        matches = sorted([e for e in self.events if filter.matches(e)], key=lambda e: e.created_at, reverse=True)
+        return matches[:filter.limit] if filter.limit is not None else matches
+
+
+    def test_dedup_by_id(self):
+        """ adding the same Event again should be a no-op """
+        assert len(self.store) == len(self.events)
+        assert self.store.add(self.events[0]) is False
+        assert len(self.store) == len(self.events)
+        assert self.events[0].id in self.store
+
+
+    def test_roundtrip(self):
+        """ stored Events should come back unchanged and still verify """
+        event = self.store.get(self.events[5].id)
+        assert event == self.events[5]
+        assert event.id == self.events[5].id
+        assert event.verify()
+
+
+    def test_query_matches_filters(self):
+        """ query results should agree with Filter.matches, newest first, respecting limit """
+        filters = [
+            Filter(),
+            Filter(limit=3),
+            Filter(authors=[self.pk1.public_key.hex()], kinds=[EventKind.TEXT_NOTE]),
+            Filter(since=1_005, until=1_010),
+            Filter(event_ids=[self.events[3].id, self.events[7].id]),
+            Filter(event_refs=[self.events[3].id]),
+            Filter(authors=[self.pk2.public_key.hex()], limit=2),
+            Filter(kinds=[]),
+        ]
+        odd = Filter()
+        odd.add_arbitrary_tag('t', ["odd"])
+        filters.append(odd)
+        client = Filter(limit=4)
+        client.add_arbitrary_tag('client', ["test"])
+        filters.append(client)
+
+        for filter in filters:
+            assert [e.id for e in self.store.query(Filters([filter]))] == [e.id for e in self.expected(filter)]
+
+
+    def test_query_multiple_filters(self):
+        """ multiple Filters should be OR'd with each limit applied per Filter """
+        filters = Filters([
+            Filter(authors=[self.pk1.public_key.hex()], limit=2),
+            Filter(authors=[self.pk2.public_key.hex()], limit=2),
+        ])
+        assert [e.id for e in self.store.query(filters)] == [e.id for e in self.events[-4:][::-1]]
+
+
+    def test_narrow_filters(self):
+        """ narrow_filters should move since up to the newest stored match """
+        narrowed = self.store.narrow_filters(Filters([
+            Filter(authors=[self.pk1.public_key.hex()]),
+            Filter(authors=[PrivateKey().public_key.hex()]),
+        ]))
+        assert narrowed[0].since == self.events[-2].created_at
+        assert narrowed[0].authors == [self.pk1.public_key.hex()]
+        assert narrowed[1].since is None
+
+
+    def test_message_pool_writes_through(self):
+        """ a MessagePool with an EventStore should persist new events """
+        store = EventStore()
+        message_pool = MessagePool(event_store=store)
+        for event in self.events[:3] + self.events[:3]:
+            message_pool.add_message(json.dumps(["EVENT", "sub", json.loads(event.to_message())[1]]), "wss://relay")
+        assert len(store) == 3
+
+
+    def test_large_filters(self):
+        """ filters with more values than SQLite allows bound variables should still be answered """
+        store = EventStore()
+        store._conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)   # SQLite's default before 3.32
+        store.add_events(self.events)
+        ids = [e.id for e in self.events[:5]] + [f"{i:064x}" for i in range(2_000)]
+        authors = [self.pk1.public_key.hex()] + [f"{i:064x}" for i in range(1_000)]
+        refs = [e.id for e in self.events] + [f"{i:064x}" for i in range(1_000)]
+        filter = Filter(event_ids=ids, authors=authors, event_refs=refs)
+        assert store.query(Filters([filter])) == self.expected(filter)
+        assert store.query(Filters([Filter(event_ids=ids[:3])])) == self.expected(Filter(event_ids=ids[:3]))
+
+
+    def test_add_commits_in_batches(self, tmp_path):
+        """ add should commit every `commit_every` new events, and on flush and close """
+        path = str(tmp_path / "events.db")
+        store = EventStore(path, commit_every=3)
+        reader = EventStore(path)
+        for event in self.events[:2] + self.events[:1]:
+            store.add(event)
+        assert len(store) == 2 and len(reader) == 0
+        store.add(self.events[2])
+        assert len(reader) == 3
+        store.add(self.events[3])
+        store.flush()
+        assert len(reader) == 4
+        store.add(self.events[4])
+        store.close()
+        assert len(reader) == 5
+
+
+    def test_commit_interval(self, tmp_path):
+        """ a partial batch should be committed after `commit_interval`, releasing the write lock """
+        path = str(tmp_path / "events.db")
+        store = EventStore(path, commit_every=100, commit_interval=0.05)
+        other = EventStore(path, commit_every=1)
+        store.add(self.events[0])
+        deadline = time.monotonic() + 5
+        while len(other) == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(other) == 1
+
+        # The other connection can write once the timer has committed
+        assert other.add(self.events[1]) is True
+        store.close()
+        other.close()
+
+
+    def test_zero_limit(self):
+        """ a Filter with limit 0 should match nothing """
+        assert self.store.query(Filters([Filter(limit=0)])) == []
@@ -370,6 +370,38 @@ class TestFilter:
             assert filter.matches(event) is False
 
 
+    def test_recompiles_after_changes(self):
+        """ should pick up criteria changed after the Filter was first used """
+        filter = Filter(authors=[self.pk1.public_key.hex()])
+        assert filter.matches(self.pk1_thread[0])
+        assert filter.matches(self.pk2_thread[0]) is False
+
+        filter.authors = [self.pk2.public_key.hex()]
+        assert filter.matches(self.pk1_thread[0]) is False
+        assert filter.matches(self.pk2_thread[0])
+
+        # pk2's self-reply is the only one of pk2's notes with an 'e' tag
+        filter.add_arbitrary_tag('e', [self.pk2_thread[0].id])
+        assert filter.matches(self.pk2_thread[0]) is False
+        assert filter.matches(self.pk2_thread[1])
+
+
+    def test_json_unchanged_by_matching(self):
+        """ matching should not alter the Filter's json form """
+        filter = Filter(event_ids=["some_event_id"], kinds=[EventKind.TEXT_NOTE], pubkey_refs=["some_pubkey"], limit=10)
+        filter.add_arbitrary_tag('t', ["nostr"])
+        json_object = filter.to_json_object()
+
+        filter.matches(self.pk1_thread[0])
+        assert filter.to_json_object() == json_object == {
+            "ids": ["some_event_id"],
+            "kinds": [EventKind.TEXT_NOTE],
+            "limit": 10,
+            "#p": ["some_pubkey"],
+            "#t": ["nostr"],
+        }
+
+
     def test_event_refs_json(self):
         """ should insert event_refs as "#e" in json """
         filter = Filter(event_refs=["some_event_id"])
@@ -1,5 +1,8 @@
-from nostr.event import Event, EncryptedDirectMessage
-from nostr.key import PrivateKey
+import pickle
+import threading
+import pytest
+from nostr.event import Event, EncryptedDirectMessage, parse_schnorr_pubkey
+from nostr.key import PrivateKey, mine_vanity_key, mine_vanity_key_parallel
 
 
 def test_eq_true():
@@ -51,6 +54,43 @@ class TestEvent:
         assert event.public_key == self.sender_pubkey
 
 
+    def test_sign_events(self):
+        """ sign_events should sign every Event in place, caching ids that match a fresh hash """
+        recipient = PrivateKey().public_key.hex()
+        for num_workers in (1, 2):
+            events = [Event(content=f"event {i}", tags=[['t', "bulk"]]) for i in range(20)]
+            events.append(EncryptedDirectMessage(cleartext_content="secret", recipient_pubkey=recipient))
+            signed = self.sender_pk.sign_events(events, num_workers=num_workers, min_parallel_batch=10, chunk_size=6)
+            assert signed is events
+            for event in events:
+                assert event.public_key == self.sender_pubkey
+                assert event._id is not None and not event._id_supplied
+                assert event.id == Event.compute_id(event.public_key, event.created_at, event.kind, event.tags, event.content)
+                assert event.verify()
+            assert events[-1].content is not None
+
+
+    def test_native_keys_reused(self):
+        """ signing and verifying should reuse the parsed native keys rather than re-parsing per signature """
+        pk = PrivateKey()
+        native = pk._native_key
+        event = Event(content="Hello, world!")
+        pk.sign_event(event)
+        assert pk._native_key is native
+
+        parsed = parse_schnorr_pubkey.cache_info().currsize
+        assert event.verify() and pk.public_key.verify_signed_message_hash(event.id, event.signature)
+        hits = parse_schnorr_pubkey.cache_info().hits
+        assert event.verify()
+        assert parse_schnorr_pubkey.cache_info().hits == hits + 1
+        assert parse_schnorr_pubkey.cache_info().currsize <= parsed + 1
+
+        # Replacing the secret replaces the native key
+        other = PrivateKey()
+        pk.raw_secret = other.raw_secret
+        assert pk.sign_message_hash(bytes.fromhex(event.id)) == other.sign_message_hash(bytes.fromhex(event.id))
+
+
 
 class TestEncryptedDirectMessage:
     def setup_class(self):
@@ -97,3 +137,120 @@ class TestEncryptedDirectMessage:
         self.sender_pk.sign_event(dm)
 
         assert dm.content is not None
+
+
+    def test_shared_secret_cache(self):
+        """ Should reuse cached shared secrets and zero them out when they're evicted """
+        pk = PrivateKey(shared_secret_cache_size=2)
+        peers = [PrivateKey().public_key.hex() for _ in range(3)]
+        expected = PrivateKey(pk.raw_secret, shared_secret_cache_size=0).compute_shared_secret(peers[0])
+
+        assert pk.compute_shared_secret(peers[0]) == expected
+        assert pk.compute_shared_secret(peers[0]) == expected
+        assert pk.shared_secrets.hits == 1
+
+        cached = pk.shared_secrets.get(peers[0])
+        pk.compute_shared_secret(peers[1])
+        pk.compute_shared_secret(peers[2])
+        assert peers[0] not in pk.shared_secrets
+        assert cached == bytes(32)
+
+        held = [pk.shared_secrets.get(peer) for peer in peers[1:]]
+        pk.shared_secrets.clear()
+        assert held == [bytes(32), bytes(32)]
+
+        # An uncached key computes (and discards) the secret every time
+        uncached = PrivateKey(pk.raw_secret, shared_secret_cache_size=0)
+        assert uncached.compute_shared_secret(peers[0]) == expected
+        assert len(uncached.shared_secrets) == 0
+
+        # The cache doesn't travel with a pickled key
+        restored = pickle.loads(pickle.dumps(pk))
+        assert restored == pk and len(restored.shared_secrets) == 0 and restored.shared_secrets.capacity == 2
+
+
+    def test_shared_secret_not_locked_during_use(self):
+        """ ECDH and encryption shouldn't hold the cache lock, and a secret evicted mid-use stays intact until released """
+        pk = PrivateKey(shared_secret_cache_size=1)
+        peers = [PrivateKey().public_key.hex() for _ in range(2)]
+        expected = PrivateKey(pk.raw_secret, shared_secret_cache_size=0).compute_shared_secret(peers[0])
+
+        def lock_is_free():
+            # Another thread must be able to take the lock
+            acquired = []
+            thread = threading.Thread(target=lambda: acquired.append(pk.shared_secrets.lock.acquire(timeout=1)) or pk.shared_secrets.lock.release())
+            thread.start()
+            thread.join()
+            return acquired == [True]
+
+        ecdh = pk._ecdh
+        pk._ecdh = lambda public_key_hex: (lock_is_free() or pytest.fail("locked during ECDH")) and ecdh(public_key_hex)
+
+        held = []
+        def use(secret):
+            assert lock_is_free()
+            # Evicts this secret from the cache while it's still in use
+            pk.compute_shared_secret(peers[1])
+            assert peers[0] not in pk.shared_secrets
+            assert secret == expected
+            held.append(secret)
+            return bytes(secret)
+
+        assert pk._with_shared_secret(peers[0], use) == expected
+        assert held[0] == bytes(32)
+        assert not pk.shared_secrets._users and not pk.shared_secrets._retired
+
+
+    def test_decrypt_messages(self):
+        """ Should decrypt a backlog with one ECDH per sender, returning None for undecryptable messages """
+        senders = [PrivateKey() for _ in range(3)]
+        inbox = []
+        for i in range(12):
+            sender = senders[i % 3]
+            inbox.append((sender.encrypt_message(f"message {i}", self.recipient_pubkey), sender.public_key.hex()))
+        inbox.append(("not an encrypted message", senders[0].public_key.hex()))
+        inbox.append((inbox[0][0], "00" * 32))
+        inbox.append((inbox[1][0], senders[0].public_key.hex()))  # encrypted for another sender
+
+        recipient = PrivateKey(self.recipient_pk.raw_secret, shared_secret_cache_size=1)
+        ecdh_calls = []
+        ecdh = recipient._ecdh
+        recipient._ecdh = lambda public_key_hex: ecdh_calls.append(public_key_hex) or ecdh(public_key_hex)
+
+        results = recipient.decrypt_messages(inbox)
+        assert results[:12] == [f"message {i}" for i in range(12)]
+        assert results[12] is None and results[13] is None
+        assert results[14] != "message 1"
+        assert sorted(ecdh_calls) == sorted([s.public_key.hex() for s in senders] + ["00" * 32])
+
+
+
+class TestVanityKey:
+    def test_mine_vanity_key_prefix(self):
+        """ mine_vanity_key should find a key whose npub starts with the prefix """
+        sk = mine_vanity_key(prefix="qq")
+        assert sk.public_key.bech32().startswith("npub1qq")
+
+
+    def test_mine_vanity_key_suffix(self):
+        """ mine_vanity_key should find a key whose npub ends with the suffix """
+        sk = mine_vanity_key(suffix="q")
+        assert sk.public_key.bech32().endswith("q")
+
+
+    def test_mine_vanity_key_invalid_chars(self):
+        """ non-bech32 characters can never match so should be rejected up front """
+        with pytest.raises(ValueError):
+            mine_vanity_key(prefix="b")
+        with pytest.raises(ValueError):
+            mine_vanity_key(suffix="1")
+
+
+    def test_mine_vanity_key_parallel(self):
+        """ mine_vanity_key_parallel should find a matching key and report progress stats """
+        result = mine_vanity_key_parallel(prefix="q", suffix="q", num_workers=2, chunk_size=1000)
+        npub = result.private_key.public_key.bech32()
+        assert npub.startswith("npub1q") and npub.endswith("q")
+        assert result.attempts > 0
+        assert result.expected_attempts == 32 ** 2
+        assert result.expected_time > 0
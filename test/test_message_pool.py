@@ -0,0 +1,275 @@
+import asyncio
+import json
+import time
+from concurrent.futures import Executor, Future
+from nostr.event import Event, EventKind
+from nostr.filter import Filter, Filters
+from nostr.key import PrivateKey
+from nostr.message_pool import AsyncMessagePool, DedupSet, IngestOptions, MessagePool, VerificationStage
+from nostr.subscription import Subscription
+
+
+def event_message(event: Event, subscription_id: str = "sub") -> str:
+    return json.dumps(["EVENT", subscription_id, json.loads(event.to_message())[1]])
+
+
+class TestMessagePool:
+    def setup_class(self):
+        self.pk = PrivateKey()
+        self.events = []
+        for i in range(5):
+            event = Event(content=f"event {i}")
+            self.pk.sign_event(event)
+            self.events.append(event)
+
+
+    def test_dedup_across_relays(self):
+        """ the same event from multiple relays should only be queued once """
+        message_pool = MessagePool()
+        for url in ["wss://relay1", "wss://relay2"]:
+            for event in self.events:
+                message_pool.add_message(event_message(event), url)
+
+        assert message_pool.events.qsize() == len(self.events)
+        stats = message_pool.dedup_stats()
+        assert stats["size"] == len(self.events)
+        assert stats["hits"] == len(self.events)
+        assert stats["hit_rate"] == 0.5
+
+
+    def test_dedup_capacity(self):
+        """ the dedup set should never grow past its capacity """
+        message_pool = MessagePool(dedup_capacity=2)
+        for event in self.events:
+            message_pool.add_message(event_message(event), "wss://relay1")
+
+        stats = message_pool.dedup_stats()
+        assert stats["size"] == 2
+        assert stats["evictions"] == len(self.events) - 2
+
+
+
+class TestIngestPipeline:
+    def setup_class(self):
+        self.pk = PrivateKey()
+        self.event = Event(content="hello", kind=EventKind.TEXT_NOTE)
+        self.pk.sign_event(self.event)
+
+
+    def forged_message(self) -> str:
+        e = json.loads(self.event.to_message())[1]
+        e["sig"] = "00" * 64
+        return json.dumps(["EVENT", "sub", e])
+
+
+    def test_malformed_frames_rejected(self):
+        """ frames that don't decode or have the wrong shape should be counted and dropped """
+        message_pool = MessagePool()
+        message_pool.add_message("not json", "wss://relay1")
+        message_pool.add_message('["EVENT", "sub", {"id": 1}]', "wss://relay1")
+        message_pool.add_message('["UNKNOWN", "sub"]', "wss://relay1")
+
+        assert not message_pool.has_events()
+        stats = message_pool.ingest_stats()
+        assert stats["decode"]["rejected"] == 1
+        assert stats["validate"]["rejected"] == 2
+
+
+    def test_verify_after_dedup(self):
+        """ duplicates should be dropped before verification and forgeries shouldn't block valid copies """
+        message_pool = MessagePool(ingest_options=IngestOptions(verify_signatures=True))
+        message_pool.add_message(self.forged_message(), "wss://relay1")
+        assert not message_pool.has_events()
+
+        for url in ["wss://relay1", "wss://relay2", "wss://relay3"]:
+            message_pool.add_message(event_message(self.event), url)
+        assert message_pool.events.qsize() == 1
+
+        stats = message_pool.ingest_stats()
+        assert stats["dedup"]["count"] == 4
+        assert stats["dedup"]["rejected"] == 2
+        assert stats["verify"]["count"] == 2
+        assert stats["verify"]["rejected"] == 1
+
+
+    def test_forgery_verified_on_another_thread_does_not_block_valid_copy(self, monkeypatch):
+        """ a valid copy arriving while a forgery is verified on another relay's thread should still be delivered """
+        message_pool = MessagePool(ingest_options=IngestOptions(verify_signatures=True))
+        verify = Event.verify
+
+        def verify_with_interleaving(event):
+            if event.signature == "00" * 64:
+                # relay2's copy arrives while relay1's is still being verified
+                message_pool.add_message(event_message(self.event), "wss://relay2")
+                assert not message_pool.has_events()
+            return verify(event)
+
+        monkeypatch.setattr(Event, "verify", verify_with_interleaving)
+        message_pool.add_message(self.forged_message(), "wss://relay1")
+        assert message_pool.events.qsize() == 1
+        assert message_pool.get_event().url == "wss://relay2"
+        assert message_pool.ingest_stats()["verify"]["rejected"] == 1
+
+        # Once a copy has verified, later ones are plain duplicates
+        message_pool.add_message(event_message(self.event), "wss://relay3")
+        assert not message_pool.has_events() and not message_pool._in_flight
+
+
+    def test_configurable_stages(self):
+        """ dedup can be turned off and frames decoded with a custom function """
+        decoded = []
+        def decode(message):
+            decoded.append(message)
+            return json.loads(message)
+
+        message_pool = MessagePool(ingest_options=IngestOptions(dedup=False, decode=decode))
+        for url in ["wss://relay1", "wss://relay2"]:
+            message_pool.add_message(event_message(self.event), url)
+        assert message_pool.events.qsize() == 2
+        assert len(decoded) == 2
+        assert message_pool.ingest_stats()["dedup"]["count"] == 0
+
+
+    def test_subscription_and_filter_stages(self):
+        """ events for unknown subscriptions or not matching their Filters should be dropped """
+        message_pool = MessagePool(ingest_options=IngestOptions(require_subscription=True, apply_filters=True))
+        subscriptions = {"sub": Subscription("sub", Filters([Filter(kinds=[EventKind.SET_METADATA])]))}
+
+        message_pool.add_message(event_message(self.event, "other"), "wss://relay1", subscriptions)
+        message_pool.add_message(event_message(self.event, "sub"), "wss://relay1", subscriptions)
+        assert not message_pool.has_events()
+
+        subscriptions["sub"].filters = Filters([Filter(kinds=[EventKind.TEXT_NOTE])])
+        message_pool.add_message(event_message(self.event, "sub"), "wss://relay1", subscriptions)
+        assert message_pool.events.qsize() == 1
+
+        stats = message_pool.ingest_stats()
+        assert stats["subscription"]["rejected"] == 1
+        assert stats["filter"]["rejected"] == 1
+        assert stats["enqueue"]["count"] == 1
+
+
+
+class ManualExecutor(Executor):
+    """ Runs submitted work only when told to """
+    def __init__(self) -> None:
+        self.queued = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.queued.append((future, fn, args))
+        return future
+
+    def run_all(self):
+        while self.queued:
+            future, fn, args = self.queued.pop(0)
+            future.set_result(fn(*args))
+
+
+
+class TestVerificationStage:
+    def setup_class(self):
+        pk = PrivateKey()
+        self.events = []
+        for i in range(50):
+            event = Event(content=f"event {i}")
+            pk.sign_event(event)
+            self.events.append(event)
+
+
+    def test_verified_in_order(self):
+        """ verified events should reach the pool in arrival order, followed by EOSE, with forgeries dropped """
+        verifier = VerificationStage(max_workers=4)
+        message_pool = MessagePool(ingest_options=IngestOptions(verify_signatures=True), verifier=verifier)
+
+        for event in self.events:
+            message_pool.add_message(event_message(event), "wss://relay1")
+        message_pool.add_message(json.dumps(["EOSE", "sub"]), "wss://relay1")
+
+        assert message_pool.get_eose_notice().subscription_id == "sub"
+        received = [message_pool.get_event().event.id for _ in range(len(self.events))]
+        assert received == [event.id for event in self.events]
+        assert not message_pool.has_events()
+
+        verifier.close()
+        stats = verifier.stats()
+        assert stats["queue_depth"] == 0
+        assert stats["latency"]["count"] == len(self.events)
+
+
+    def test_forgery_in_flight_does_not_block_valid_copy(self):
+        """ a valid copy arriving while a forgery with the same id is being verified should still be delivered """
+        executor = ManualExecutor()
+        message_pool = MessagePool(ingest_options=IngestOptions(verify_signatures=True), verifier=VerificationStage(executor))
+
+        forged = json.loads(self.events[0].to_message())[1]
+        forged["sig"] = "00" * 64
+        message_pool.add_message(json.dumps(["EVENT", "sub", forged]), "wss://relay1")
+        message_pool.add_message(event_message(self.events[0]), "wss://relay2")
+        assert len(executor.queued) == 1
+
+        # The forgery fails, so the held copy from relay2 is verified next
+        executor.run_all()
+        assert message_pool.get_event().url == "wss://relay2"
+        assert message_pool.verifier.stats()["latency"]["rejected"] == 1
+
+
+    def test_shut_down_executor(self):
+        """ events submitted after the executor shut down should be dropped without holding back EOSE """
+        verifier = VerificationStage(max_workers=1)
+        message_pool = MessagePool(ingest_options=IngestOptions(verify_signatures=True), verifier=verifier)
+        verifier.close()
+
+        message_pool.add_message(event_message(self.events[0]), "wss://relay1")
+        message_pool.add_message(json.dumps(["EOSE", "sub"]), "wss://relay1")
+        assert message_pool.has_eose_notices() and not message_pool.has_events()
+        assert verifier.stats()["queue_depth"] == 0
+        assert verifier.stats()["latency"]["rejected"] == 1
+
+
+    def test_async_pool_delivers_on_loop(self):
+        """ AsyncMessagePool should receive verified events and EOSE on its own loop, in order """
+        verifier = VerificationStage(max_workers=4)
+
+        async def scenario():
+            message_pool = AsyncMessagePool(ingest_options=IngestOptions(verify_signatures=True), verifier=verifier)
+            for event in self.events:
+                message_pool.add_message(event_message(event), "wss://relay1")
+            message_pool.add_message(json.dumps(["EOSE", "sub"]), "wss://relay1")
+            received = [(await message_pool.get_event()).event.id for _ in range(len(self.events))]
+            await message_pool.get_eose_notice()
+            return received
+
+        received = asyncio.run(asyncio.wait_for(scenario(), timeout=10))
+        verifier.close()
+        assert received == [event.id for event in self.events]
+
+
+
+class TestDedupSet:
+    def test_lru_order(self):
+        """ a re-seen id should be kept over older ones """
+        dedup = DedupSet(capacity=2)
+        assert dedup.add("00" * 32)
+        assert dedup.add("11" * 32)
+        assert not dedup.add("00" * 32)
+        assert dedup.add("22" * 32)
+
+        assert "00" * 32 in dedup
+        assert "11" * 32 not in dedup
+
+
+    def test_max_age(self):
+        """ ids not seen within max_age should expire """
+        dedup = DedupSet(max_age=0.05)
+        assert dedup.add("00" * 32)
+        assert not dedup.add("00" * 32)
+        time.sleep(0.1)
+        assert dedup.add("00" * 32)
+
+
+    def test_non_hex_id(self):
+        """ ids that aren't hex should still be deduplicated """
+        dedup = DedupSet()
+        assert dedup.add("not hex")
+        assert not dedup.add("not hex")
@@ -0,0 +1,100 @@
+import threading
+import time
+
+from nostr import codec
+from nostr.event import Event
+from nostr.filter import Filters
+from nostr.key import PrivateKey
+from nostr.message_pool import IngestOptions, MessagePool
+from nostr.metrics import Histogram, to_prometheus
+from nostr.relay import Relay
+from nostr.relay_manager import RelayManager
+
+
+
+class SentWebSocket:
+    def __init__(self) -> None:
+        self.sent = []
+        self.sent_one = threading.Event()
+
+    def send(self, message: str):
+        self.sent.append(message)
+        self.sent_one.set()
+
+
+
+class TestMetrics:
+    def setup_class(self):
+        pk = PrivateKey()
+        self.event = Event(content="héllo")
+        pk.sign_event(self.event)
+        self.frame = codec.dumps(["EVENT", "sub", self.event.to_json_object()])
+
+
+    def test_histogram_buckets(self):
+        """ should count each observation in the first bucket whose bound is >= the value """
+        histogram = Histogram((1.0, 2.0))
+        for value in (0.5, 1.0, 1.5, 3.0):
+            histogram.observe(value)
+        assert histogram.cumulative() == [(1.0, 2), (2.0, 3), (float("inf"), 4)]
+        assert histogram.sum == 6.0
+
+
+    def test_relay_metrics(self):
+        """ should record traffic, parse/verify times, duplicates and REQ -> EOSE latency per relay """
+        pool = MessagePool(ingest_options=IngestOptions(verify_signatures=True))
+        relay = Relay("wss://a", pool)
+        relay.ws = SentWebSocket()
+
+        threading.Thread(target=relay.queue_worker, daemon=True).start()
+        relay.add_subscription("sub", Filters())
+        relay.publish('["REQ","sub",{}]')
+        relay.connected = True
+        assert relay.ws.sent_one.wait(timeout=5)
+        deadline = time.time() + 5
+        while relay.metrics.messages_sent == 0 and time.time() < deadline:
+            time.sleep(0.001)
+
+        relay._on_message(None, self.frame)
+        # Binary frames are handed over as bytes
+        relay._on_message(None, self.frame.encode())
+        relay._on_message(None, '["EOSE","sub"]')
+
+        metrics = relay.metrics.to_json_object()
+        assert metrics["messages_sent"] == 1 and metrics["bytes_sent"] == len('["REQ","sub",{}]')
+        assert metrics["messages_received"] == 3
+        assert metrics["bytes_received"] == 2 * len(self.frame.encode()) + len('["EOSE","sub"]')
+        assert metrics["events_received"] == 2 and metrics["duplicate_ratio"] == 0.5
+        assert metrics["parse_seconds"]["count"] == 3
+        assert metrics["verify_seconds"]["count"] == 1
+        assert metrics["req_to_eose_seconds"]["count"] == 1
+
+        # Metrics for an unregistered url aren't collected
+        pool.add_message(self.frame, "wss://unknown")
+        assert "wss://unknown" not in pool._relay_metrics
+
+
+    def test_prometheus_export(self):
+        """ should export relay counters, gauges and histograms plus pool gauges in Prometheus text format """
+        relay_manager = RelayManager()
+        relay = Relay('wss://"quoted"', relay_manager.message_pool)
+        relay_manager.relays[relay.url] = relay
+        relay._on_message(None, self.frame)
+        relay.publish("queued")
+
+        assert relay_manager.metrics()["relays"][relay.url]["send_queue_depth"] == 1
+        assert relay_manager.metrics()["message_pool"]["events_queue_depth"] == 1
+
+        text = relay_manager.prometheus_metrics()
+        assert text.endswith("\n")
+        lines = text.splitlines()
+        label = 'relay="wss://\\"quoted\\""'
+        assert f"nostr_relay_messages_received_total{{{label}}} 1" in lines
+        assert f"nostr_relay_send_queue_depth{{{label}}} 1" in lines
+        assert f'nostr_relay_parse_seconds_bucket{{{label},le="+Inf"}} 1' in lines
+        assert f"nostr_relay_parse_seconds_count{{{label}}} 1" in lines
+        assert "# TYPE nostr_relay_parse_seconds histogram" in lines
+        assert "nostr_pool_events_queue_depth 1" in lines
+        assert "nostr_pool_dedup_size 1" in lines
+
+        assert to_prometheus([]).startswith("# TYPE nostr_relay_messages_received_total counter")
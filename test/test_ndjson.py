@@ -0,0 +1,116 @@
+import gzip
+import io
+import pytest
+
+from nostr import ndjson
+from nostr.event import Event
+from nostr.filter import Filter, Filters
+from nostr.key import PrivateKey
+
+
+
+class TestNdjson:
+    def setup_class(self):
+        self.pk = PrivateKey()
+        self.events = []
+        for i in range(50):
+            event = Event(content=f"event {i}", kind=1 if i % 2 else 7, created_at=1_680_000_000 + i)
+            self.pk.sign_event(event)
+            self.events.append(event)
+
+
+    def test_roundtrip_gzip(self, tmp_path):
+        """ should write and read back the same Events through a gzip-compressed path """
+        path = tmp_path / "events.jsonl.gz"
+        assert ndjson.write_events(iter(self.events), path) == len(self.events)
+        with open(path, "rb") as f:
+            assert f.read(2) == ndjson.GZIP_MAGIC
+
+        restored = list(ndjson.read_events(path, verify=True))
+        assert [e.id for e in restored] == [e.id for e in self.events]
+        assert restored == self.events
+
+
+    def test_roundtrip_zstd(self, tmp_path):
+        """ should detect zstd input from its magic bytes """
+        pytest.importorskip("zstandard")
+        path = tmp_path / "events.jsonl.zst"
+        ndjson.write_events(self.events, path)
+        renamed = tmp_path / "events.jsonl"
+        path.rename(renamed)
+        assert list(ndjson.read_events(renamed)) == self.events
+
+
+    def test_file_objects(self):
+        """ should read and write binary file objects, compressing only when asked to """
+        buffer = io.BytesIO()
+        ndjson.write_events(self.events, buffer)
+        assert buffer.getvalue().count(b"\n") == len(self.events)
+        buffer.seek(0)
+        assert list(ndjson.read_events(buffer)) == self.events
+
+        buffer = io.BytesIO()
+        ndjson.write_events(self.events, buffer, compression="gzip")
+        assert gzip.decompress(buffer.getvalue()).count(b"\n") == len(self.events)
+        assert list(ndjson.read_events(io.BufferedReader(io.BytesIO(buffer.getvalue())))) == self.events
+
+        # Compression is detected even on file objects without `peek`
+        source = io.BytesIO(buffer.getvalue())
+        assert list(ndjson.read_events(source)) == self.events
+        assert not source.closed
+        if ndjson.zstandard is not None:
+            buffer = io.BytesIO()
+            ndjson.write_events(self.events, buffer, compression="zstd")
+            assert list(ndjson.read_events(io.BytesIO(buffer.getvalue()))) == self.events
+
+
+    def test_decompressors_closed(self, monkeypatch):
+        """ the gzip reader should be closed even when reading stops early, and a bad CRC should be reported """
+        buffer = io.BytesIO()
+        ndjson.write_events(self.events, buffer, compression="gzip")
+        data = buffer.getvalue()
+        opened = []
+
+        class RecordingGzipFile(gzip.GzipFile):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                opened.append(self)
+
+        monkeypatch.setattr(gzip, "GzipFile", RecordingGzipFile)
+        source = io.BytesIO(data)
+        events = ndjson.read_events(source)
+        assert next(events) == self.events[0]
+        events.close()
+        assert len(opened) == 1 and opened[0].closed and not source.closed
+
+        # The last 8 bytes are the CRC32 and size of the uncompressed data
+        corrupt = data[:-8] + bytes(4) + data[-4:]
+        with pytest.raises(gzip.BadGzipFile):
+            list(ndjson.read_events(io.BytesIO(corrupt)))
+
+
+    def test_filters_and_verification(self):
+        """ should yield only matching Events and drop forged ones when verifying """
+        lines = [ndjson.codec.dumps_bytes(e.to_json_object()) for e in self.events]
+        forged = self.events[1].to_json_object()
+        forged["content"] = "forged"
+        lines.insert(3, ndjson.codec.dumps_bytes(forged))
+        data = b"\n".join(lines) + b"\n\n"
+
+        filters = Filters([Filter(kinds=[1], until=1_680_000_020)])
+        expected = [e for e in self.events if filters.match(e)]
+
+        unverified = list(ndjson.read_events(io.BytesIO(data), filters=filters))
+        assert len(unverified) == len(expected) + 1
+
+        verified = list(ndjson.read_events(io.BytesIO(data), filters=filters, verify=True, batch_size=4, max_workers=2))
+        assert verified == expected
+
+
+    def test_invalid_lines(self):
+        """ should report the line number of a malformed line, or skip it if asked to """
+        data = ndjson.codec.dumps_bytes(self.events[0].to_json_object()) + b"\n{not json\n[1, 2]\n"
+        with pytest.raises(ValueError) as e:
+            list(ndjson.read_events(io.BytesIO(data)))
+        assert "line 2" in str(e.value)
+        assert list(ndjson.read_events(io.BytesIO(data), skip_invalid=True)) == self.events[:1]
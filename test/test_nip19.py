@@ -0,0 +1,115 @@
+import pytest
+
+from nostr import bech32, nip19
+from nostr.event import Event
+from nostr.key import PrivateKey, PublicKey
+from nostr.nip19 import AddressPointer, EventPointer, ProfilePointer
+
+
+# Examples from the NIP-19 spec
+SPEC_PUBKEY = "3bf0c63fcb93463407af97a5e5ee64fa883d107ef9e558472c4eb9aaaefa459d"
+SPEC_NPUB = "npub180cvv07tjdrrgpa0j7j7tmnyl2yr6yr7l8j4s3evf6u64th6gkwsyjh6w6"
+SPEC_NPROFILE = "nprofile1qqsrhuxx8l9ex335q7he0f09aej04zpazpl0ne2cgukyawd24mayt8gpp4mhxue69uhhytnc9e3k7mgpz4mhxue69uhkg6nzv9ejuumpv34kytnrdaksjlyr9p"
+SPEC_RELAYS = ["wss://r.x.com", "wss://djbas.sadkb.com"]
+
+
+
+class TestNip19:
+    def setup_class(self):
+        self.pk = PrivateKey()
+        self.pubkey = self.pk.public_key.hex()
+        self.event = Event(content="Hello, world!", kind=30023, tags=[['d', "article"]])
+        self.pk.sign_event(self.event)
+
+
+    def test_spec_vectors(self):
+        """ should encode and decode the NIP-19 spec examples """
+        assert nip19.encode_npub(SPEC_PUBKEY) == SPEC_NPUB
+        assert nip19.decode(SPEC_NPUB) == ("npub", SPEC_PUBKEY)
+        assert nip19.encode_nprofile(SPEC_PUBKEY, SPEC_RELAYS) == SPEC_NPROFILE
+        assert nip19.decode(SPEC_NPROFILE) == ("nprofile", ProfilePointer(SPEC_PUBKEY, SPEC_RELAYS))
+        assert nip19.decode("nostr:" + SPEC_NPROFILE)[1].public_key == SPEC_PUBKEY
+
+
+    def test_round_trips(self):
+        """ should round trip every entity, including ones longer than 90 characters """
+        relays = [f"wss://relay{i}.example.com" for i in range(10)]
+        assert nip19.decode(nip19.encode_nsec(self.pk.hex())) == ("nsec", self.pk.hex())
+        assert nip19.decode(nip19.encode_note(self.event.id)) == ("note", self.event.id)
+
+        nevent = nip19.encode_nevent(self.event.id, relays, self.pubkey, self.event.kind)
+        assert len(nevent) > 90
+        assert nip19.decode(nevent) == ("nevent", EventPointer(self.event.id, relays, self.pubkey, 30023))
+        assert nip19.decode(nip19.encode_nevent(self.event.id)) == ("nevent", EventPointer(self.event.id))
+
+        naddr = nip19.encode_naddr("article", self.pubkey, 30023, relays[:2])
+        assert nip19.decode(naddr) == ("naddr", AddressPointer("article", self.pubkey, 30023, relays[:2]))
+        assert nip19.decode(nip19.encode_naddr("", self.pubkey, 30000)) == ("naddr", AddressPointer("", self.pubkey, 30000))
+
+        assert nip19.decode(nip19.encode_nrelay("wss://relay.example.com")) == ("nrelay", "wss://relay.example.com")
+
+
+    def test_unknown_tlv_ignored(self):
+        """ should skip TLV types it doesn't know about """
+        data = bytes((0, 32)) + bytes.fromhex(SPEC_PUBKEY) + bytes((9, 3)) + b"abc" + bytes((1, 5)) + b"wss:/"
+        assert nip19.decode(bech32.bech32_encode_bytes("nprofile", data)) == ("nprofile", ProfilePointer(SPEC_PUBKEY, ["wss:/"]))
+
+
+    def test_invalid(self):
+        """ should raise ValueError for malformed entities """
+        invalid = [
+            SPEC_NPROFILE[:-1] + "q",                                                       # bad checksum
+            bech32.bech32_encode_bytes("npub", bytes(31)),                                  # wrong length
+            bech32.bech32_encode_bytes("nprofile", bytes((0, 32)) + bytes(20)),             # truncated TLV
+            bech32.bech32_encode_bytes("nprofile", bytes((1, 3)) + b"wss"),                 # no pubkey
+            bech32.bech32_encode_bytes("naddr", bytes((0, 1)) + b"d" + bytes((2, 32)) + bytes(32)),  # no kind
+            bech32.bech32_encode_bytes("nfoo", bytes(32)),                                  # unknown prefix
+            bech32.bech32_encode_bytes("npub", bytes(32), bech32.Encoding.BECH32M),         # wrong spec
+        ]
+        for entity in invalid:
+            with pytest.raises(ValueError):
+                nip19.decode(entity)
+        with pytest.raises(ValueError):
+            nip19.encode_nprofile("abcd")
+        with pytest.raises(ValueError):
+            nip19.encode_nevent(self.event.id, ["wss://" + "x" * 300])
+        for relays in ("wss://relay.example.com", [b"wss://relay.example.com"]):
+            with pytest.raises(ValueError):
+                nip19.encode_nprofile(self.pubkey, relays)
+        for kind in (-1, 2 ** 32, "1", True):
+            with pytest.raises(ValueError):
+                nip19.encode_nevent(self.event.id, kind=kind)
+            with pytest.raises(ValueError):
+                nip19.encode_naddr("d", self.pubkey, kind)
+
+
+    def test_keys_require_their_own_prefix(self):
+        """ PublicKey.from_npub and PrivateKey.from_nsec should only accept a 32-byte npub or nsec respectively """
+        assert PublicKey.from_npub(SPEC_NPUB).hex() == SPEC_PUBKEY
+        assert PrivateKey.from_nsec(self.pk.bech32()) == self.pk
+        for npub in (self.pk.bech32(), bech32.bech32_encode_bytes("npub", bytes(20)), SPEC_NPROFILE, "npub1"):
+            with pytest.raises(ValueError):
+                PublicKey.from_npub(npub)
+        for nsec in (SPEC_NPUB, bech32.bech32_encode_bytes("nsec", bytes(33)), "nsec1"):
+            with pytest.raises(ValueError):
+                PrivateKey.from_nsec(nsec)
+
+
+    def test_memoized_encodings(self):
+        """ PublicKey.bech32 and Event.note_id should be memoized until the underlying bytes change """
+        public_key = PublicKey(bytes.fromhex(SPEC_PUBKEY))
+        assert public_key.bech32() == SPEC_NPUB
+        assert public_key.bech32() is public_key.bech32()
+        public_key.raw_bytes = bytes.fromhex(self.pubkey)
+        assert public_key.bech32() == nip19.encode_npub(self.pubkey)
+        assert nip19.decode(public_key.nprofile(SPEC_RELAYS))[1] == ProfilePointer(self.pubkey, SPEC_RELAYS)
+
+        event = Event(content="memo", public_key=self.pubkey)
+        note_id = event.note_id
+        assert note_id is event.note_id
+        assert nip19.decode(note_id) == ("note", event.id)
+        event.content = "changed"
+        assert event.note_id != note_id
+        assert nip19.decode(event.note_id) == ("note", event.id)
+
+        assert nip19.decode(self.event.nevent(SPEC_RELAYS))[1] == EventPointer(self.event.id, SPEC_RELAYS, self.pubkey, 30023)
@@ -0,0 +1,60 @@
+import threading
+
+from nostr import pow
+from nostr.event import EventKind
+from nostr.key import PrivateKey
+from nostr.pow import count_leading_zero_bits, mine_event, mine_event_parallel
+
+
+def test_mine_event():
+    """ mine_event should return a correctly populated Event that meets the difficulty """
+    pubkey = PrivateKey().public_key.hex()
+    event = mine_event("Hello, nostr!", 8, pubkey, EventKind.TEXT_NOTE, [['t', 'pow']])
+
+    assert event.content == "Hello, nostr!"
+    assert event.public_key == pubkey
+    assert event.kind == EventKind.TEXT_NOTE
+    assert event.signature is None
+    assert event.tags[0][0] == "nonce" and event.tags[0][2] == "8"
+    assert event.tags[1] == ['t', 'pow']
+    assert count_leading_zero_bits(event.id) >= 8
+
+
+def test_mine_event_parallel():
+    """ mine_event_parallel should find a valid nonce and report its hash rate """
+    pubkey = PrivateKey().public_key.hex()
+    result = mine_event_parallel("Hello, nostr!", 10, pubkey, EventKind.TEXT_NOTE, num_workers=2, chunk_size=1000)
+
+    assert result.event is not None
+    assert result.event.public_key == pubkey
+    assert count_leading_zero_bits(result.event.id) >= 10
+    assert result.attempts > 0
+    assert result.hash_rate > 0
+
+
+def test_mine_event_parallel_timeout():
+    """ mine_event_parallel should give up without an Event when it times out """
+    pubkey = PrivateKey().public_key.hex()
+    result = mine_event_parallel("Hello, nostr!", 200, pubkey, EventKind.TEXT_NOTE, num_workers=2, timeout=0.5, chunk_size=1000)
+
+    assert result.event is None
+    assert result.elapsed >= 0.5
+
+
+def test_mine_event_parallel_cancel():
+    """ setting `cancel` should stop mining promptly, even partway through a chunk """
+    pubkey = PrivateKey().public_key.hex()
+    cancel = threading.Event()
+    threading.Timer(0.3, cancel.set).start()
+    result = mine_event_parallel("Hello, nostr!", 200, pubkey, EventKind.TEXT_NOTE, num_workers=2, cancel=cancel, chunk_size=10 ** 12)
+
+    assert result.event is None
+    assert result.elapsed < 5
+
+    stop_event = threading.Event()
+    stop_event.set()
+    pow._init_worker(stop_event)
+    try:
+        assert pow._mine_nonce_range(b"", b"", pow._target(200), 1, 10 ** 12) == (None, 0)
+    finally:
+        pow._init_worker(None)
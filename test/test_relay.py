@@ -0,0 +1,263 @@
+import threading
+import pytest
+from queue import Full
+from nostr import codec
+from nostr.event import Event
+from nostr.filter import Filter, Filters
+from nostr.key import PrivateKey
+from nostr.message_pool import MessagePool
+from nostr.relay import CircuitState, ReconnectPolicy, ReconnectScheduler, Relay, SendQueue, SendQueueOverflowPolicy
+
+
+class FlakyWebSocket:
+    """ Stands in for WebSocketApp; fails the first `failures` sends """
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.sent = []
+        self.all_sent = threading.Event()
+        self.expected = 0
+
+    def send(self, message: str):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection dropped")
+        self.sent.append(message)
+        if len(self.sent) == self.expected:
+            self.all_sent.set()
+
+
+def start_worker(relay: Relay):
+    threading.Thread(target=relay.queue_worker, daemon=True).start()
+
+
+def test_queue_waits_for_connection():
+    """ messages published before the relay connects should be sent, in order, once it does """
+    relay = Relay("ws://localhost", MessagePool())
+    relay.ws = FlakyWebSocket()
+    relay.ws.expected = 3
+    start_worker(relay)
+
+    for i in range(3):
+        relay.publish(str(i))
+    assert relay.ws.sent == []
+
+    relay.connected = True
+    assert relay.ws.all_sent.wait(timeout=5)
+    assert relay.ws.sent == ["0", "1", "2"]
+
+
+def test_failed_send_keeps_order():
+    """ a failed send should be retried before any later message """
+    relay = Relay("ws://localhost", MessagePool())
+    relay.ws = FlakyWebSocket(failures=1)
+    relay.ws.expected = 3
+    for i in range(3):
+        relay.publish(str(i))
+    start_worker(relay)
+
+    relay.connected = True
+    # The failure marks the relay disconnected until the connection reopens
+    assert not relay.ws.all_sent.wait(timeout=0.2)
+    assert relay.connected is False
+
+    relay.connected = True
+    assert relay.ws.all_sent.wait(timeout=5)
+    assert relay.ws.sent == ["0", "1", "2"]
+
+
+def test_overflow_policies():
+    """ a bounded SendQueue should apply its overflow policy when full """
+    queue = SendQueue(maxsize=2, overflow_policy=SendQueueOverflowPolicy.DROP_OLDEST)
+    for i in range(3):
+        queue.put(str(i))
+    queue.set_ready(True)
+    assert queue.get_batch() == ["1", "2"]
+    assert queue.num_dropped == 1
+
+    queue = SendQueue(maxsize=2, overflow_policy=SendQueueOverflowPolicy.DROP_NEWEST)
+    for i in range(3):
+        queue.put(str(i))
+    queue.set_ready(True)
+    assert queue.get_batch() == ["0", "1"]
+
+    queue = SendQueue(maxsize=1, overflow_policy=SendQueueOverflowPolicy.RAISE)
+    queue.put("0")
+    with pytest.raises(Full):
+        queue.put("1")
+
+
+def test_blocking_put_resumes_when_drained():
+    """ with the BLOCK policy, publishing to a full queue should wait until there is room """
+    queue = SendQueue(maxsize=1)
+    queue.put("0")
+    publisher = threading.Thread(target=queue.put, args=("1",))
+    publisher.start()
+    publisher.join(timeout=0.1)
+    assert publisher.is_alive()
+
+    queue.set_ready(True)
+    assert queue.get_batch() == ["0"]
+    publisher.join(timeout=5)
+    assert queue.get_batch() == ["1"]
+
+
+def test_reconnect_backoff_and_circuit_breaker():
+    """ reconnect delays should grow exponentially up to max_delay, then pause while the circuit is open """
+    policy = ReconnectPolicy(initial_delay=1, max_delay=5, multiplier=2, jitter=0, failure_threshold=5, open_duration=60)
+    scheduler = ReconnectScheduler(policy)
+    assert [scheduler.record_failure() for _ in range(4)] == [1, 2, 4, 5]
+    assert scheduler.state == CircuitState.CLOSED
+
+    assert scheduler.record_failure() == 60
+    assert scheduler.state == CircuitState.OPEN
+
+    # A failed trial attempt reopens the circuit straight away
+    scheduler.before_attempt()
+    assert scheduler.state == CircuitState.HALF_OPEN
+    assert scheduler.record_failure() == 60
+    assert scheduler.state == CircuitState.OPEN
+
+    scheduler.before_attempt()
+    scheduler.record_success()
+    assert scheduler.state == CircuitState.CLOSED
+    assert scheduler.record_failure() == 1
+
+    jittered = ReconnectScheduler(ReconnectPolicy(initial_delay=10, jitter=0.5))
+    delays = [ReconnectScheduler(jittered.policy).record_failure() for _ in range(50)]
+    assert all(5 <= delay <= 10 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+class DroppingWebSocket:
+    """ Stands in for WebSocketApp; every connection opens and then fails """
+    def __init__(self, relay: Relay) -> None:
+        self.relay = relay
+        self.attempts = 0
+
+    def run_forever(self, **kwargs):
+        self.attempts += 1
+        self.relay._on_open(self)
+        self.relay._on_error(self, ConnectionError("dropped"))
+
+    def close(self):
+        pass
+
+
+def test_connect_loop_stops_at_error_threshold():
+    """ connect should keep reconnecting after drops, without recursion, until error_threshold is exceeded """
+    relay = Relay("ws://localhost", MessagePool(), reconnect_policy=ReconnectPolicy(initial_delay=0.001, max_delay=0.001))
+    relay.ws = DroppingWebSocket(relay)
+    relay.error_threshold = 20
+    relay.connect()
+    assert relay.ws.attempts == 21
+    assert relay.connected is False
+    assert relay.reconnect_scheduler.consecutive_failures == 20
+
+
+def test_close_stops_reconnecting():
+    """ close should interrupt the wait before the next reconnect attempt """
+    relay = Relay("ws://localhost", MessagePool(), reconnect_policy=ReconnectPolicy(initial_delay=60, jitter=0))
+    relay.ws = DroppingWebSocket(relay)
+    worker = threading.Thread(target=relay.connect)
+    worker.start()
+    worker.join(timeout=0.1)
+    assert worker.is_alive()
+    relay.close()
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert relay.ws.attempts == 1
+
+
+def test_resubscribe_resumes_from_last_created_at():
+    """ on reconnect, subscriptions should be re-sent with `since` moved up to the newest event received by EOSE """
+    pool = MessagePool()
+    relay = Relay("ws://localhost", pool)
+    relay.add_subscription("fresh", Filters([Filter(kinds=[1])]))
+    relay.add_subscription("resumed", Filters([Filter(kinds=[1], since=100), Filter(kinds=[7], since=2_000_000_000)]))
+
+    pk = PrivateKey()
+    events = [Event(content=f"hi {i}", created_at=1_680_000_000 - i) for i in range(3)]
+    for event in events:
+        pk.sign_event(event)
+    receive = lambda event: pool.add_message(codec.dumps(["EVENT", "resumed", event.to_json_object()]), relay.url, relay.subscriptions)
+
+    # Stored events arrive newest first, so a reconnect before EOSE must not skip the older ones
+    receive(events[0])
+    assert relay.subscriptions["resumed"].last_created_at is None
+    assert codec.loads(relay.resubscribe_messages()[1])[2]["since"] == 100
+
+    receive(events[1])
+    pool.add_message(codec.dumps(["EOSE", "resumed"]), relay.url, relay.subscriptions)
+    assert relay.subscriptions["resumed"].last_created_at == 1_680_000_000
+
+    # Live events after EOSE move it straight away
+    live = Event(content="live", created_at=1_680_000_100)
+    pk.sign_event(live)
+    receive(live)
+    assert relay.subscriptions["resumed"].last_created_at == 1_680_000_100
+    relay.subscriptions["resumed"].last_created_at = 1_680_000_000
+
+    fresh, resumed = [codec.loads(message) for message in relay.resubscribe_messages()]
+    assert fresh == ["REQ", "fresh", {"kinds": [1]}]
+    assert resumed[2]["since"] == 1_680_000_000
+    assert resumed[3]["since"] == 2_000_000_000
+
+    # The subscription's own Filters are left untouched
+    assert relay.subscriptions["resumed"].filters[0].since == 100
+
+    # Only reconnects re-send subscriptions, ahead of anything already queued
+    relay.publish("queued")
+    relay._on_open(None)
+    assert relay.queue.qsize() == 1
+    relay._on_open(None)
+    assert relay.queue.get_batch() == relay.resubscribe_messages() + ["queued"]
+
+    # The re-sent REQ starts a new backfill, which again only counts once it's complete
+    assert not relay.subscriptions["resumed"].eose_received
+    receive(live)
+    assert relay.subscriptions["resumed"].last_created_at == 1_680_000_000
+
+
+def test_close_before_connect():
+    """ a Relay closed before its connect loop starts should stay closed until reopened """
+    relay = Relay("ws://localhost", MessagePool(), reconnect_policy=ReconnectPolicy(initial_delay=0.001, max_delay=0.001))
+    relay.ws = DroppingWebSocket(relay)
+    relay.close()
+    relay.connect()
+    assert relay.ws.attempts == 0
+
+    relay.reopen()
+    relay.error_threshold = 1
+    relay.connect()
+    assert relay.ws.attempts == 2
+
+
+@pytest.mark.parametrize("backend", codec.available_backends())
+def test_raw_frames(backend):
+    """ binary frames reach the pool as undecoded bytes, so the codec must reject anything that isn't UTF-8 JSON """
+    previous = codec.get_backend()
+    codec.set_backend(backend)
+    try:
+        pool = MessagePool()
+        relay = Relay("ws://localhost", pool)
+        pk = PrivateKey()
+        event = Event(content="héllo 😀 wörld")
+        pk.sign_event(event)
+        frame = codec.dumps(["EVENT", "sub", event.to_json_object()])
+
+        relay._on_message(None, frame.encode())
+        received = pool.get_event().event
+        assert received.content == event.content and received.verify()
+
+        for invalid in (
+                frame.encode()[:-1],                              # truncated
+                frame.encode().replace("é".encode(), b"\xe9"),    # Latin-1, not UTF-8
+                b'["NOTICE","\xff\xfe"]',                         # invalid UTF-8 in a string
+                '["NOTICE","hi"]'.encode("utf-16"),               # not UTF-8 at all
+                b""):
+            relay._on_message(None, invalid)
+        assert not pool.has_events() and not pool.has_notices()
+        assert pool.ingest_stats()["decode"]["rejected"] == 5
+        assert relay.metrics.messages_received == 6
+    finally:
+        codec.set_backend(previous)
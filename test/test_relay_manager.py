@@ -1,6 +1,12 @@
+import threading
+import time
+
 import pytest
 from nostr.event import Event
 from nostr.key import PrivateKey
+from nostr.message_pool import MessagePool
+from nostr.publish import PublishResult
+from nostr.relay import Relay
 from nostr.relay_manager import RelayManager, RelayException
 
 
@@ -28,3 +34,82 @@ def test_only_relay_valid_events():
     # Properly signed Event can be relayed
     pk.sign_event(event)
     relay_manager.publish_event(event)
+
+
+def test_publish_collects_ok_responses():
+    """ publish_event should return a PublishResult that tracks each relay's OK against the quorum """
+    pk = PrivateKey()
+    event = Event(content="Hello, world!")
+    pk.sign_event(event)
+
+    relay_manager = RelayManager()
+    urls = ["wss://a", "wss://b", "wss://c"]
+    for url in urls:
+        relay_manager.relays[url] = Relay(url, relay_manager.message_pool)
+    relay_manager.relays["wss://c"].policy.should_write = False
+
+    result = relay_manager.publish_event(event, quorum=2, timeout=0.05)
+    assert result.urls == ["wss://a", "wss://b"]
+    assert relay_manager.relays["wss://a"].queue.qsize() == 1
+    assert relay_manager.relays["wss://c"].queue.qsize() == 0
+
+    # Nobody has answered yet
+    assert not result.done()
+    assert result.pending == ["wss://a", "wss://b"]
+
+    pool = relay_manager.message_pool
+    pool.add_message(f'["OK","{event.id}",true,""]', "wss://a")
+    pool.add_message(f'["OK","{event.id}",true,"duplicate: already have it"]', "wss://c")
+    assert not result.done()
+    pool.add_message(f'["OK","{event.id}",false,"blocked: no"]', "wss://b")
+
+    assert result.done() and result.wait() is False
+    assert result.accepted == ["wss://a"]
+    assert result.rejected == ["wss://b"]
+    assert result.acks["wss://b"].message == "blocked: no"
+    assert result.acks["wss://a"].latency >= 0
+    assert pool.get_ok_notice().event_id == event.id
+
+    # Every relay answered, so the result stopped listening
+    assert event.id not in pool._ok_listeners
+
+    relaxed = relay_manager.publish_event(event, quorum=1)
+    pool.add_message(f'["OK","{event.id}",true,""]', "wss://b")
+    assert relaxed.wait(timeout=0) is True
+    relaxed.close()
+
+    # Timing out stops listening, as does the ack window expiring
+    timed_out = relay_manager.publish_event(event, quorum=2, timeout=0.01)
+    assert timed_out.wait() is False
+    assert event.id not in pool._ok_listeners
+    PublishResult(event.id, urls, pool, ack_window=0)
+    pool.add_message(f'["OK","{event.id}",true,""]', "wss://a")
+    assert event.id not in pool._ok_listeners
+
+
+def test_publish_wait_bounded_by_ack_window():
+    """ wait without a timeout should give up once the ack window passes if a relay never answers """
+    pool = MessagePool()
+    result = PublishResult("00" * 32, ["wss://a", "wss://silent"], pool, quorum=2, ack_window=0.1)
+    pool.add_message(f'["OK","{"00" * 32}",true,""]', "wss://a")
+
+    started = time.monotonic()
+    assert result.wait() is False
+    assert time.monotonic() - started < 5
+    assert result.done() and result.timed_out == ["wss://silent"]
+    assert result.accepted == ["wss://a"]
+
+    # close wakes a waiter with a longer timeout
+    result = PublishResult("00" * 32, ["wss://silent"], pool)
+    threading.Timer(0.05, result.close).start()
+    assert result.wait(timeout=30) is False
+    assert result.timed_out == ["wss://silent"]
+
+
+def test_ok_notices_bounded():
+    """ the ok_notices queue should keep only the most recent OKs when nobody consumes it """
+    pool = MessagePool(ok_notices_capacity=2)
+    for i in range(5):
+        pool.add_message(f'["OK","{i:064x}",true,""]', "wss://a")
+    assert pool.ok_notices.qsize() == 2 and pool.ok_notices_dropped == 3
+    assert pool.get_ok_notice().event_id == f"{3:064x}"
@@ -0,0 +1,87 @@
+import random
+from nostr.event import Event, EventKind
+from nostr.filter import Filter, Filters
+from nostr.key import PrivateKey
+from nostr.subscription import SubscriptionRouter
+
+
+
+class TestSubscriptionRouter:
+    def setup_class(self):
+        rng = random.Random(1)
+        self.pubkeys = [PrivateKey().public_key.hex() for _ in range(5)]
+        self.events = []
+        for i in range(60):
+            tags = []
+            if self.events and rng.random() < 0.5:
+                tags.append(['e', rng.choice(self.events).id])
+            if rng.random() < 0.5:
+                tags.append(['p', rng.choice(self.pubkeys)])
+            if rng.random() < 0.3:
+                tags.append(['t', rng.choice(["nostr", "bitcoin"])])
+            self.events.append(Event(
+                public_key=rng.choice(self.pubkeys),
+                content=f"event {i}",
+                created_at=1_000 + i,
+                kind=rng.choice([EventKind.TEXT_NOTE, EventKind.ENCRYPTED_DIRECT_MESSAGE, EventKind.SET_METADATA]),
+                tags=tags,
+            ))
+
+        self.subscriptions = {}
+        for i in range(40):
+            kwargs = {}
+            if rng.random() < 0.2:
+                kwargs["event_ids"] = [e.id for e in rng.sample(self.events, 3)]
+            if rng.random() < 0.4:
+                kwargs["authors"] = rng.sample(self.pubkeys, 2)
+            if rng.random() < 0.4:
+                kwargs["kinds"] = [rng.choice([EventKind.TEXT_NOTE, EventKind.ENCRYPTED_DIRECT_MESSAGE])]
+            if rng.random() < 0.3:
+                kwargs["since"] = 1_000 + rng.randrange(60)
+            if rng.random() < 0.3:
+                kwargs["until"] = 1_000 + rng.randrange(60)
+            if rng.random() < 0.3:
+                kwargs["pubkey_refs"] = [rng.choice(self.pubkeys)]
+            if rng.random() < 0.2:
+                kwargs["event_refs"] = [e.id for e in rng.sample(self.events, 10)]
+            filter = Filter(**kwargs)
+            if rng.random() < 0.2:
+                filter.add_arbitrary_tag('t', ["nostr"])
+            self.subscriptions[f"sub{i}"] = Filters([filter, Filter(authors=[rng.choice(self.pubkeys)], kinds=[EventKind.SET_METADATA])] if i % 5 == 0 else [filter])
+
+
+    def expected_routes(self, event: Event) -> set:
+        return {id for id, filters in self.subscriptions.items() if filters.match(event)}
+
+
+    def test_route_matches_filters(self):
+        """ route() should return exactly the subscriptions whose Filters match """
+        router = SubscriptionRouter()
+        for id, filters in self.subscriptions.items():
+            router.add_subscription(id, filters)
+
+        for event in self.events:
+            assert router.route(event) == self.expected_routes(event)
+
+
+    def test_remove_subscription(self):
+        """ removed subscriptions should no longer be routed to """
+        router = SubscriptionRouter()
+        for id, filters in self.subscriptions.items():
+            router.add_subscription(id, filters)
+
+        removed = list(self.subscriptions)[::2]
+        for id in removed:
+            router.remove_subscription(id)
+        assert len(router) == len(self.subscriptions) - len(removed)
+
+        for event in self.events:
+            assert router.route(event) == self.expected_routes(event) - set(removed)
+
+
+    def test_wildcard_subscription(self):
+        """ an unconstrained Filter should match everything """
+        router = SubscriptionRouter()
+        router.add_subscription("all", Filters([Filter()]))
+        for event in self.events:
+            assert router.route(event) == {"all"}